@@ -1,20 +1,35 @@
 # download_data.py
-# Downloads and extracts a zip file from a specified URL to a local directory.
+# Downloads a zip file from a specified URL to a local directory and extracts the raw data CSV.
 # Creates the target directory if it doesn't exist.
-# Saves the downloaded zip file and extracts its contents.
+# The download is streamed to disk, resumed if interrupted and skipped if the file is unchanged.
 
 import click
-import requests
-import zipfile
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.download import download_file, extract_member
+from src.profiling import phase, profiled
 
 @click.command()
 @click.option('--url', type=str, help="URL of dataset to be downloaded")
 @click.option('--write-to', type=str, help="Path to directory where raw data will be written to")
+@click.option('--member', type=str, default="Maternal Health Risk Data Set.csv", help="Name of the file to extract from the zip (default: Maternal Health Risk Data Set.csv)")
+@click.option('--sha256', type=str, default=None, help="Expected SHA-256 of the zip; if the local copy matches, no request is made")
+@click.option('--retries', type=int, default=3, help="Number of times an interrupted download is resumed (default: 3)")
+@click.option('--profile', is_flag=True, default=False, help="Record the time and memory of each phase as a Chrome trace")
+@click.option('--profile-to', type=str, default=None, help="Path of the --profile trace (default: results/profiles/<script>-<time>.json)")
 
-def main(url, write_to):
+@profiled("download_data")
+def main(url, write_to, member, sha256, retries):
     """
-    Download and extract a zip file from a given URL.
+    Download a zip file from a given URL and extract the raw data from it.
+
+    The zip is streamed to disk in 1 MiB blocks rather than held in memory.
+    An interrupted download is resumed with an HTTP Range request, both
+    within this run (up to ``retries`` times) and on the next run. The SHA-256
+    and the server's ETag/Last-Modified of a finished download are recorded
+    next to the zip, so an unchanged file is not downloaded again. Only
+    ``member`` is extracted, and only if the extracted copy differs.
 
     Parameters
     ----------
@@ -23,12 +38,19 @@ def main(url, write_to):
     write_to : str
         The path to the directory where the zip file will be downloaded
         and extracted. The directory will be created if it does not exist.
+    member : str
+        Name of the file to extract from the zip.
+    sha256 : str or None
+        Expected SHA-256 hex digest of the zip. A download with a different
+        digest is discarded and an error is raised.
+    retries : int
+        Number of times an interrupted download is resumed before giving up.
 
     Returns
     -------
     None
-        The function downloads the file and extracts its contents to the 
-        specified directory.
+        The function downloads the file (if needed) and extracts ``member``
+        to the specified directory.
     """
 
     # create directory if it does not already exist
@@ -39,13 +61,14 @@ def main(url, write_to):
     zip_path = os.path.join(write_to, file_name)
 
     # download the zip file
-    request = requests.get(url)
-    with open(zip_path, 'wb') as f:
-        f.write(request.content)
+    with phase("download", url=url):
+        status = download_file(url, zip_path, expected_sha256=sha256, retries=retries)
+    click.echo(f"{file_name}: {status}")
 
-    # extract the zip file
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(write_to)
+    # extract the raw data file
+    with phase("extract", member=member):
+        status = extract_member(zip_path, member, write_to)
+    click.echo(f"{member}: {status}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
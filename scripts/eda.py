@@ -7,25 +7,90 @@ import warnings
 warnings.filterwarnings("ignore")
 
 import os
+import sys
 import click
-import altair as alt
-import pandas as pd
-import math
-import matplotlib.pyplot as plt
-import seaborn as sns
 import io
-from deepchecks.tabular import Dataset
-from deepchecks.tabular.checks import FeatureLabelCorrelation, FeatureFeatureCorrelation
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.schema import COMPACT_DTYPES, inferred_dtypes
+from src.data_io import read_table
+from src.density import stratified_sample, class_densities
+from src.correlation_checks import feature_label_check, feature_feature_check
+from src.figures import FigureRenderer, render_correlation_heatmap, render_density_grid
+from src.profiling import phase, profiled
 
 FEATURE_COLS = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate"]
 
 
+def plot_eda_figures(train_df, plot_to, renderer, density_engine="kde", density_sample=None, seed=123):
+    """
+    Compute what the correlation heatmap and the feature density grid show
+    and hand each figure to ``renderer`` (a ``src.figures.FigureRenderer``),
+    which draws and saves it in a worker process.
+
+    With ``density_engine="binned"`` the densities are computed here from
+    per-class binned counts (``src.density``) and only the curves are sent;
+    with ``"kde"`` the rows are sent and ``sns.kdeplot`` runs on them, which
+    takes time proportional to their number. ``density_sample`` limits the
+    density grid to a stratified sample of that many rows, drawn with
+    ``seed``; the heatmap always uses every row.
+    """
+    corr_matrix = train_df[FEATURE_COLS].corr()
+    renderer.submit(
+        "correlation_heatmap",
+        render_correlation_heatmap,
+        corr_matrix,
+        os.path.join(plot_to, "correlation_heatmap.png"),
+    )
+
+    # feature distributions by risk level, coloured in order of appearance like
+    # sns.kdeplot on the labels as strings (not in the categorical's order)
+    density_df = stratified_sample(train_df, "RiskLevel", density_sample, seed)
+    density_df = density_df.assign(RiskLevel=density_df["RiskLevel"].astype(object))
+    density_path = os.path.join(plot_to, "feature_densities_by_risklevel.png")
+    if density_engine == "binned":
+        densities = {feature: class_densities(density_df, feature, "RiskLevel") for feature in FEATURE_COLS}
+        levels = list(density_df["RiskLevel"].dropna().unique())
+        renderer.submit(
+            "feature_densities_by_risklevel",
+            render_density_grid,
+            FEATURE_COLS,
+            density_path,
+            densities=densities,
+            levels=levels,
+        )
+    else:
+        renderer.submit(
+            "feature_densities_by_risklevel",
+            render_density_grid,
+            FEATURE_COLS,
+            density_path,
+            data=density_df[FEATURE_COLS + ["RiskLevel"]],
+        )
+
+
+def run_correlation_checks(train_df):
+    """
+    Run the feature-label (PPS < 0.9) and feature-feature (no pair with an
+    absolute Spearman correlation above 0.92) correlation checks on the training data
+    and raise ``ValueError`` if either fails. These are the conditions of
+    the deepchecks ``FeatureLabelCorrelation`` and ``FeatureFeatureCorrelation``
+    checks, computed by ``src.correlation_checks`` without deepchecks.
+    """
+    feat_lab_passed, _ = feature_label_check(train_df, label="RiskLevel")
+    feat_feat_passed, _, _ = feature_feature_check(train_df, label="RiskLevel", n_pairs=0)
+    if not feat_lab_passed:
+        raise ValueError("Feature-Label correlation exceeds the maximum acceptable threshold.")
+    
+    if not feat_feat_passed:
+        raise ValueError("Feature-feature correlation exceeds the maximum acceptable threshold.")
+
+
 @click.command()
 @click.option(
     "--processed-training-data",
     type=str,
     required=True,
-    help="Path to processed maternal health training data (CSV).",
+    help="Path to processed maternal health training data (CSV, Parquet or Feather, or a .npy split index).",
 )
 @click.option(
     "--plot-to",
@@ -39,18 +104,70 @@ FEATURE_COLS = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate
     required=True,
     help="Directory to save EDA summary tables (describe, info)."
 )
-def main(processed_training_data, plot_to, tables_to):
+@click.option(
+    "--no-plots",
+    is_flag=True,
+    default=False,
+    help="Skip the EDA figures (and the plotting imports); only write summary tables.",
+)
+@click.option(
+    "--no-checks",
+    is_flag=True,
+    default=False,
+    help="Skip the feature-label and feature-feature correlation checks.",
+)
+@click.option(
+    "--density-engine",
+    type=click.Choice(["kde", "binned"]),
+    default="kde",
+    help="How the feature densities are computed: 'kde' (sns.kdeplot on every row) or 'binned' "
+         "(one pass of per-class binned counts; same figure, time grows far slower with the rows).",
+)
+@click.option(
+    "--density-sample",
+    type=int,
+    default=None,
+    help="Draw the feature densities from a stratified sample of this many rows.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=123,
+    help="Random seed of the --density-sample sample.",
+)
+@click.option(
+    "--render-workers",
+    type=int,
+    default=2,
+    help="Processes rendering the figures while the tables and checks are computed (0: render in this process).",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Record the time and memory of each phase as a Chrome trace.",
+)
+@click.option(
+    "--profile-to",
+    type=str,
+    default=None,
+    help="Path of the --profile trace (default: results/profiles/<script>-<time>.json).",
+)
+@profiled("eda")
+def main(processed_training_data, plot_to, tables_to, no_plots, no_checks, density_engine, density_sample, seed,
+         render_workers):
     """
     Generate exploratory data analysis (EDA) outputs for the maternal health
-    training dataset. The function reads the processed training CSV, computes
+    training dataset. The function reads the processed training data, computes
     summary statistics, creates diagnostic tables, and produces several plots
     describing correlations and feature distributions. It also performs 
-    data-validation checks using deepchecks.
+    correlation checks on the features (``src.correlation_checks``).
 
     Parameters
     ----------
     processed_training_data : str
-        Path to the processed maternal health training data (CSV file).
+        Path to the processed maternal health training data (CSV, Parquet
+        or Feather file).
         The dataset should contain the numeric feature columns specified in 
         `FEATURE_COLS` and the target column, ``RiskLevel``.
 
@@ -68,111 +185,77 @@ def main(processed_training_data, plot_to, tables_to):
         - ``train_describe.csv``: Statistical summary using ``DataFrame.describe``.
         - ``train_info.txt``: Output of ``DataFrame.info`` including data types and non-null counts.
 
+    no_plots : bool
+        If True, the figures are not produced and matplotlib/seaborn are
+        never imported.
+
+    no_checks : bool
+        If True, the correlation checks are skipped.
+
+    density_engine : str
+        ``"kde"`` to draw the feature densities with ``sns.kdeplot``, or
+        ``"binned"`` to compute them from per-class binned counts first.
+
+    density_sample : int or None
+        If given, the feature densities use a stratified sample of this many
+        rows.
+
+    seed : int
+        Random seed of the stratified sample.
+
+    render_workers : int
+        Number of processes the figures are rendered in, alongside the
+        summary tables and checks; 0 renders them in this process. The time
+        each figure took is printed.
+
     Returns
     -------
     None
         This function is executed for its side effects: producing files
-        (EDA tables, figures) and raising errors if deepchecks correlation 
-        validations fail.
+        (EDA tables, figures) and raising errors if the correlation checks
+        fail.
 
     Raises
     ------
     ValueError
-        If the feature–label correlation exceeds the acceptable threshold 
-        defined in ``FeatureLabelCorrelation`` checks.
+        If a feature's predictive power score for RiskLevel is 0.9 or more.
     
     ValueError
-        If the feature–feature correlation violates the maximum allowed
-        number of correlated feature pairs as defined in 
-        ``FeatureFeatureCorrelation`` checks.
+        If any pair of features has an absolute Spearman correlation above
+        0.92.
     """
     os.makedirs(plot_to, exist_ok=True)
     os.makedirs(tables_to, exist_ok=True)
     # read in data
-    train_df = pd.read_csv(processed_training_data)
-
-    # Summary tables
-    # 1. Describe table
-    describe_df = train_df.describe(include="all").transpose()
-    describe_df.to_csv(os.path.join(tables_to, "train_describe.csv"))
-
-    # 2. Info table
-    buf = io.StringIO()
-    train_df.info(buf=buf)
-    info_str = buf.getvalue()
-
-    with open(os.path.join(tables_to, "train_info.txt"), "w") as f:
-        f.write(info_str)
+    train_df = read_table(processed_training_data, dtypes=COMPACT_DTYPES)
 
-    
-    corr_matrix = train_df[FEATURE_COLS].corr()
-    corr_long = corr_matrix.reset_index().melt(id_vars="index")
-    corr_long.columns = ["Feature 1", "Feature 2", "Correlation"]
-
-    # visualize correlation heatmap
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(
-        corr_matrix, 
-        annot=True, 
-        fmt=".2f", 
-        cmap="viridis",
-        square=True,
-        cbar_kws={"label": "Correlation"}
-    )
-    plt.title("Correlation heatmap of maternal health features")
-    plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "correlation_heatmap.png"), dpi=300)
-    plt.close()
-    
+    # the figures are rendered in the background while the tables and checks run
+    with FigureRenderer(0 if no_plots else render_workers) as renderer:
+        if not no_plots:
+            with phase("figure data", density_engine=density_engine):
+                plot_eda_figures(train_df, plot_to, renderer, density_engine, density_sample, seed)
 
-    # visualize feature distributions by risk level
-    num_features = len(FEATURE_COLS)
-    cols = 3
-    rows = math.ceil(num_features / cols)
-    
-    fig, axes = plt.subplots(rows, cols, figsize=(12, 4 * rows), squeeze=False)
-    
-    for idx, feature in enumerate(FEATURE_COLS):
-        r, c = divmod(idx, cols)
-        ax = axes[r][c]
-    
-        sns.kdeplot(
-            data=train_df,
-            x=feature,
-            hue="RiskLevel",
-            fill=True,
-            alpha=0.4,
-            ax=ax
-        )
-        ax.set_title(f"{feature} distribution by RiskLevel")
-    
-    plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "feature_densities_by_risklevel.png"), dpi=300)
-    plt.close()
+        # Summary tables, with the dtypes pandas infers from a CSV rather than the compact ones
+        # 1. Describe table
+        with phase("summary tables"):
+            summary_df = inferred_dtypes(train_df)
+            describe_df = summary_df.describe(include="all").transpose()
+            describe_df.to_csv(os.path.join(tables_to, "train_describe.csv"))
 
-    # Data validation - correlation checks
+            # 2. Info table
+            buf = io.StringIO()
+            summary_df.info(buf=buf)
+            info_str = buf.getvalue()
 
-    mh_train_ds = Dataset(
-        train_df,
-        label="RiskLevel",
-        cat_features=[]
-    )
+            with open(os.path.join(tables_to, "train_info.txt"), "w") as f:
+                f.write(info_str)
 
-    # feature-label correlation check
-    check_feat_lab_corr = FeatureLabelCorrelation().add_condition_feature_pps_less_than(0.9)
-    feat_lab_result = check_feat_lab_corr.run(dataset=mh_train_ds)
+        if not no_checks:
+            with phase("correlation checks"):
+                run_correlation_checks(train_df)
 
-    # feature-feature correlation check
-    check_feat_feat_corr = FeatureFeatureCorrelation().add_condition_max_number_of_pairs_above_threshold(
-        threshold=0.92,
-        n_pairs=0
-    )
-    feat_feat_result = check_feat_feat_corr.run(dataset=mh_train_ds)
-    if not feat_lab_result.passed_conditions():
-        raise ValueError("Feature-Label correlation exceeds the maximum acceptable threshold.")
-    
-    if not feat_feat_result.passed_conditions():
-        raise ValueError("Feature-feature correlation exceeds the maximum acceptable threshold.")
+    for name, seconds in renderer.times.items():
+        click.echo(f"{name}.png: rendered in {seconds:.2f}s")
 
 
 if __name__ == "__main__":
@@ -7,17 +7,19 @@ import warnings
 warnings.filterwarnings("ignore")
 
 import os
+import sys
 import click
 import numpy as np
 import pandas as pd
 import pickle
 from sklearn import set_config
-from sklearn.metrics import fbeta_score, recall_score
-from sklearn.preprocessing import label_binarize
-from sklearn.metrics import roc_auc_score, RocCurveDisplay
-import matplotlib.pyplot as plt
-from sklearn.metrics import ConfusionMatrixDisplay
-
+# search objects fitted with --search-engine=kernel-cache are defined in src/
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.schema import COMPACT_DTYPES, model_features
+from src.data_io import read_table, iter_table
+from src.evaluation import EvaluationAccumulator, model_scores, score_range
+from src.figures import FigureRenderer, render_confusion_matrix, render_roc_curves
+from src.profiling import phase, profiled
 
 
 @click.command()
@@ -25,7 +27,7 @@ from sklearn.metrics import ConfusionMatrixDisplay
     "--processed-test-data",
     type=str,
     required=True,
-    help="Path to processed maternal health test data (CSV).",
+    help="Path to processed maternal health test data (CSV, Parquet or Feather, or a .npy split index).",
 )
 @click.option(
     "--columns-to-drop",
@@ -58,7 +60,68 @@ from sklearn.metrics import ConfusionMatrixDisplay
     show_default=True,
     help="Random seed.",
 )
-def main(processed_test_data, columns_to_drop, pipeline_from, plot_to, results_to, seed):
+@click.option(
+    "--metrics-only",
+    is_flag=True,
+    default=False,
+    help="Write the metric tables only; skip the figures and the plotting imports.",
+)
+@click.option(
+    "--render-workers",
+    type=int,
+    default=2,
+    show_default=True,
+    help="Processes rendering the figures while the metrics are computed (0: render in this process).",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=None,
+    help="Read and score the test data this many rows at a time (default: all at once).",
+)
+@click.option(
+    "--roc-bins",
+    type=int,
+    default=None,
+    help="Keep the scores as this many histogram bins per class instead of exactly, "
+         "so memory does not grow with the test set (the ROC curves and AUCs become approximate).",
+)
+@click.option(
+    "--bootstrap-resamples",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Bootstrap resamples of the test rows for the confidence intervals (0: no intervals).",
+)
+@click.option(
+    "--confidence",
+    type=float,
+    default=0.95,
+    show_default=True,
+    help="Confidence level of the bootstrap intervals.",
+)
+@click.option(
+    "--bootstrap-jobs",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Processes the bootstrap resamples are spread over.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Record the time and memory of each phase as a Chrome trace.",
+)
+@click.option(
+    "--profile-to",
+    type=str,
+    default=None,
+    help="Path of the --profile trace (default: results/profiles/<script>-<time>.json).",
+)
+@profiled("evaluate_maternal_health_risk_classifier")
+def main(processed_test_data, columns_to_drop, pipeline_from, plot_to, results_to, seed, metrics_only,
+         render_workers, chunk_size, roc_bins, bootstrap_resamples, confidence, bootstrap_jobs):
     """
     Evaluate the maternal health risk classification model on the processed
     test dataset and save evaluation metrics, confusion matrix, and ROC curves.
@@ -68,7 +131,8 @@ def main(processed_test_data, columns_to_drop, pipeline_from, plot_to, results_t
     Parameters
     ----------
     processed_test_data : str
-        Path to the processed maternal health test data CSV file.
+        Path to the processed maternal health test data (CSV, Parquet or
+        Feather file).
         The dataset must contain the target column ``RiskLevel``.
 
     columns_to_drop : str or None
@@ -91,10 +155,45 @@ def main(processed_test_data, columns_to_drop, pipeline_from, plot_to, results_t
             - ``confusion_matrix.png``: visual confusion matrix plot.
             - ``roc_curves.png``: One-vs-Rest ROC curve plot.
             - ``auc_scores.csv``: AUC values per class.
+            - ``test_score_intervals.csv``: bootstrap confidence intervals
+              of the scores and AUCs.
 
     seed : int, optional
         Random seed used for reproducibility (default: 123).
 
+    metrics_only : bool, optional
+        If True, only the CSV tables are written: the confusion matrix and
+        ROC figures are skipped and matplotlib is never imported
+        (default: False).
+
+    render_workers : int, optional
+        Number of processes the figures are rendered in while the remaining
+        metrics are computed; 0 renders them in this process (default: 2).
+        The time each figure took is printed.
+
+    chunk_size : int or None, optional
+        If given, the test data is read and scored in chunks of this many
+        rows; the metrics are accumulated over the chunks (default: None).
+
+    roc_bins : int or None, optional
+        If given, the ROC curves and AUCs are computed from per-class
+        histograms of the scores with this many bins, whose memory does not
+        depend on the number of rows (default: None, exact). The bootstrap
+        intervals need the exact scores and are not computed.
+
+    bootstrap_resamples : int, optional
+        Number of bootstrap resamples of the test rows; the model is not
+        run again. Resamples are drawn in blocks of at most 500, fewer for
+        large test sets, so a block holds at most about 8 million counts
+        whatever the number of rows. The time still grows with
+        ``bootstrap_resamples * rows``. 0 skips the intervals (default: 10000).
+
+    confidence : float, optional
+        Confidence level of the percentile intervals (default: 0.95).
+
+    bootstrap_jobs : int, optional
+        Number of processes computing the resamples (default: 1).
+
     Returns
     -------
     None
@@ -105,110 +204,86 @@ def main(processed_test_data, columns_to_drop, pipeline_from, plot_to, results_t
     set_config(transform_output="pandas")
     os.makedirs(results_to, exist_ok=True)
 
-    test_df = pd.read_csv(processed_test_data)
-
-    if columns_to_drop:
-        to_drop = pd.read_csv(columns_to_drop)["feats_to_drop"].tolist()
-        test_df = test_df.drop(columns=to_drop)
-
-    with open(pipeline_from, "rb") as f:
+    with phase("pickle load", path=pipeline_from), open(pipeline_from, "rb") as f:
         mh_fit = pickle.load(f)
 
+    to_drop = pd.read_csv(columns_to_drop)["feats_to_drop"].tolist() if columns_to_drop else []
+    if chunk_size:
+        chunks = iter_table(processed_test_data, chunk_size, dtypes=COMPACT_DTYPES)
+    else:
+        chunks = [read_table(processed_test_data, dtypes=COMPACT_DTYPES)]
 
-    X_test = test_df.drop(columns=["RiskLevel"])
-    y_test = test_df["RiskLevel"]
-
-    # accuracy
-    accuracy = mh_fit.score(X_test, y_test)
-
-    y_pred = mh_fit.predict(X_test)
-    
-    # calculate recall
-    recall_weighted = recall_score(
-    y_test,
-    y_pred,
-    average="weighted"
-    )
-
-    # compute F2 weighted
-    f2_weighted = fbeta_score(
-        y_test,
-        y_pred,
-        beta=2,
-        average="weighted",
-    )
-
-    test_scores = pd.DataFrame(
-        {
-            "accuracy": [accuracy],
-            "recall_weighted": [recall_weighted],
-            "F2_weighted": [f2_weighted],
-        }
-    )
-    test_scores.to_csv(
-        os.path.join(results_to, "test_scores.csv"),
-        index=False,
-    )
-
-    # confusion matrix
-    confusion_matrix = pd.crosstab(
-        y_test,
-        y_pred,
-        rownames=["true_risk_level"],
-        colnames=["predicted_risk_level"],
-    )
-    confusion_matrix.to_csv(
-        os.path.join(results_to, "confusion_matrix.csv")
-    )
-    
-    fig, ax = plt.subplots(figsize=(6, 5))
-    ConfusionMatrixDisplay.from_predictions(
-        y_test,
-        y_pred,
-        cmap="Blues",
-        ax=ax,
-        colorbar=True,
-    )
-    ax.set_title("Confusion Matrix – Maternal Health Risk Classifier")
-    fig.tight_layout()
-    fig.savefig(os.path.join(plot_to, "confusion_matrix.png"), dpi=300)
-    plt.close(fig)
-
-
-    # model must have decision_function or predict_proba
-    try:
-        y_score = mh_fit.decision_function(X_test)
-    except AttributeError:
-        y_score = mh_fit.predict_proba(X_test)
-
+    # one pass of the model: predictions come from the decision scores
     classes = mh_fit.classes_
-    y_test_bin = label_binarize(y_test, classes=classes)
-
-    # create figure
-    fig, ax = plt.subplots(figsize=(8, 6))
-
-    auc_results = {}
-
-    for i, class_name in enumerate(classes):
-        auc = roc_auc_score(y_test_bin[:, i], y_score[:, i])
-        auc_results[class_name] = auc
-        
-        RocCurveDisplay.from_predictions(
-            y_test_bin[:, i],
-            y_score[:, i],
-            name=f"{class_name} (AUC={auc:.3f})",
-            ax=ax
+    evaluation = EvaluationAccumulator(
+        classes,
+        n_bins=roc_bins,
+        score_range=score_range(mh_fit, len(classes)) if roc_bins else None,
+    )
+    with phase("scoring", chunk_size=chunk_size):
+        for test_df in chunks:
+            test_df = test_df.drop(columns=to_drop)
+            y_score, y_pred = model_scores(mh_fit, model_features(test_df.drop(columns=["RiskLevel"])))
+            evaluation.update(test_df["RiskLevel"], y_score, y_pred)
+
+        scores = evaluation.scores(beta=2)
+        roc_points = evaluation.roc_curves()
+    counts = evaluation.confusion
+
+    # the figures are rendered in the background while the tables are written
+    with FigureRenderer(0 if metrics_only else render_workers) as renderer:
+        if not metrics_only:
+            # like ConfusionMatrixDisplay.from_predictions: the labels that occur
+            present = (counts.sum(axis=0) + counts.sum(axis=1)) > 0
+            renderer.submit(
+                "confusion_matrix",
+                render_confusion_matrix,
+                counts[np.ix_(present, present)],
+                classes[present],
+                os.path.join(plot_to, "confusion_matrix.png"),
+            )
+            renderer.submit("roc_curves", render_roc_curves, roc_points, os.path.join(plot_to, "roc_curves.png"))
+
+        test_scores = pd.DataFrame(
+            {
+                "accuracy": [scores["accuracy"]],
+                "recall_weighted": [scores["recall_weighted"]],
+                "F2_weighted": [scores["F2_weighted"]],
+            }
+        )
+        test_scores.to_csv(
+            os.path.join(results_to, "test_scores.csv"),
+            index=False,
         )
 
-    plt.title("One-vs-Rest ROC Curves for Maternal Health Risk Classification")
-    plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "roc_curves.png"))
-    plt.close()
-
-    # save AUCs to CSV
-    auc_df = pd.DataFrame(auc_results, index=["AUC"])
-    auc_df.to_csv(os.path.join(results_to, "auc_scores.csv"))
+        # confusion matrix like pd.crosstab: the labels that occur on each axis, sorted
+        true_present, predicted_present = counts.sum(axis=1) > 0, counts.sum(axis=0) > 0
+        confusion_matrix = pd.DataFrame(
+            counts[np.ix_(true_present, predicted_present)],
+            index=pd.Index(classes[true_present], name="true_risk_level"),
+            columns=pd.Index(classes[predicted_present], name="predicted_risk_level"),
+        )
+        confusion_matrix.to_csv(
+            os.path.join(results_to, "confusion_matrix.csv")
+        )
 
+        # save AUCs to CSV
+        auc_results = {class_name: auc for class_name, (_, _, auc) in roc_points.items()}
+        auc_df = pd.DataFrame(auc_results, index=["AUC"])
+        auc_df.to_csv(os.path.join(results_to, "auc_scores.csv"))
+
+        # bootstrap confidence intervals, from the scores already computed
+        if bootstrap_resamples and roc_bins:
+            click.echo("--roc-bins does not keep the scores; no bootstrap intervals written.")
+        elif bootstrap_resamples:
+            with phase("bootstrap", resamples=bootstrap_resamples, jobs=bootstrap_jobs):
+                intervals = evaluation.bootstrap_intervals(
+                    bootstrap_resamples, confidence, seed=seed, n_jobs=bootstrap_jobs, beta=2
+                )
+            intervals.to_csv(os.path.join(results_to, "test_score_intervals.csv"))
+
+    for name, seconds in renderer.times.items():
+        click.echo(f"{name}.png: rendered in {seconds:.2f}s")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,54 @@
+# export_compiled_scorer.py
+# Exports a pickled SVC pipeline to the compact, memory-mappable model artifact.
+# Extracts the scaler statistics, support vectors, dual coefficients, intercepts
+# and gamma from best_estimator_ and folds the scaling into the support vectors.
+
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.inference import load_pipeline
+from src.compiled_scorer import compile_pipeline
+from src.model_artifact import save_model_artifact, file_sha256
+
+@click.command()
+@click.option('--pipeline-from', type=str, help="Path to the fitted pipeline object (pickle)")
+@click.option('--artifact-to', type=str, help="Path to directory where the model artifact will be written to")
+@click.option('--training-data', type=str, default=None, help="Optional path to the training data, hashed into the artifact manifest")
+
+def main(pipeline_from, artifact_to, training_data):
+    """
+    Compile a pickled pipeline into a pure-NumPy scorer and save it as a
+    model artifact.
+
+    ``fit_maternal_health_risk_classifier.py`` already writes the artifact
+    next to the pickle; this script converts pickles fitted before that.
+
+    Parameters
+    ----------
+    pipeline_from : str
+        Path to the pickle written by ``fit_maternal_health_risk_classifier.py``.
+    artifact_to : str
+        Artifact directory. It will be created if it does not exist.
+    training_data : str or None
+        Optional path to the training data the pipeline was fitted on. Its
+        SHA-256 is recorded in the manifest.
+
+    Returns
+    -------
+    None
+        The function writes the artifact arrays and ``manifest.json``. Load
+        them with ``src.model_artifact.load_model_artifact``; scoring then
+        only requires NumPy.
+    """
+    pipeline = load_pipeline(pipeline_from)
+    svc = pipeline[-1]
+    save_model_artifact(
+        compile_pipeline(pipeline),
+        artifact_to,
+        data_sha256=file_sha256(training_data) if training_data else None,
+        params={"C": float(svc.C), "gamma": float(svc._gamma)},
+    )
+
+if __name__ == '__main__':
+    main()
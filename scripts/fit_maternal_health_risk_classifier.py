@@ -1,28 +1,74 @@
 # fit_maternal_health_risk_classifier.py
 # Fits and tunes an SVC maternal health risk classifier using cross-validation
 # Validates training data for anomalous correlations, 
+# With --kernel-engine=nystroem, tunes an approximate RBF classifier trained by mini-batch SGD instead.
 # Saves both the trained pipeline and model-selection plot.
 
 import click
 import os
-import pandas as pd
+import sys
+import time
 import numpy as np
 import pickle
-from sklearn.svm import SVC
-from sklearn.pipeline import make_pipeline
-from scipy.stats import loguniform
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.tuning import KERNEL_ENGINES, SEARCH_ENGINES, make_classifier, make_search, ranked_results
+from src.model_artifact import save_search_artifact
+from src.schema import COMPACT_DTYPES, model_features
+from src.data_io import read_table
+from src.profiling import phase, profiled, record_search
+
+
+def plot_tuning_heatmap(cv_results, plot_to):
+    """
+    Save a heatmap of the top 10 hyperparameter combinations from a search's
+    ``cv_results_``. Plotting libraries are imported here so that runs
+    without figures do not pay their import cost.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    result_grid = ranked_results(cv_results)
+    result_grid = result_grid[
+        [
+            "mean_test_score",
+            "param_svc__gamma",
+            "param_svc__C",
+            "mean_fit_time",
+            "rank_test_score",
+        ]
+    ].set_index("rank_test_score").sort_index().T.iloc[:, :10]
+
+    plt.figure(figsize=(12, 5))
+    sns.heatmap(result_grid, 
+                annot=True,           
+                fmt='.3f',           
+                cmap='viridis',        
+                cbar_kws={'label': 'Value'},
+                linewidths=0.5,
+                linecolor='gray')
+
+    plt.title('Top 10 SVC Hyperparameter Combinations', fontsize=14, pad=20)
+    plt.xlabel('Rank', fontsize=12)
+    plt.ylabel('Parameter/Metric', fontsize=12)
+    plt.tight_layout()
+    plt.savefig(os.path.join(plot_to, "svc_hyperparameter_tuning.png"), dpi=300)
+
 
 @click.command()
-@click.option('--training-data', type=str, help="Path to training data")
+@click.option('--training-data', type=str, help="Path to training data (CSV, Parquet or Feather, or a .npy split index)")
 @click.option('--preprocessor', type=str, help="Path to preprocessor object")
 @click.option('--pipeline-to', type=str, help="Path to directory where the pipeline object will be written to")
 @click.option('--plot-to', type=str, help="Path to directory where the plot will be written to")
 @click.option('--seed', type=int, help="Random seed", default=123)
-
-def main(training_data, preprocessor, pipeline_to, plot_to, seed):
+@click.option('--no-plots', is_flag=True, default=False, help="Skip the tuning heatmap (and the plotting imports)")
+@click.option('--search-engine', type=click.Choice(SEARCH_ENGINES), default="random", help="Hyperparameter search engine (default: random)")
+@click.option('--kernel-engine', type=click.Choice(KERNEL_ENGINES), default="exact", help="Exact RBF SVC, or Nystroem features with mini-batch SGD for large training sets (default: exact)")
+@click.option('--profile', is_flag=True, default=False, help="Record the time and memory of each phase as a Chrome trace")
+@click.option('--profile-to', type=str, default=None, help="Path of the --profile trace (default: results/profiles/<script>-<time>.json)")
+
+@profiled("fit_maternal_health_risk_classifier")
+def main(training_data, preprocessor, pipeline_to, plot_to, seed, no_plots, search_engine, kernel_engine):
     """
     Train and tune an SVC-based maternal health risk classification pipeline.
 
@@ -31,6 +77,8 @@ def main(training_data, preprocessor, pipeline_to, plot_to, seed):
     search with 10-fold cross-validation. The search optimizes the weighted recall
     score across a range of 'C' and 'gamma' values sampled from log-uniform
     distributions. The best-performing model is saved as a serialized pipeline.
+    With ``search_engine="halving"`` the same candidates are tuned with
+    successive halving on the number of training rows instead.
 
     Additionally, the function generates and saves a heatmap showing the top
     10 hyperparameter combinations ranked by cross-validated performance.
@@ -38,8 +86,9 @@ def main(training_data, preprocessor, pipeline_to, plot_to, seed):
     Parameters
     ----------
     training_data : str
-        Path to the CSV file containing the training dataset with features and
-        the 'RiskLevel' target column.
+        Path to the CSV, Parquet or Feather file (or the split index written
+        by ``split_preprocess_data.py --manifest``) containing the training
+        dataset with features and the 'RiskLevel' target column.
 
     preprocessor : str
         (Unused in current implementation.) Path to a serialized preprocessing
@@ -48,66 +97,74 @@ def main(training_data, preprocessor, pipeline_to, plot_to, seed):
 
     pipeline_to : str
         Directory where the trained SVC pipeline will be saved as a pickle file.
+        The inference arrays of the best pipeline are also saved as a compact,
+        memory-mappable model artifact in the ``maternal_risk_classifier``
+        subdirectory (see ``src/model_artifact.py``).
 
     plot_to : str
         Directory where the hyperparameter tuning heatmap will be saved.
 
     seed : int
         Random seed for reproducibility of data-related operations.
+
+    no_plots : bool
+        If True, the tuning heatmap is not produced and matplotlib/seaborn
+        are never imported.
+
+    search_engine : {"random", "halving", "kernel-cache"}
+        ``"random"`` (default) evaluates all 100 candidates with full 10-fold
+        cross-validation. ``"halving"`` starts all candidates on a small
+        subsample and only re-evaluates the best third of each round on
+        three times as many rows. ``"kernel-cache"`` runs the same search as
+        ``"random"`` but computes each fold's pairwise distances once and
+        fits every candidate on a precomputed kernel; it selects the same
+        model (see ``src/tuning.py``).
+
+    kernel_engine : {"exact", "nystroem"}
+        ``"exact"`` (default) tunes libsvm's ``SVC``, whose training time
+        grows with the square to cube of the number of rows.
+        ``"nystroem"`` tunes ``NystroemSVC`` over the same C and gamma: the
+        RBF kernel approximated by Nystroem features and one-vs-one linear
+        classifiers trained by SGD in mini-batches, in time linear in the
+        number of rows (see ``src/approximate_kernel.py``). The search,
+        scoring, pickle and model artifact are the same. It cannot be
+        combined with ``search_engine="kernel-cache"``.
     """
     np.random.seed(seed)
-    train_df = pd.read_csv(training_data)
-    preprocessor = pickle.load(open(preprocessor, 'rb'))
-    svc = make_pipeline(preprocessor, SVC(random_state=seed))
-    param_grid = {
-    "svc__C": loguniform(1e-2, 1e3),
-    "svc__gamma": loguniform(1e-4, 1e1)
-    }
-
-    random_search = RandomizedSearchCV(
-        svc,                                    
-        param_distributions=param_grid, 
-        n_iter=100, 
-        n_jobs=-1,
-        return_train_score=True,
+    train_df = read_table(training_data, dtypes=COMPACT_DTYPES)
+    with phase("pickle load", path=preprocessor):
+        preprocessor = pickle.load(open(preprocessor, 'rb'))
+    # the classifier step is named "svc" with either engine, so the search space and heatmap are shared
+    svc = Pipeline([("columntransformer", preprocessor), ("svc", make_classifier(kernel_engine, random_state=seed))])
+
+    random_search = make_search(
+        svc,
+        engine=search_engine,
+        n_candidates=100,
         cv=10,
-        scoring='recall_weighted',
-        random_state=123
+        random_state=123,
+        n_jobs=-1,
         )
 
-    maternal_risk_fit = random_search.fit(
-        train_df.drop(columns=['RiskLevel']), 
-        train_df["RiskLevel"]
-        )
+    search_start = time.perf_counter()
+    with phase("search", engine=search_engine, kernel_engine=kernel_engine, rows=len(train_df)):
+        maternal_risk_fit = random_search.fit(
+            model_features(train_df.drop(columns=['RiskLevel'])),
+            train_df["RiskLevel"]
+            )
+    record_search(random_search, start=search_start)
 
-    with open(os.path.join(pipeline_to, "maternal_risk_classifier.pickle"), 'wb') as f:
+    pipeline_path = os.path.join(pipeline_to, "maternal_risk_classifier.pickle")
+    with phase("pickle dump", path=pipeline_path), open(pipeline_path, 'wb') as f:
         pickle.dump(random_search, f)
 
-    result_grid = pd.DataFrame(random_search.cv_results_)
-    result_grid = result_grid[
-        [
-            "mean_test_score",
-            "param_svc__gamma",
-            "param_svc__C",
-            "mean_fit_time",
-            "rank_test_score",
-        ]
-    ].set_index("rank_test_score").sort_index().T.iloc[:, :10]
+    # compact artifact holding only the inference arrays, for fast-loading consumers
+    with phase("save artifact"):
+        save_search_artifact(random_search, os.path.join(pipeline_to, "maternal_risk_classifier"), training_data)
 
-    plt.figure(figsize=(12, 5))
-    sns.heatmap(result_grid, 
-                annot=True,           
-                fmt='.3f',           
-                cmap='viridis',        
-                cbar_kws={'label': 'Value'},
-                linewidths=0.5,
-                linecolor='gray')
-
-    plt.title('Top 10 SVC Hyperparameter Combinations', fontsize=14, pad=20)
-    plt.xlabel('Rank', fontsize=12)
-    plt.ylabel('Parameter/Metric', fontsize=12)
-    plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "svc_hyperparameter_tuning.png"), dpi=300)
+    if not no_plots:
+        with phase("plotting"):
+            plot_tuning_heatmap(random_search.cv_results_, plot_to)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+# predict_maternal_health_risk.py
+# Scores unlabelled maternal health records with the fitted SVC classifier.
+# Streams the input CSV in fixed-size chunks and scores chunks across a process pool,
+# so memory use stays flat regardless of input size.
+# Writes predicted risk levels and per-class decision scores in input order.
+
+import click
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.inference import load_model, score_records, decision_columns
+from src.data_io import iter_table
+
+# fitted pipeline held by each worker process, loaded once per worker
+_pipeline = None
+
+
+def _init_worker(pipeline_from):
+    """
+    Process pool initializer: load the model once per worker.
+    """
+    global _pipeline
+    _pipeline = load_model(pipeline_from)
+
+
+def _score_chunk(chunk):
+    """
+    Score one chunk with the pipeline loaded by the worker.
+    """
+    return score_records(_pipeline, chunk)
+
+
+@click.command()
+@click.option('--input-data', type=str, help="Path to CSV, Parquet or Feather file of records to be scored")
+@click.option('--pipeline-from', type=str, help="Path to the model artifact directory or the fitted pipeline object (pickle)")
+@click.option('--predictions-to', type=str, help="Path to CSV file where predictions will be written to")
+@click.option('--chunk-size', type=int, default=100_000, help="Number of rows read and scored per chunk (default: 100000)")
+@click.option('--n-jobs', type=int, default=-1, help="Number of worker processes; -1 uses all cores, 1 scores in-process (default: -1)")
+
+def main(input_data, pipeline_from, predictions_to, chunk_size, n_jobs):
+    """
+    Score maternal health records in chunks and write predictions to CSV.
+
+    The fitted pipeline is loaded once (once per worker when scoring in
+    parallel). The input is read ``chunk_size`` rows at a time and at most
+    two chunks per worker are in flight, so memory use is bounded by the
+    chunk size rather than the input size. Results are written in input order.
+
+    Parameters
+    ----------
+    input_data : str
+        Path to a CSV, Parquet or Feather file containing the feature
+        columns Age, SystolicBP, DiastolicBP, BS, BodyTemp and HeartRate.
+        Other columns (e.g. ``RiskLevel``) are not read.
+    pipeline_from : str
+        Path to the model artifact directory or the pickle written by
+        ``fit_maternal_health_risk_classifier.py``. Artifacts are
+        memory-mapped, so they load in milliseconds and their pages are
+        shared between processes.
+    predictions_to : str
+        Path of the output CSV. Its directory will be created if it does not
+        exist.
+    chunk_size : int
+        Number of rows read and scored per chunk.
+    n_jobs : int
+        Number of worker processes. ``-1`` uses all available cores and ``1``
+        scores in the current process.
+
+    Returns
+    -------
+    None
+        The function writes ``predictions_to`` and reports the number of rows
+        scored and the throughput in rows per second.
+    """
+    out_dir = os.path.dirname(predictions_to)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    pipeline = load_model(pipeline_from)
+    chunks = iter_table(input_data, chunk_size, columns=list(pipeline.feature_names_in_))
+
+    n_rows = 0
+    header = True
+
+    def write(scores):
+        nonlocal n_rows, header
+        scores.to_csv(predictions_to, mode='w' if header else 'a', header=header, index=False)
+        n_rows += len(scores)
+        header = False
+
+    if n_jobs == 1:
+        for chunk in chunks:
+            write(score_records(pipeline, chunk))
+    else:
+        # bound the number of chunks in flight so memory stays flat
+        max_in_flight = 2 * n_jobs
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(pipeline_from,)) as pool:
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    if header:
+        # empty input: still write the header
+        columns = ["predicted_risk_level"] + decision_columns(pipeline.classes_)
+        write(pd.DataFrame(columns=columns))
+
+    elapsed = time.perf_counter() - start
+    click.echo(f"Scored {n_rows} rows in {elapsed:.2f}s ({n_rows / elapsed:,.0f} rows/s)")
+
+if __name__ == '__main__':
+    main()
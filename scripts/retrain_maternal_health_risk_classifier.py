@@ -0,0 +1,221 @@
+# retrain_maternal_health_risk_classifier.py
+# Incrementally retrains the SVC maternal health risk classifier when new labelled rows arrive.
+# Validates only the new rows, appends them to the validated data and the train/test splits,
+# and refits around the previous optimum unless drift or a score drop calls for a full re-search.
+# Records the time saved compared with a full rebuild.
+
+import click
+import os
+import sys
+import json
+import math
+import time
+import pickle
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import recall_score
+from sklearn.model_selection import train_test_split
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.validation import EXPECTED_COLUMNS, FEATURE_COLS, validate_frame
+from src.tuning import SEARCH_ENGINES, make_search, local_param_distributions, search_compute_time
+from src.model_artifact import save_search_artifact
+from src.schema import COMPACT_DTYPES, apply_dtypes, model_features
+from src.data_io import table_format, table_path, read_table, append_table
+
+
+def split_new_rows(new_df, test_size, random_state):
+    """
+    Split new rows into train/test, stratified by RiskLevel when every class
+    has at least two rows and each side has at least one row per class.
+    Existing rows keep their side of the split.
+    """
+    if len(new_df) < 2:
+        return new_df, new_df.iloc[:0]
+    counts = new_df["RiskLevel"].value_counts()
+    counts = counts[counts > 0]
+    # the sizes train_test_split gives each side
+    n_test = math.ceil(test_size * len(new_df))
+    n_train = len(new_df) - n_test
+    stratified = counts.min() >= 2 and min(n_test, n_train) >= len(counts)
+    stratify = new_df["RiskLevel"] if stratified else None
+    return train_test_split(new_df, test_size=test_size, random_state=random_state, stratify=stratify)
+
+
+def feature_drift(reference, new):
+    """
+    Standardized mean shift of every feature: ``|mean(new) - mean(reference)|
+    / std(reference)``.
+    """
+    shift = (new[FEATURE_COLS].mean() - reference[FEATURE_COLS].mean()).abs()
+    return (shift / reference[FEATURE_COLS].std()).to_dict()
+
+
+@click.command()
+@click.option('--new-data', type=str, help="Path to CSV file of new labelled rows (raw format)")
+@click.option('--validated-data', type=str, help="Path to the validated data (CSV, Parquet or Feather); new valid rows are appended")
+@click.option('--data-to', type=str, help="Path to directory holding the train and test data, in the format of the validated data; new rows are appended")
+@click.option('--pipeline-from', type=str, help="Path to the previously fitted search object (pickle)")
+@click.option('--pipeline-to', type=str, help="Path to directory where the retrained pipeline will be written to")
+@click.option('--test-size', type=float, default=0.3, help="Proportion of new rows added to the test set (default: 0.3)")
+@click.option('--random-state', type=int, default=123, help="Random seed for splitting and searching (default: 123)")
+@click.option('--search-engine', type=click.Choice(SEARCH_ENGINES), default="random", help="Hyperparameter search engine (default: random)")
+@click.option('--drift-threshold', type=float, default=0.5, help="Maximum standardized mean shift of any feature before a full re-search (default: 0.5)")
+@click.option('--score-drop-threshold', type=float, default=0.05, help="Maximum drop in weighted recall on the new rows before a full re-search (default: 0.05)")
+@click.option('--local-candidates', type=int, default=20, help="Number of candidates sampled around the previous optimum (default: 20)")
+@click.option('--local-width', type=float, default=0.5, help="Half-width in decades of the search space around the previous optimum (default: 0.5)")
+
+def main(new_data, validated_data, data_to, pipeline_from, pipeline_to, test_size, random_state,
+         search_engine, drift_threshold, score_drop_threshold, local_candidates, local_width):
+    """
+    Retrain the classifier incrementally with newly arrived labelled rows.
+
+    Only the new rows are validated (with the same schema as
+    ``validate_data.py``); rows that are invalid or already present in the
+    validated data are dropped, and the rest are appended to the validated
+    data and split into the existing train/test data, so previous rows keep
+    their side of the split.
+
+    The previous search decides how much to re-tune. If any feature's mean on
+    the new training rows moved by more than ``drift_threshold`` standard
+    deviations, or the previous model's weighted recall on them is more than
+    ``score_drop_threshold`` below its cross-validated score, the full
+    100-candidate search is rerun. Otherwise only ``local_candidates``
+    candidates within ``local_width`` decades of the previous C and gamma are
+    searched. Either way the pipeline is refitted on the full updated
+    training set.
+
+    Parameters
+    ----------
+    new_data : str
+        Path to a CSV file of new labelled rows with the raw data columns.
+    validated_data : str
+        Path to ``validated_data.<format>`` (CSV, Parquet or Feather); new
+        valid rows are appended.
+    data_to : str
+        Directory containing ``maternal_health_risk_train.<format>`` and
+        ``maternal_health_risk_test.<format>``, in the format of
+        ``validated_data``; new rows are appended.
+    pipeline_from : str
+        Path to the search object pickled by
+        ``fit_maternal_health_risk_classifier.py`` (or a previous retrain).
+    pipeline_to : str
+        Directory where ``maternal_risk_classifier.pickle``, the model
+        artifact and ``retrain_report.json`` are written.
+    test_size : float
+        Proportion of the new rows added to the test set.
+    random_state : int
+        Random seed for splitting and searching.
+    search_engine : {"random", "halving", "kernel-cache"}
+        Search engine used for the local or full search.
+    drift_threshold : float
+        Maximum standardized mean shift of any feature.
+    score_drop_threshold : float
+        Maximum allowed drop in weighted recall on the new rows.
+    local_candidates : int
+        Number of candidates sampled around the previous optimum.
+    local_width : float
+        Half-width in decades of the local search space.
+
+    Returns
+    -------
+    None
+        The function updates the data files and writes the retrained
+        pipeline, its artifact and a JSON report with the decision, the drift
+        and score statistics and the search compute time compared with the
+        last full search (the initial fit, or the latest full retrain).
+    """
+    start = time.perf_counter()
+    os.makedirs(pipeline_to, exist_ok=True)
+    data_format = table_format(validated_data)
+    train_path = table_path(data_to, "maternal_health_risk_train", data_format)
+    test_path = table_path(data_to, "maternal_health_risk_test", data_format)
+
+    # validate only the new rows
+    new_df = pd.read_csv(new_data)[EXPECTED_COLUMNS]
+    new_df, validation_errors = validate_frame(new_df)
+    existing = read_table(validated_data, dtypes=COMPACT_DTYPES)
+    new_df = (
+        apply_dtypes(new_df.dropna())
+        .drop_duplicates()
+        .merge(existing.drop_duplicates(), how="left", indicator=True)
+        .query("_merge == 'left_only'")
+        .drop(columns="_merge")
+    )
+    if new_df.empty:
+        click.echo("No new valid rows; nothing to retrain.")
+        return
+
+    # split the new rows only, so existing rows keep their side of the split
+    old_train = read_table(train_path, dtypes=COMPACT_DTYPES)
+    new_train, new_test = split_new_rows(new_df, test_size, random_state)
+    train_df = pd.concat([old_train, new_train], ignore_index=True)
+
+    # decide between a local refit and a full re-search
+    with open(pipeline_from, "rb") as f:
+        previous = pickle.load(f)
+    drift = feature_drift(old_train, new_train)
+    new_recall = recall_score(
+        new_train["RiskLevel"], previous.best_estimator_.predict(model_features(new_train[FEATURE_COLS])), average="weighted"
+    )
+    reasons = []
+    if max(drift.values()) > drift_threshold:
+        reasons.append("feature drift")
+    if previous.best_score_ - new_recall > score_drop_threshold:
+        reasons.append("score drop")
+    mode = "full" if reasons else "local"
+
+    if mode == "full":
+        search = make_search(clone(previous.estimator), engine=search_engine, random_state=random_state)
+    else:
+        search = make_search(
+            clone(previous.estimator),
+            engine=search_engine,
+            n_candidates=local_candidates,
+            random_state=random_state,
+            param_distributions=local_param_distributions(previous.best_params_, local_width),
+        )
+    search.fit(model_features(train_df.drop(columns=["RiskLevel"])), train_df["RiskLevel"])
+
+    with open(os.path.join(pipeline_to, "maternal_risk_classifier.pickle"), 'wb') as f:
+        pickle.dump(search, f)
+
+    # the data files are only updated once the retrained model is written
+    append_table(new_df[EXPECTED_COLUMNS], validated_data)
+    append_table(new_train, train_path)
+    append_table(new_test, test_path)
+    save_search_artifact(search, os.path.join(pipeline_to, "maternal_risk_classifier"), train_path)
+
+    # reference cost of a full rebuild: the last full search in the chain of retrains
+    compute = search_compute_time(search)
+    previous_report = os.path.join(os.path.dirname(pipeline_from), "retrain_report.json")
+    if os.path.exists(previous_report):
+        with open(previous_report) as f:
+            full_compute = json.load(f)["full_search_compute_s"]
+    else:
+        full_compute = search_compute_time(previous)
+    if mode == "full":
+        full_compute = compute
+    report = {
+        "mode": mode,
+        "reasons": reasons,
+        "new_rows": {"train": len(new_train), "test": len(new_test)},
+        "validation_errors": json.loads(validation_errors) if validation_errors else None,
+        "feature_drift": drift,
+        "previous_cv_recall_weighted": float(previous.best_score_),
+        "previous_model_new_rows_recall_weighted": float(new_recall),
+        "best_params": {k: float(v) for k, v in search.best_params_.items()},
+        "cv_recall_weighted": float(search.best_score_),
+        "search_compute_s": compute,
+        "full_search_compute_s": full_compute,
+        "compute_saved_s": full_compute - compute,
+        "wall_s": time.perf_counter() - start,
+    }
+    with open(os.path.join(pipeline_to, "retrain_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    click.echo(
+        f"{mode} retrain on {len(train_df)} rows ({len(new_train)} new): "
+        f"search compute {compute:.1f}s vs {full_compute:.1f}s for a full search"
+    )
+
+if __name__ == '__main__':
+    main()
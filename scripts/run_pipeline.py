@@ -0,0 +1,253 @@
+# run_pipeline.py
+# Runs the analysis pipeline (download -> validate -> split -> {eda, fit} -> evaluate -> report)
+# with content-hashed caching: a stage is only rerun when its inputs, script source or parameters
+# change, independent stages run at the same time, and a per-stage timing summary is printed.
+
+import click
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.pipeline import Stage, run_pipeline, select_stages, source_closure
+from src.data_io import DATA_FORMATS, INDEX_EXTENSION, SPLIT_MANIFEST, table_path
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+RAW_DATA = "data/raw/Maternal Health Risk Data Set.csv"
+PREPROCESSOR = "results/models/maternal_risk_preprocessor.pickle"
+CLASSIFIER = "results/models/maternal_risk_classifier.pickle"
+SPLIT_TABLES = [
+    "maternal_health_risk_train",
+    "maternal_health_risk_test",
+    "scaled_maternal_health_risk_train",
+    "scaled_maternal_health_risk_test",
+]
+
+
+def pipeline_stages(seed=123, data_format="csv", export_csv=False, profile=False, manifest=False):
+    """
+    The stages of the analysis, with the same parameters as the Makefile rules
+    they replace. Intermediate tables are written in ``data_format``, plus a
+    CSV copy if ``export_csv``. With ``profile``, every script stage writes a
+    trace to ``results/profiles/<stage>.json``. With ``manifest``, the split
+    stage writes row indexes into the validated data instead of the train and
+    test tables, and the later stages read the rows through them.
+    """
+    python = [sys.executable]
+    validated_data = table_path("data/processed", "validated_data", data_format)
+    split_data = [table_path("data/processed", name, data_format) for name in SPLIT_TABLES]
+    train_data, test_data = split_data[:2]
+    if export_csv and data_format != "csv":
+        validated_outputs = [validated_data, table_path("data/processed", "validated_data")]
+        split_outputs = split_data + [table_path("data/processed", name) for name in SPLIT_TABLES]
+    else:
+        validated_outputs, split_outputs = [validated_data], split_data
+    if manifest:
+        train_data, test_data = [os.path.join("data/processed", name + INDEX_EXTENSION) for name in SPLIT_TABLES[:2]]
+        split_outputs = [train_data, test_data, os.path.join("data/processed", SPLIT_MANIFEST)]
+    # through an index, the stages reading a split also read the manifest and the validated data
+    split_inputs = [os.path.join("data/processed", SPLIT_MANIFEST), validated_data] if manifest else []
+    stages = [
+        Stage(
+            "download",
+            python + ["scripts/download_data.py"],
+            params={"url": "https://archive.ics.uci.edu/static/public/863/maternal+health+risk.zip", "write-to": "data/raw"},
+            sources=source_closure("scripts/download_data.py", ROOT),
+            outputs=[RAW_DATA],
+        ),
+        Stage(
+            "validate",
+            python + ["scripts/validate_data.py"],
+            params={
+                "raw-data": RAW_DATA,
+                "data-to": "data/processed",
+                "log-to": "results/logs",
+                "data-format": data_format,
+                "export-csv": export_csv,
+            },
+            sources=source_closure("scripts/validate_data.py", ROOT),
+            inputs=[RAW_DATA],
+            outputs=validated_outputs + ["results/logs/validation_errors.log"],
+            deps=["download"],
+        ),
+        Stage(
+            "split",
+            python + ["scripts/split_preprocess_data.py"],
+            params={
+                "validated-data": validated_data,
+                "data-to": "data/processed",
+                "preprocessor-to": "results/models",
+                "test-size": 0.3,
+                "random-state": seed,
+                "data-format": data_format,
+                "export-csv": export_csv,
+                "manifest": manifest,
+            },
+            sources=source_closure("scripts/split_preprocess_data.py", ROOT),
+            inputs=[validated_data],
+            outputs=split_outputs + [PREPROCESSOR],
+            deps=["validate"],
+        ),
+        Stage(
+            "eda",
+            python + ["scripts/eda.py"],
+            params={"processed-training-data": train_data, "plot-to": "results/figures", "tables-to": "results/tables"},
+            sources=source_closure("scripts/eda.py", ROOT),
+            inputs=[train_data] + split_inputs,
+            outputs=[
+                "results/figures/correlation_heatmap.png",
+                "results/figures/feature_densities_by_risklevel.png",
+                "results/tables/train_describe.csv",
+                "results/tables/train_info.txt",
+            ],
+            deps=["split"],
+        ),
+        Stage(
+            "fit",
+            python + ["scripts/fit_maternal_health_risk_classifier.py"],
+            params={
+                "training-data": train_data,
+                "preprocessor": PREPROCESSOR,
+                "pipeline-to": "results/models",
+                "plot-to": "results/figures",
+                "seed": seed,
+            },
+            sources=source_closure("scripts/fit_maternal_health_risk_classifier.py", ROOT),
+            inputs=[train_data, PREPROCESSOR] + split_inputs,
+            outputs=[
+                CLASSIFIER,
+                "results/models/maternal_risk_classifier/manifest.json",
+                "results/figures/svc_hyperparameter_tuning.png",
+            ],
+            deps=["split"],
+        ),
+        Stage(
+            "evaluate",
+            python + ["scripts/evaluate_maternal_health_risk_classifier.py"],
+            params={
+                "processed-test-data": test_data,
+                "pipeline-from": CLASSIFIER,
+                "plot-to": "results/figures",
+                "results-to": "results/tables",
+                "seed": seed,
+            },
+            # unpickling the classifier imports the estimator classes it holds
+            sources=source_closure("scripts/evaluate_maternal_health_risk_classifier.py", ROOT) + ["src/approximate_kernel.py"],
+            inputs=[test_data, CLASSIFIER] + split_inputs,
+            outputs=[
+                "results/tables/test_scores.csv",
+                "results/tables/confusion_matrix.csv",
+                "results/tables/auc_scores.csv",
+                "results/tables/test_score_intervals.csv",
+                "results/figures/confusion_matrix.png",
+                "results/figures/roc_curves.png",
+            ],
+            deps=["fit"],
+        ),
+        Stage(
+            "report",
+            ["quarto", "render", "reports/health_analysis.qmd"],
+            sources=["reports/health_analysis.qmd", "reports/references.bib"],
+            inputs=[
+                RAW_DATA,
+                validated_data,
+                "results/logs/validation_errors.log",
+                train_data,
+                test_data,
+                PREPROCESSOR,
+                CLASSIFIER,
+                "results/figures/correlation_heatmap.png",
+                "results/figures/feature_densities_by_risklevel.png",
+                "results/figures/svc_hyperparameter_tuning.png",
+                "results/tables/test_scores.csv",
+                "results/tables/confusion_matrix.csv",
+                "results/tables/auc_scores.csv",
+                "results/tables/test_score_intervals.csv",
+                "results/figures/confusion_matrix.png",
+                "results/figures/roc_curves.png",
+            ],
+            outputs=["reports/health_analysis.html", "reports/health_analysis.pdf"],
+            deps=["eda", "evaluate"],
+        ),
+    ]
+    if profile:
+        for stage in stages:
+            if stage.command[0] == sys.executable:
+                stage.params.update({"profile": True, "profile-to": f"results/profiles/{stage.name}.json"})
+    return stages
+
+
+@click.command()
+@click.option('--targets', type=str, default="eda,evaluate", help="Comma-separated stages to bring up to date, with their dependencies (default: eda,evaluate; 'report' also renders the report)")
+@click.option('--seed', type=int, default=123, help="Random seed passed to the split, fit and evaluate stages (default: 123)")
+@click.option('--jobs', type=int, default=2, help="Maximum number of stages running at the same time (default: 2)")
+@click.option('--force', is_flag=True, default=False, help="Rerun every selected stage regardless of the cache")
+@click.option('--cache-dir', type=str, default=".pipeline_cache", help="Directory for the stage cache records and logs (default: .pipeline_cache)")
+@click.option('--data-format', type=click.Choice(DATA_FORMATS), default="csv", help="File format of the intermediate tables passed between stages (default: csv)")
+@click.option('--export-csv', is_flag=True, default=False, help="Also write CSV copies of the intermediate tables")
+@click.option('--profile', is_flag=True, default=False, help="Run the script stages with --profile, writing traces to results/profiles/<stage>.json")
+@click.option('--manifest', is_flag=True, default=False, help="Pass the splits between stages as row indexes into the validated data instead of tables")
+
+def main(targets, seed, jobs, force, cache_dir, data_format, export_csv, profile, manifest):
+    """
+    Bring the selected pipeline stages up to date.
+
+    Each stage is keyed on a SHA-256 of its script (and the ``src`` modules it
+    uses), its parameters and the contents of its input files. A stage is
+    skipped when its key and output contents match those recorded after its
+    last successful run, so checking out the repository or touching a file
+    without changing it does not retrigger the hyperparameter search. Stages
+    whose dependencies are done run concurrently, e.g. ``eda`` alongside
+    ``fit``. Each stage's output is logged to ``<cache_dir>/<stage>.log``.
+
+    Parameters
+    ----------
+    targets : str
+        Comma-separated stage names; their dependencies are included.
+    seed : int
+        Random seed for the split, fit and evaluate stages.
+    jobs : int
+        Maximum number of stages running at the same time.
+    force : bool
+        Rerun every selected stage regardless of the cache.
+    cache_dir : str
+        Directory for the stage cache records and logs.
+    data_format : {"csv", "parquet", "feather"}
+        File format of the validated data and the train/test tables. CSV
+        is the default, since the locked environment the container installs
+        does not include pyarrow. Parquet is read without text parsing and
+        is about a tenth of the size of CSV; Feather is faster still to read
+        but uncompressed. Both need pyarrow.
+    export_csv : bool
+        Also write CSV copies of the intermediate tables.
+    profile : bool
+        Run the script stages with ``--profile``. This changes their
+        parameters, so they rerun once; compare two traces with
+        ``utils/compare_profiles.py``.
+    manifest : bool
+        Run the split stage with ``--manifest``: it writes the positions of
+        the train and test rows in the validated data (``.npy``) and the
+        preprocessor, but no train, test or scaled tables, and the eda, fit
+        and evaluate stages read their rows through those indexes.
+
+    Returns
+    -------
+    None
+        The function runs the stages and prints a timing summary. It exits
+        with status 1 if any stage failed.
+    """
+    os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    stages = select_stages(pipeline_stages(seed, data_format, export_csv, profile, manifest), [t.strip() for t in targets.split(",")])
+
+    start = time.perf_counter()
+    summary = run_pipeline(stages, cache_dir=cache_dir, max_workers=jobs, force=force, echo=click.echo)
+    wall = time.perf_counter() - start
+
+    click.echo(f"\n{'stage':<10} {'status':<8} {'seconds':>8}")
+    for row in summary:
+        click.echo(f"{row['stage']:<10} {row['status']:<8} {row['seconds']:>8.1f}")
+    click.echo(f"{'total':<10} {'':<8} {wall:>8.1f}  (sum of stages {sum(r['seconds'] for r in summary):.1f})")
+    if any(row["status"] == "failed" for row in summary):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
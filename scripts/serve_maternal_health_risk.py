@@ -0,0 +1,177 @@
+# serve_maternal_health_risk.py
+# Long-running local HTTP server that scores maternal health vitals in real time.
+# Loads the fitted pipeline once and merges concurrent requests into one
+# vectorized decision_function call (micro-batching).
+# Reports p50/p99 latency and throughput counters.
+
+import click
+import math
+import os
+import sys
+import json
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.inference import load_model, score_records
+from src.micro_batching import MicroBatcher, LatencyStats
+
+
+def parse_records(payload, feature_names):
+    """
+    Normalise a JSON request body into a list of records.
+
+    Accepts a single record (object), a list of records, or an object with a
+    ``records`` list. Every record must provide all feature columns, as
+    finite JSON numbers, so that a bad record is rejected with its own
+    request rather than failing the micro-batch it would be scored in.
+
+    Raises
+    ------
+    ValueError
+        If the payload has an unexpected shape, or a record is missing
+        features or has a feature value that is not a finite number.
+    """
+    if isinstance(payload, dict) and "records" in payload:
+        payload = payload["records"]
+    records = [payload] if isinstance(payload, dict) else payload
+    if not isinstance(records, list) or not records:
+        raise ValueError("Expected a record, a list of records or {\"records\": [...]}.")
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError("Each record must be a JSON object.")
+        missing = [f for f in feature_names if f not in record]
+        if missing:
+            raise ValueError(f"Record is missing features: {', '.join(missing)}.")
+        for f in feature_names:
+            value = record[f]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"Feature '{f}' must be a finite number, got {json.dumps(value)}.")
+    return records
+
+
+def make_handler(pipeline, batcher, stats):
+    """
+    Build the request handler class bound to a loaded pipeline.
+    """
+    feature_names = list(pipeline.feature_names_in_)
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/metrics":
+                self._send_json(200, stats.summary())
+            else:
+                self._send_json(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "Not found."})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                records = parse_records(payload, feature_names)
+            except ValueError as e:
+                stats.record_error()
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                results = batcher.submit(records).result()
+            except Exception as e:
+                stats.record_error()
+                self._send_json(500, {"error": str(e)})
+                return
+            stats.record_request(time.perf_counter() - start, len(records))
+            single = isinstance(payload, dict) and "records" not in payload
+            self._send_json(200, results[0] if single else {"predictions": results})
+
+        def log_message(self, format, *args):
+            # keep per-request access logging off the hot path
+            pass
+
+    return Handler
+
+
+@click.command()
+@click.option('--pipeline-from', type=str, help="Path to the model artifact directory or the fitted pipeline object (pickle)")
+@click.option('--host', type=str, default="127.0.0.1", help="Interface to bind to (default: 127.0.0.1)")
+@click.option('--port', type=int, default=8000, help="Port to listen on (default: 8000)")
+@click.option('--max-batch-size', type=int, default=256, help="Maximum number of records scored in one call (default: 256)")
+@click.option('--max-wait-ms', type=float, default=5.0, help="Maximum time to wait for more requests before scoring a batch, in milliseconds (default: 5)")
+
+def main(pipeline_from, host, port, max_batch_size, max_wait_ms):
+    """
+    Serve maternal health risk predictions over HTTP.
+
+    The fitted pipeline is loaded once at startup. Requests that arrive
+    together are merged into one batch (up to ``max_batch_size`` records, or
+    whatever has arrived ``max_wait_ms`` after the first request) and scored
+    with a single ``decision_function`` call.
+
+    Endpoints:
+
+    - ``POST /predict``: body is a record such as
+      ``{"Age": 25, "SystolicBP": 130, "DiastolicBP": 80, "BS": 15.0,
+      "BodyTemp": 98.0, "HeartRate": 86}``, a list of records, or
+      ``{"records": [...]}``. Returns the predicted risk level and per-class
+      decision scores for each record.
+    - ``GET /metrics``: request, record and batch counts, p50/p99 latency and
+      throughput.
+    - ``GET /health``: liveness check.
+
+    Parameters
+    ----------
+    pipeline_from : str
+        Path to the model artifact directory or the pickle written by
+        ``fit_maternal_health_risk_classifier.py``. Artifacts are
+        memory-mapped, so they load in milliseconds and their pages are
+        shared between processes.
+    host : str
+        Interface to bind to.
+    port : int
+        Port to listen on.
+    max_batch_size : int
+        Maximum number of records scored in one call.
+    max_wait_ms : float
+        Maximum time to wait for more requests after the first request of a
+        batch arrives, in milliseconds.
+
+    Returns
+    -------
+    None
+        The function serves requests until interrupted.
+    """
+    pipeline = load_model(pipeline_from)
+    feature_names = list(pipeline.feature_names_in_)
+
+    def score(records):
+        X = pd.DataFrame.from_records(records, columns=feature_names)
+        return score_records(pipeline, X).to_dict(orient="records")
+
+    stats = LatencyStats()
+    batcher = MicroBatcher(score, max_batch_size=max_batch_size, max_wait=max_wait_ms / 1000, stats=stats)
+    server = ThreadingHTTPServer((host, port), make_handler(pipeline, batcher, stats))
+
+    click.echo(f"Serving predictions on http://{host}:{port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        click.echo(json.dumps(stats.summary(), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -2,23 +2,44 @@
 # Splits validated data into train/test sets and applies standard scaling to numerical features.
 # Creates and saves a fitted preprocessing pipeline for consistent data transformation.
 # Saves raw and scaled datasets along with the fitted preprocessor.
+# With --data-format, the datasets are written as Parquet or Feather instead of CSV.
+# With --split-mode=hash, rows are assigned from a seeded hash of their values, chunk by chunk.
+# With --chunk-size, the preprocessor is also fitted and the scaled data written chunk by chunk.
+# With --manifest, only the row positions of each split in the validated data and the preprocessor are written.
 
 import click
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.compose import make_column_transformer, make_column_selector
 import pickle
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.schema import COMPACT_DTYPES, SCALED_DTYPES, apply_dtypes, model_features
+from src.data_io import DATA_FORMATS, table_path, read_table, iter_table, write_table, copy_table, write_split_index
+from src.splitting import hash_split_table, hash_split_positions
+from src.scaling import fit_in_chunks, scale_table
+from src.profiling import phase, profiled
 
 @click.command()
-@click.option('--validated-data', type=str, help="Path to validated data CSV file")
+@click.option('--validated-data', type=str, help="Path to validated data file (CSV, Parquet or Feather)")
 @click.option('--data-to', type=str, help="Path to directory where train and test data will be written to")
 @click.option('--preprocessor-to', type=str, help="Path to directory where the preprocessor object will be written to")
 @click.option('--test-size', type=float, default=0.3, help="Proportion of data to use for test set (default: 0.3)")
 @click.option('--random-state', type=int, default=123, help="Random seed for reproducibility (default: 123)")
-
-def main(validated_data, data_to, preprocessor_to, test_size, random_state):
+@click.option('--data-format', type=click.Choice(DATA_FORMATS), default="csv", help="File format of the train and test data (default: csv)")
+@click.option('--export-csv', is_flag=True, default=False, help="Also write CSV copies when --data-format is parquet or feather")
+@click.option('--split-mode', type=click.Choice(["random", "hash"]), default="random", help="Stratified random split of the loaded data, or streamed split from a seeded hash of every row (default: random)")
+@click.option('--chunk-size', type=int, default=None, help="Rows read and written at a time by the hash split and the scaling (default: all at once)")
+@click.option('--manifest', is_flag=True, default=False, help="Write the row positions of each split in the validated data (.npy) instead of the train, test and scaled tables")
+@click.option('--profile', is_flag=True, default=False, help="Record the time and memory of each phase as a Chrome trace")
+@click.option('--profile-to', type=str, default=None, help="Path of the --profile trace (default: results/profiles/<script>-<time>.json)")
+
+@profiled("split_preprocess_data")
+def main(validated_data, data_to, preprocessor_to, test_size, random_state, data_format, export_csv, split_mode,
+         chunk_size, manifest):
     """
     Split validated data into train/test sets, create, fit a preprocessor 
     and save outputs.
@@ -31,7 +52,8 @@ def main(validated_data, data_to, preprocessor_to, test_size, random_state):
     Parameters
     ----------
     validated_data : str
-        Path to the validated CSV file containing maternal health data.
+        Path to the validated data file (CSV, Parquet or Feather) containing
+        maternal health data.
     data_to : str
         Directory path where train/test splits (both raw and scaled) will be saved.
         The directory will be created if it does not exist.
@@ -44,37 +66,96 @@ def main(validated_data, data_to, preprocessor_to, test_size, random_state):
     random_state : int
         Random seed for reproducible train-test splitting.
         It has a default value of 123.
+    data_format : {"csv", "parquet", "feather"}
+        File format of the train and test data. It has a default value of
+        "csv".
+    export_csv : bool
+        Also write CSV copies of the data when `data_format` is binary.
+    split_mode : {"random", "hash"}
+        ``"random"`` (default) loads the data and calls ``train_test_split``
+        with ``stratify``. ``"hash"`` streams the data through a
+        ``BalancedHashSplit`` (see ``src/splitting.py``): each row's side
+        depends on a hash of its values keyed on `random_state` and on how
+        many rows of its RiskLevel came before it and went to the test set,
+        so every RiskLevel has within one row of `test_size` of its rows in
+        the test set. A row's side depends on its position, not only on its
+        values, so identical rows may land on different sides; appending
+        rows leaves the earlier rows where they are, and any `chunk_size`
+        gives the same split. Rows keep their order. The per-class counts
+        are printed.
+    chunk_size : int or None
+        If given, the number of rows read and written at a time: by the
+        hash split, and by the scaling, which then fits the preprocessor on
+        the written train table chunk by chunk (``partial_fit``, see
+        ``src/scaling.py``; the same preprocessor as fitting it at once up
+        to floating-point rounding) and scales and writes both tables one
+        chunk at a time. Default: all at once.
+    manifest : bool
+        Instead of the four tables, write ``maternal_health_risk_train.npy``
+        and ``maternal_health_risk_test.npy``, the positions of each split's
+        rows in `validated_data`, with a ``split_manifest.json`` naming it
+        (see ``src.data_io.write_split_index``). The downstream scripts read
+        the rows through the index, and ``src.scaling.scaled_frame`` builds
+        a scaled view when one is needed. `data_format` and `export_csv`
+        are ignored.
     
     Returns
     -------
     None
-        The function saves 4 CSV files (train, test, scaled_train, scaled_test) 
+        The function saves 4 data files (train, test, scaled_train, scaled_test) 
         to `data_to` directory and one pickle file (preprocessor) to 
-        `preprocessor_to` directory.
+        `preprocessor_to` directory. With `manifest`, it saves the two
+        ``.npy`` row indexes and ``split_manifest.json`` to `data_to`
+        instead of the 4 data files.
     """
 
     # create output directories if they do not already exist
     os.makedirs(data_to, exist_ok=True)
     os.makedirs(preprocessor_to, exist_ok=True)
 
-    # read the validated data
-    data = pd.read_csv(validated_data)
-
-    # split the data
-    train_df, test_df = train_test_split(data, test_size=test_size, random_state=random_state, stratify=data['RiskLevel'])
-
-    # save train and test data
-    train_path = os.path.join(data_to, "maternal_health_risk_train.csv")
-    test_path = os.path.join(data_to, "maternal_health_risk_test.csv")
-
-    train_df.to_csv(train_path, index=False)
-    test_df.to_csv(test_path, index=False)
-
-    # separate features and target
-    X_train = train_df.drop(columns=['RiskLevel'])
-    y_train = train_df['RiskLevel']
-    X_test = test_df.drop(columns='RiskLevel')
-    y_test = test_df['RiskLevel']
+    train_path = table_path(data_to, "maternal_health_risk_train", data_format)
+    test_path = table_path(data_to, "maternal_health_risk_test", data_format)
+
+    if manifest:
+        # keep the rows in the validated data and only write their positions
+        if split_mode == "hash":
+            with phase("split", mode="hash", chunk_size=chunk_size):
+                train_rows, test_rows, counts, n_rows = hash_split_positions(validated_data, test_size, random_state, chunk_size)
+            click.echo(counts.assign(test_share=counts["test"] / counts.sum(axis=1)).to_string(float_format="%.3f"))
+        else:
+            # the same permutation as splitting the loaded table
+            levels = read_table(validated_data, columns=["RiskLevel"], dtypes=COMPACT_DTYPES)["RiskLevel"]
+            n_rows = len(levels)
+            with phase("split", rows=n_rows):
+                train_rows, test_rows = train_test_split(np.arange(n_rows), test_size=test_size, random_state=random_state, stratify=levels)
+        paths = write_split_index(data_to, validated_data, n_rows, {
+            "maternal_health_risk_train": train_rows,
+            "maternal_health_risk_test": test_rows,
+        })
+        train_path, test_path = paths["maternal_health_risk_train"], paths["maternal_health_risk_test"]
+    elif split_mode == "hash":
+        # stream the rows to the train and test tables
+        with phase("split", mode="hash", chunk_size=chunk_size):
+            counts = hash_split_table(validated_data, train_path, test_path, test_size, random_state, chunk_size)
+        click.echo(counts.assign(test_share=counts["test"] / counts.sum(axis=1)).to_string(float_format="%.3f"))
+        if export_csv and data_format != "csv":
+            for path in (train_path, test_path):
+                with phase("write csv", path=os.path.splitext(path)[0] + ".csv"):
+                    copy_table(path, os.path.splitext(path)[0] + ".csv", chunk_size or 100_000)
+        if not chunk_size:
+            train_df = read_table(train_path, dtypes=COMPACT_DTYPES)
+            test_df = read_table(test_path, dtypes=COMPACT_DTYPES)
+    else:
+        # read the validated data
+        data = read_table(validated_data, dtypes=COMPACT_DTYPES)
+
+        # split the data
+        with phase("split", rows=len(data)):
+            train_df, test_df = train_test_split(data, test_size=test_size, random_state=random_state, stratify=data['RiskLevel'])
+
+        # save train and test data
+        write_table(train_df, train_path, export_csv=export_csv)
+        write_table(test_df, test_path, export_csv=export_csv)
 
     # create the preprocessor
     preprocessor = make_column_transformer(
@@ -82,15 +163,45 @@ def main(validated_data, data_to, preprocessor_to, test_size, random_state):
         remainder='passthrough',
         verbose_feature_names_out=False
     )
+    preprocessor_path = os.path.join(preprocessor_to, "maternal_risk_preprocessor.pickle")
+    scaled_train_path = table_path(data_to, "scaled_maternal_health_risk_train", data_format)
+    scaled_test_path = table_path(data_to, "scaled_maternal_health_risk_test", data_format)
+
+    if chunk_size or manifest:
+        # fit on the train rows, then scale both tables chunk by chunk
+        chunks = iter_table(train_path, chunk_size, dtypes=COMPACT_DTYPES) if chunk_size else [
+            read_table(train_path, dtypes=COMPACT_DTYPES)
+        ]
+        with phase("scaler fit", chunk_size=chunk_size):
+            fit_in_chunks(preprocessor, chunks)
+        with phase("pickle dump", path=preprocessor_path):
+            pickle.dump(preprocessor, open(preprocessor_path, "wb"))
+        if manifest:
+            return
+        for source, destination in ((train_path, scaled_train_path), (test_path, scaled_test_path)):
+            with phase("scale", path=destination):
+                scale_table(preprocessor, source, destination, chunk_size)
+            if export_csv and data_format != "csv":
+                with phase("write csv", path=os.path.splitext(destination)[0] + ".csv"):
+                    copy_table(destination, os.path.splitext(destination)[0] + ".csv", chunk_size)
+        return
+
+    # separate features and target
+    X_train = model_features(train_df.drop(columns=['RiskLevel']))
+    y_train = train_df['RiskLevel']
+    X_test = model_features(test_df.drop(columns='RiskLevel'))
+    y_test = test_df['RiskLevel']
 
     # save the preprocessor
-    preprocessor.fit(X_train)
-    preprocessor_path = os.path.join(preprocessor_to, "maternal_risk_preprocessor.pickle")
-    pickle.dump(preprocessor, open(preprocessor_path, "wb"))
+    with phase("scaler fit", rows=len(X_train)):
+        preprocessor.fit(X_train)
+    with phase("pickle dump", path=preprocessor_path):
+        pickle.dump(preprocessor, open(preprocessor_path, "wb"))
 
     # transform the data
-    scaled_X_train = preprocessor.transform(X_train)
-    scaled_X_test = preprocessor.transform(X_test)
+    with phase("scale", rows=len(X_train) + len(X_test)):
+        scaled_X_train = preprocessor.transform(X_train)
+        scaled_X_test = preprocessor.transform(X_test)
 
     # convert back to DataFrames with proper column names
     scaled_train_df = pd.DataFrame(scaled_X_train, columns=preprocessor.get_feature_names_out())
@@ -99,13 +210,12 @@ def main(validated_data, data_to, preprocessor_to, test_size, random_state):
     # add target column back
     scaled_train_df['RiskLevel'] = y_train.values
     scaled_test_df['RiskLevel'] = y_test.values
+    scaled_train_df = apply_dtypes(scaled_train_df, SCALED_DTYPES)
+    scaled_test_df = apply_dtypes(scaled_test_df, SCALED_DTYPES)
 
     # save the transformed data
-    scaled_train_path = os.path.join(data_to, "scaled_maternal_health_risk_train.csv")
-    scaled_test_path = os.path.join(data_to, "scaled_maternal_health_risk_test.csv")
-    
-    scaled_train_df.to_csv(scaled_train_path, index=False)
-    scaled_test_df.to_csv(scaled_test_path, index=False)
+    write_table(scaled_train_df, scaled_train_path, export_csv=export_csv)
+    write_table(scaled_test_df, scaled_test_path, export_csv=export_csv)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
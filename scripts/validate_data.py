@@ -2,13 +2,20 @@
 # Validates raw maternal health data for correct format and data quality.
 # Checks for outliers, missing values, duplicates and class imbalance.
 # Saves cleaned data and logs validation errors for review.
+# With --chunk-size, validates the file in chunks without loading it into memory.
+# With --data-format, writes the validated data as Parquet or Feather instead of CSV.
 
 import click
 import pandas as pd
-import pandera.pandas as pa
 import logging
 import json
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.validation import EXPECTED_COLUMNS, VALIDATION_ENGINES, validate_frame, validate_csv_in_chunks, drop_unstorable_rows, storage_error_message
+from src.schema import apply_dtypes
+from src.data_io import DATA_FORMATS, table_path, write_table, copy_table
+from src.profiling import phase, profiled
 
 def validate_file_format(file_path, expected_file_extension):
     """
@@ -40,15 +47,30 @@ def validate_column_names(data, expected_columns):
 @click.option('--raw-data', type=str, help="Path to raw data CSV file")
 @click.option('--data-to', type=str, help="Path to directory where validated data will be written to")
 @click.option('--log-to', type=str, help="Path to directory where validation log will be written to")
-
-def main(raw_data, data_to, log_to):
+@click.option('--chunk-size', type=int, default=None, help="Validate the data in chunks of this many rows instead of all at once (default: all at once)")
+@click.option('--engine', type=click.Choice(VALIDATION_ENGINES), default="pandera", help="Validation engine: the pandera schema or the equivalent single-pass vectorized checks (default: pandera)")
+@click.option('--data-format', type=click.Choice(DATA_FORMATS), default="csv", help="File format of the validated data (default: csv)")
+@click.option('--export-csv', is_flag=True, default=False, help="Also write a CSV copy when --data-format is parquet or feather")
+@click.option('--profile', is_flag=True, default=False, help="Record the time and memory of each phase as a Chrome trace")
+@click.option('--profile-to', type=str, default=None, help="Path of the --profile trace (default: results/profiles/<script>-<time>.json)")
+
+@profiled("validate_data")
+def main(raw_data, data_to, log_to, chunk_size, engine, data_format, export_csv):
     """
     Validate raw maternal health data and save validated output.
 
     Performs comprehensive data validation including file format checks,
     column name validation, schema validation for data types and ranges,
     duplicate detection, missingness checks, and class imbalance detection.
-    Invalid rows are filtered out and validation errors are logged.
+    Invalid rows are filtered out and validation errors are logged. Rows
+    holding a value that cannot be stored with the compact dtypes of
+    ``src/schema.py`` (e.g. an Age of 25.5) are dropped and logged too.
+
+    With ``chunk_size``, the file is streamed: column checks run on each
+    chunk and its valid rows are written immediately, while duplicate,
+    missingness, class balance and variation checks are decided from
+    row hashes and running counts kept across chunks. The validated data
+    and the log are the same as when the whole file is validated at once.
 
     Parameters
     ----------
@@ -60,11 +82,25 @@ def main(raw_data, data_to, log_to):
     log_to : str
         Path to directory where the validation error logs will be saved.
         The directory will be created if it does not exist.
+    chunk_size : int, optional
+        Number of rows validated at a time. If None (default), the whole
+        file is read into memory and validated at once.
+    engine : {"pandera", "vectorized"}, optional
+        ``"pandera"`` (default) runs the pandera schema. ``"vectorized"``
+        evaluates the same range, category and missing-value checks in one
+        pass over NumPy arrays; it keeps the same rows and logs the same
+        errors, and is faster on large or dirty files.
+    data_format : {"csv", "parquet", "feather"}, optional
+        File format of the validated data (default: ``"csv"``). Parquet and
+        Feather keep the column types, so downstream scripts read them
+        without parsing text.
+    export_csv : bool, optional
+        Also write ``validated_data.csv`` when ``data_format`` is binary.
 
     Returns
     -------
     None
-        The function saves validated data to `validated_data.csv` in the
+        The function saves validated data to `validated_data.<format>` in the
         `data_to` directory and logs and validated errors to 
         `validation_errors.log` in the `log_to` directory.
 
@@ -97,50 +133,14 @@ def main(raw_data, data_to, log_to):
         level=logging.INFO,
     )
 
-    # read the data
-    health_data = pd.read_csv(raw_data, header=0)
+    # read the data (only the header when streaming)
+    with phase("read csv", path=raw_data):
+        health_data = pd.read_csv(raw_data, header=0, nrows=0 if chunk_size else None)
 
     # expected file extension and columns
     expected_file_extension = ".csv"
-    expected_columns = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate", "RiskLevel"]
-
-    # define the schema
-    schema = pa.DataFrameSchema(
-        {
-            # check for correct category labels
-            "RiskLevel": pa.Column(str, pa.Check.isin(["low risk", "mid risk", "high risk"]), nullable=True),
-            # check for outliers and anomalous values
-            "Age": pa.Column(int, pa.Check.between(10, 65), nullable=True),
-            "SystolicBP": pa.Column(int, pa.Check.between(60, 200), nullable=True),
-            "DiastolicBP": pa.Column(int, pa.Check.between(40, 140), nullable=True),
-            "BS": pa.Column(float, pa.Check.between(1.0, 25.0), nullable=True),
-            "BodyTemp": pa.Column(float, pa.Check.between(95.0, 105.0), nullable=True),
-            "HeartRate": pa.Column(int, pa.Check.between(50, 150), nullable=True)
-        },
-        checks=[
-            # check for duplicate rows and empty rows
-            pa.Check(lambda df: ~df.duplicated().any(), error="Duplicate rows found."),
-            pa.Check(lambda df: ~(df.isna().all(axis=1)).any(), error="Empty rows found."),
-            # check for missingness not beyond expected threshold
-            pa.Check(lambda df: (df.isna().mean() <= 0.05).all(), error="Some columns have more than 5% missing values."),
-            # check for label imbalance in target variable
-            pa.Check(
-                lambda df: (df["RiskLevel"].value_counts(normalize=True) >= 0.05).all(),
-                error="One or more RiskLevel categories have <5% of observations.",
-            ),
-    
-            # make sure there is no column with constant values
-            pa.Check(
-                lambda df: df[["Age", "SystolicBP", "DiastolicBP", "BS",
-                              "BodyTemp", "HeartRate"]].nunique().min() > 1,
-                error="One or more features have no variation.",
-            ),
-        ],
-        drop_invalid_rows=False,
-    )
+    expected_columns = EXPECTED_COLUMNS
 
-    # initialize error cases DataFrame
-    error_cases = pd.DataFrame()
     data = health_data.copy()
     
     # validate data and handle errors: correct file format, correct column names
@@ -154,29 +154,30 @@ def main(raw_data, data_to, log_to):
     
     # validate data and handle errors: no empty observations, missingness not beyond threshold,
     # correct data types for columns, no outliers, correct category levels
-    try:
-        validated_data = schema.validate(data, lazy=True)
-    except pa.errors.SchemaErrors as e:
-        error_cases = e.failure_cases
-    
-        # convert the error message to a JSON string
-        error_message = json.dumps(e.message, indent=2)
-        logging.error("\n" + error_message)
-    
-    # filter out invalid rows based on the error cases: keep the duplicate rows 
-    if not error_cases.empty:
-        invalid_indices = error_cases["index"].dropna().unique()
-        validated_data = (
-            data.drop(index=invalid_indices)
-            .reset_index(drop=True)
-            .dropna(how="all")
-        )
+    # (schema defined in src/validation.py); invalid rows are filtered out
+    output_file = table_path(data_to, "validated_data", data_format)
+    if chunk_size:
+        # the chunked read and write are part of this phase
+        with phase("schema validation", engine=engine, chunk_size=chunk_size):
+            _, error_message, storage_message = validate_csv_in_chunks(raw_data, output_file, chunk_size, engine)
+        if export_csv and data_format != "csv":
+            with phase("write csv", path=table_path(data_to, "validated_data")):
+                copy_table(output_file, table_path(data_to, "validated_data"), chunk_size)
     else:
-        validated_data = data
+        with phase("schema validation", engine=engine, rows=len(data)):
+            validated_data, error_message = validate_frame(data, engine)
+        # a failed dtype check keeps its rows, but values such as an Age of
+        # 25.5 cannot be stored with the compact dtypes
+        validated_data, dropped = drop_unstorable_rows(validated_data)
+        storage_message = storage_error_message(dropped)
+    if error_message is not None:
+        logging.error("\n" + error_message)
+    if storage_message is not None:
+        logging.error("\n" + storage_message)
 
     # save validated data
-    output_file = os.path.join(data_to, "validated_data.csv")
-    validated_data.to_csv(output_file, index=False)
+    if not chunk_size:
+        write_table(apply_dtypes(validated_data), output_file, export_csv=export_csv)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Approximate RBF SVC trained with mini-batch SGD, for training sets too large
+for an exact ``SVC``.
+
+libsvm's training time grows between the square and the cube of the number
+of rows. ``NystroemSVC`` instead maps the rows to ``n_components`` Nystroem
+features, on which the RBF kernel is an inner product, and trains linear
+hinge-loss classifiers on them with ``SGDClassifier.partial_fit``, one
+shuffled mini-batch of ``batch_size`` rows at a time for ``n_epochs`` passes.
+Training is linear in the number of rows, and memory is bounded by the batch
+size.
+
+It is a drop-in replacement for the ``SVC`` step of the pipeline: it takes
+the same ``C`` and ``gamma`` (the regularization of each linear classifier is
+``alpha = 1 / (C * n_rows)``, the SVC objective divided by ``C * n_rows``),
+trains one-vs-one classifiers like libsvm, and builds ``SVC``'s one-vs-rest
+decision scores (votes plus a confidence in (-1/3, 1/3)) from them. The
+search engines, the evaluation and ``src.inference.predict_from_decision``
+therefore work unchanged. A fitted model is a kernel expansion over the
+Nystroem components, ``K(x, components) @ pair_coef + intercept``, so
+``src.compiled_scorer.compile_pipeline`` saves it in the same artifact
+format as an exact SVC, with the components in place of support vectors.
+"""
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDClassifier
+from sklearn.utils import check_random_state
+from src.compiled_scorer import class_pairs, ovo_votes_and_confidences
+
+
+class NystroemSVC(ClassifierMixin, BaseEstimator):
+    """
+    One-vs-one RBF classifier on Nystroem features, trained by mini-batch SGD.
+
+    Parameters
+    ----------
+    C : float
+        Inverse regularization strength, as for ``SVC``.
+    gamma : float or "scale"
+        RBF kernel coefficient; ``"scale"`` uses ``1 / (n_features *
+        X.var())`` like ``SVC``.
+    n_components : int
+        Number of Nystroem components (kernel centres sampled from the
+        training rows); at most the number of rows.
+    batch_size : int
+        Rows per SGD step.
+    n_epochs : int
+        Passes over the training rows.
+    random_state : int, optional
+        Seed for the components, the batch order and SGD.
+
+    Attributes
+    ----------
+    classes_ : numpy.ndarray
+        Class labels, sorted.
+    nystroem_ : sklearn.kernel_approximation.Nystroem
+        The fitted feature map.
+    coef_ : numpy.ndarray of shape (n_components, n_pairs)
+        Weights of each one-vs-one classifier on the Nystroem features.
+    intercept_ : numpy.ndarray of shape (n_pairs,)
+        Intercepts of each one-vs-one classifier.
+    """
+
+    def __init__(self, C=1.0, gamma="scale", n_components=500, batch_size=4096, n_epochs=5, random_state=None):
+        self.C = C
+        self.gamma = gamma
+        self.n_components = n_components
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        """
+        Fit the feature map and the one-vs-one classifiers.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        self.classes_, codes = np.unique(y, return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        self._gamma = 1.0 / (X.shape[1] * X.var()) if self.gamma == "scale" else float(self.gamma)
+        rng = check_random_state(self.random_state)
+
+        self.nystroem_ = Nystroem(gamma=self._gamma, n_components=min(self.n_components, len(X)),
+                                  random_state=rng.randint(2 ** 31)).fit(X)
+        pairs = class_pairs(len(self.classes_))
+        classifiers = []
+        for i, j in pairs:
+            n_rows = np.count_nonzero((codes == i) | (codes == j))
+            classifiers.append(SGDClassifier(loss="hinge", alpha=1.0 / (self.C * n_rows), average=True,
+                                             random_state=rng.randint(2 ** 31)))
+
+        # every batch is mapped once and shared by the classifiers of all pairs
+        n_batches = max(1, -(-len(X) // self.batch_size))
+        for _ in range(self.n_epochs):
+            for batch in np.array_split(rng.permutation(len(X)), n_batches):
+                features = self._features(X[batch])
+                for (i, j), classifier in zip(pairs, classifiers):
+                    rows = (codes[batch] == i) | (codes[batch] == j)
+                    if rows.any():
+                        # a positive decision votes for the first class of the pair, as in libsvm
+                        classifier.partial_fit(features[rows], codes[batch][rows] == i, classes=[False, True])
+
+        self.coef_ = np.column_stack([classifier.coef_[0] for classifier in classifiers])
+        self.intercept_ = np.array([classifier.intercept_[0] for classifier in classifiers])
+        return self
+
+    def _features(self, X):
+        # a NumPy array even under set_config(transform_output="pandas")
+        return np.asarray(self.nystroem_.transform(X))
+
+    def ovo_decision_function(self, X):
+        """
+        One-vs-one decision values, in the layout of
+        ``SVC(decision_function_shape="ovo").decision_function``.
+        """
+        return self._features(np.asarray(X, dtype=np.float64)) @ self.coef_ + self.intercept_
+
+    def decision_function(self, X):
+        """
+        One-vs-rest decision scores, built from the one-vs-one values like
+        ``SVC.decision_function``.
+        """
+        votes, sum_conf = ovo_votes_and_confidences(self.ovo_decision_function(X), len(self.classes_))
+        return votes + sum_conf / (3 * (np.abs(sum_conf) + 1))
+
+    def predict(self, X):
+        """
+        Predicted class labels: the first class with the most one-vs-one votes.
+        """
+        votes, _ = ovo_votes_and_confidences(self.ovo_decision_function(X), len(self.classes_))
+        return self.classes_[votes.argmax(axis=1)]
@@ -0,0 +1,206 @@
+"""Pure-NumPy scorer for the fitted StandardScaler + RBF SVC pipeline.
+
+Only NumPy is needed to score: the arrays are extracted from the fitted
+pipeline once (``compile_pipeline``) and saved as a model artifact with
+``src.model_artifact.save_model_artifact``.
+"""
+
+import numpy as np
+
+# maximum rows scored per kernel block, bounds the (rows x support vectors) kernel matrix
+BLOCK_SIZE = 8192
+
+
+def class_pairs(n_classes):
+    """
+    The (i, j) class index pairs of the one-vs-one classifiers, in libsvm order.
+    """
+    return np.array([(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)])
+
+
+def ovo_votes_and_confidences(ovo, n_classes):
+    """
+    Per-class vote counts and summed confidences of one-vs-one decision
+    values, from which ``SVC`` builds its one-vs-rest scores.
+    """
+    pairs = class_pairs(n_classes)
+    i, j = pairs[:, 0], pairs[:, 1]
+    # pair (i, j) votes for i when its decision is non-negative
+    winner = np.where(ovo < 0, j, i)
+    votes = np.zeros((ovo.shape[0], n_classes))
+    sum_conf = np.zeros((ovo.shape[0], n_classes))
+    for k in range(len(pairs)):
+        votes[np.arange(ovo.shape[0]), winner[:, k]] += 1
+        sum_conf[:, i[k]] += ovo[:, k]
+        sum_conf[:, j[k]] -= ovo[:, k]
+    return votes, sum_conf
+
+
+class CompiledSVCScorer:
+    """
+    One-vs-one RBF SVC decision function with the standard scaling folded in.
+
+    With ``x_s = (x - mean) / scale`` the RBF kernel of the fitted pipeline is
+    ``exp(-gamma * ||x_s - sv||^2)``. Writing ``w = sqrt(gamma) / scale``,
+    this equals ``exp(-||x * w - (sv * scale + mean) * w||^2)``, so scaling and
+    gamma reduce to one elementwise multiply of the input and the kernel for a
+    whole batch is one matrix product against the pre-transformed support
+    vectors. The per-pair dual coefficients are laid out as a single
+    (n_support_vectors, n_pairs) matrix so every one-vs-one decision value
+    comes from a second matrix product.
+
+    Parameters
+    ----------
+    feature_names : sequence of str
+        Feature columns in the order the model expects them.
+    classes : sequence of str
+        Class labels, in ``SVC.classes_`` order.
+    feature_weight : numpy.ndarray of shape (n_features,)
+        ``sqrt(gamma) / scale``.
+    support_vectors : numpy.ndarray of shape (n_support_vectors, n_features)
+        Support vectors in raw feature units multiplied by ``feature_weight``.
+    support_sq_norms : numpy.ndarray of shape (n_support_vectors,)
+        Squared norms of ``support_vectors``.
+    pair_coef : numpy.ndarray of shape (n_support_vectors, n_pairs)
+        Dual coefficients of each one-vs-one classifier.
+    intercept : numpy.ndarray of shape (n_pairs,)
+        Intercepts of each one-vs-one classifier.
+    """
+
+    def __init__(self, feature_names, classes, feature_weight, support_vectors,
+                 support_sq_norms, pair_coef, intercept):
+        self.feature_names = list(feature_names)
+        self.classes_ = np.asarray(classes)
+        self.feature_weight = feature_weight
+        self.support_vectors = support_vectors
+        self.support_sq_norms = support_sq_norms
+        self.pair_coef = pair_coef
+        self.intercept = intercept
+
+    def _as_array(self, X):
+        if hasattr(X, "columns"):
+            X = X[self.feature_names].to_numpy()
+        return np.asarray(X, dtype=np.float64)
+
+    def ovo_decision_function(self, X):
+        """
+        One-vs-one decision values, identical in layout to
+        ``SVC(decision_function_shape="ovo").decision_function``.
+        """
+        X = self._as_array(X)
+        out = np.empty((X.shape[0], len(self.intercept)))
+        for start in range(0, X.shape[0], BLOCK_SIZE):
+            Xw = X[start:start + BLOCK_SIZE] * self.feature_weight
+            sq_dist = (
+                np.einsum("ij,ij->i", Xw, Xw)[:, None]
+                + self.support_sq_norms
+                - 2 * Xw @ self.support_vectors.T
+            )
+            np.maximum(sq_dist, 0, out=sq_dist)
+            out[start:start + BLOCK_SIZE] = np.exp(-sq_dist) @ self.pair_coef + self.intercept
+        return out
+
+    def _votes_and_confidences(self, ovo):
+        return ovo_votes_and_confidences(ovo, len(self.classes_))
+
+    def decision_function(self, X):
+        """
+        One-vs-rest decision scores, matching ``SVC.decision_function``.
+        """
+        votes, sum_conf = self._votes_and_confidences(self.ovo_decision_function(X))
+        return votes + sum_conf / (3 * (np.abs(sum_conf) + 1))
+
+    def predict(self, X):
+        """
+        Predicted class labels, matching ``SVC.predict`` (first class with the
+        most one-vs-one votes).
+        """
+        votes, _ = self._votes_and_confidences(self.ovo_decision_function(X))
+        return self.classes_[votes.argmax(axis=1)]
+
+    @property
+    def feature_names_in_(self):
+        """
+        Feature names in input order, as on a fitted sklearn estimator.
+        """
+        return np.asarray(self.feature_names, dtype=object)
+
+
+def compile_pipeline(pipeline):
+    """
+    Extract the inference arrays from a fitted preprocessor + SVC pipeline.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        Fitted pipeline whose first step is the ``ColumnTransformer`` built by
+        ``split_preprocess_data.py`` (a ``StandardScaler`` over the numeric
+        features) and whose last step is an RBF ``SVC`` or a
+        ``src.approximate_kernel.NystroemSVC``, whose Nystroem components
+        take the place of the support vectors. A fitted search object is
+        also accepted, in which case ``best_estimator_`` is used.
+
+    Returns
+    -------
+    CompiledSVCScorer
+        Scorer reproducing ``pipeline.decision_function`` and ``pipeline.predict``.
+
+    Raises
+    ------
+    ValueError
+        If the pipeline does not have the expected structure.
+    """
+    pipeline = getattr(pipeline, "best_estimator_", pipeline)
+    preprocessor, svc = pipeline[0], pipeline[-1]
+    approximate = hasattr(svc, "nystroem_")
+    if len(pipeline) != 2 or not (approximate or getattr(svc, "kernel", None) == "rbf"):
+        raise ValueError("Expected a two-step preprocessor + RBF SVC (or NystroemSVC) pipeline.")
+
+    feature_names = list(pipeline.feature_names_in_)
+    mean = np.zeros(len(feature_names))
+    scale = np.ones(len(feature_names))
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop" or not len(columns):
+            continue
+        if transformer != "passthrough":
+            if not hasattr(transformer, "scale_"):
+                raise ValueError(f"Unsupported transformer '{name}' in the preprocessor.")
+            idx = [feature_names.index(c) for c in columns]
+            mean[idx] = transformer.mean_
+            scale[idx] = transformer.scale_
+    # the SVC sees columns in the preprocessor's output order
+    order = [feature_names.index(c) for c in preprocessor.get_feature_names_out()]
+
+    if approximate:
+        # a kernel expansion over the Nystroem components, with the feature map folded into the weights
+        centres = svc.nystroem_.components_
+        pair_coef = svc.nystroem_.normalization_.T @ svc.coef_
+    else:
+        centres = svc.support_vectors_
+        # lay the libsvm dual coefficients out as one column per one-vs-one classifier
+        n_classes = len(svc.classes_)
+        bounds = np.concatenate([[0], np.cumsum(svc.n_support_)])
+        pair_coef = np.zeros((len(centres), n_classes * (n_classes - 1) // 2))
+        k = 0
+        for i in range(n_classes):
+            for j in range(i + 1, n_classes):
+                si, sj = slice(bounds[i], bounds[i + 1]), slice(bounds[j], bounds[j + 1])
+                pair_coef[si, k] = svc.dual_coef_[j - 1, si]
+                pair_coef[sj, k] = svc.dual_coef_[i, sj]
+                k += 1
+
+    gamma = svc._gamma
+    sv_scaled = np.empty_like(centres)
+    sv_scaled[:, order] = centres
+    feature_weight = np.sqrt(gamma) / scale
+    support_vectors = (sv_scaled * scale + mean) * feature_weight
+
+    return CompiledSVCScorer(
+        feature_names=feature_names,
+        classes=svc.classes_,
+        feature_weight=feature_weight,
+        support_vectors=support_vectors,
+        support_sq_norms=np.einsum("ij,ij->i", support_vectors, support_vectors),
+        pair_coef=pair_coef,
+        intercept=svc.intercept_.copy(),
+    )
@@ -0,0 +1,169 @@
+"""Feature-label and feature-feature correlation checks without deepchecks.
+
+These reproduce the two deepchecks checks ``eda.py`` used to run, with the
+same conditions:
+
+- ``FeatureLabelCorrelation().add_condition_feature_pps_less_than(0.9)``:
+  every feature's predictive power score (PPS) for the label is below 0.9.
+  The PPS is computed as ``ppscore`` (which deepchecks uses) does: a
+  decision tree is fitted on the feature alone and scored by weighted F1
+  with 4-fold stratified cross-validation, and the score is normalised
+  against the better of predicting the most common class and predicting a
+  shuffled copy of the labels.
+- ``FeatureFeatureCorrelation().add_condition_max_number_of_pairs_above_threshold(0.92, 0)``:
+  no pair of (numeric) features has an absolute Spearman correlation above
+  0.92.
+
+A fully grown decision tree on a single feature puts every distinct value
+that is not in a pure leaf into a leaf of its own and splits halfway between
+neighbouring values, so it predicts, for every value, the majority class of
+the training rows with the nearest training value. ``predictive_power_scores``
+therefore needs no tree: one ``np.bincount`` over (value, class) pairs per
+fold gives every prediction. Correlation matrices are a single
+``np.corrcoef`` call (on ranks for Spearman). Like deepchecks, the checks
+use at most ``n_samples`` rows and the PPS at most ``pps_sample`` rows,
+drawn with ``random_state``.
+"""
+
+import numpy as np
+import pandas as pd
+
+PPS_THRESHOLD = 0.9
+CORRELATION_THRESHOLD = 0.92
+
+
+def correlation_matrix(data, method="pearson"):
+    """
+    Pearson or Spearman correlation matrix of the columns of ``data``.
+
+    Without missing values this is one ``np.corrcoef`` call (on the average
+    ranks for Spearman); otherwise each pair uses the rows where both are
+    present, as ``DataFrame.corr`` does.
+    """
+    if data.isna().any().any():
+        return data.corr(method=method)
+    values = data.rank().to_numpy() if method == "spearman" else data.to_numpy(dtype=np.float64)
+    return pd.DataFrame(np.corrcoef(values, rowvar=False), index=data.columns, columns=data.columns)
+
+
+def _weighted_f1(y_true, y_pred, n_classes):
+    """
+    ``f1_score(y_true, y_pred, average="weighted")`` for integer labels.
+    """
+    confusion = np.bincount(y_true * n_classes + y_pred, minlength=n_classes * n_classes)
+    confusion = confusion.reshape(n_classes, n_classes)
+    true_positives = np.diag(confusion)
+    support = confusion.sum(axis=1)
+    denominator = support + confusion.sum(axis=0)
+    f1 = np.divide(2 * true_positives, denominator, out=np.zeros(n_classes), where=denominator > 0)
+    return (f1 * support).sum() / support.sum()
+
+
+def _nearest_value_majority(x_train, y_train, x_test, n_classes):
+    """
+    Predictions of a fully grown one-feature decision tree: the majority
+    class (lowest label on ties) of the training rows with the training
+    value nearest each test value. Ties between two values go to the
+    lower one; ``x_train`` and ``x_test`` should be float32 values, as
+    sklearn's trees compare them.
+    """
+    values, inverse = np.unique(x_train, return_inverse=True)
+    counts = np.bincount(inverse * n_classes + y_train, minlength=len(values) * n_classes)
+    majority = counts.reshape(len(values), n_classes).argmax(axis=1)
+    if len(values) == 1:
+        return np.full(len(x_test), majority[0])
+    thresholds = values[:-1] / 2.0 + values[1:] / 2.0
+    thresholds = np.where(thresholds == values[1:], values[:-1], thresholds)
+    return majority[np.searchsorted(thresholds, x_test, side="left")]
+
+
+def feature_pps(x, y, n_classes, cv=4, random_state=42):
+    """
+    Predictive power score of one numeric feature ``x`` for the integer
+    labels ``y`` (coded in sorted label order), as computed by ``ppscore``.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    x = x.astype(np.float32).astype(np.float64)
+    # ppscore shuffles the rows before its (unshuffled) stratified folds
+    order = pd.Series(np.arange(len(x))).sample(frac=1, random_state=random_state).to_numpy()
+    x_shuffled, y_shuffled = x[order], y[order]
+    scores = []
+    for train, test in StratifiedKFold(cv).split(x_shuffled.reshape(-1, 1), y_shuffled):
+        predicted = _nearest_value_majority(x_shuffled[train], y_shuffled[train], x_shuffled[test], n_classes)
+        scores.append(_weighted_f1(y_shuffled[test], predicted, n_classes))
+    model_score = np.mean(scores)
+
+    # baseline: the better of the most common class and shuffled labels
+    labels = pd.Series(y)
+    most_common = np.full(len(y), labels.value_counts().index[0])
+    shuffled = labels.sample(frac=1, random_state=random_state).to_numpy()
+    baseline = max(_weighted_f1(y, most_common, n_classes), _weighted_f1(y, shuffled, n_classes))
+    if baseline == 1:
+        return 0.0
+    return max(0.0, (model_score - baseline) / (1 - baseline))
+
+
+def predictive_power_scores(data, label="RiskLevel", pps_sample=5000, cv=4, random_state=42):
+    """
+    Predictive power score of every feature of ``data`` for ``label``.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Numeric features and the label column.
+    label : str
+        Name of the label column.
+    pps_sample : int or None
+        Maximum number of rows (with both values present) used per feature.
+    cv : int
+        Number of cross-validation folds.
+    random_state : int
+        Seed of the sample, the row shuffle and the shuffled-label baseline.
+
+    Returns
+    -------
+    pandas.Series
+        PPS of every feature, highest first.
+    """
+    scores = {}
+    for feature in data.columns.drop(label):
+        pair = data[[feature, label]].dropna()
+        if pps_sample and len(pair) > pps_sample:
+            pair = pair.sample(pps_sample, random_state=random_state)
+        classes, y = np.unique(pair[label].astype(str).to_numpy(), return_inverse=True)
+        if len(classes) < 2:
+            scores[feature] = 0.0
+            continue
+        scores[feature] = feature_pps(pair[feature].to_numpy(), y, len(classes), cv, random_state)
+    return pd.Series(scores, name="pps").sort_values(ascending=False)
+
+
+def _sample(data, n_samples, random_state):
+    if n_samples is not None and len(data) > n_samples:
+        return data.sample(n_samples, random_state=random_state)
+    return data
+
+
+def feature_label_check(data, label="RiskLevel", threshold=PPS_THRESHOLD, n_samples=1_000_000,
+                        pps_sample=5000, random_state=42):
+    """
+    Whether every feature's PPS for ``label`` is below ``threshold``, and the
+    scores.
+    """
+    pps = predictive_power_scores(_sample(data, n_samples, random_state), label, pps_sample,
+                                  random_state=random_state)
+    return bool((pps < threshold).all()), pps
+
+
+def feature_feature_check(data, label="RiskLevel", threshold=CORRELATION_THRESHOLD, n_pairs=0,
+                          n_samples=1_000_000, random_state=42):
+    """
+    Whether at most ``n_pairs`` pairs of features have an absolute Spearman
+    correlation above ``threshold``, the pairs that do, and the matrix.
+    """
+    features = _sample(data, n_samples, random_state).drop(columns=[label])
+    correlation = correlation_matrix(features, method="spearman")
+    above = np.triu(correlation.abs().to_numpy() > threshold, k=1)
+    pairs = [(correlation.index[i], correlation.columns[j]) for i, j in zip(*np.nonzero(above))]
+    return len(pairs) <= n_pairs, pairs, correlation
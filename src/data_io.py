@@ -0,0 +1,369 @@
+"""Reading and writing the tables passed between pipeline stages.
+
+Intermediate tables (validated data, train/test splits and their scaled
+versions) can be stored as CSV, Parquet or Feather (Arrow IPC). The format is
+chosen by the file extension, so downstream scripts read whatever the
+upstream script wrote. The binary formats store column types in the file, so
+reading them skips text parsing and type inference; both can read a subset of
+columns, and Feather files are written uncompressed so that they are
+memory-mapped rather than copied when read. pyarrow is only imported for the
+binary formats.
+
+Reads take an optional ``dtypes`` mapping (``src.schema.COMPACT_DTYPES`` for
+the validated data and the splits) that is applied as the table is loaded:
+CSV float and category columns are parsed straight into their compact types,
+and binary files written with those types are already stored compactly.
+
+A split can also be stored as a split index instead of a table: a ``.npy``
+array of the positions of its rows in the validated data, written by
+``write_split_index`` next to a ``split_manifest.json`` that names the
+validated data. ``read_table`` and ``iter_table`` accept an index wherever
+they accept a table and return the indexed rows, in the index's order.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from src.schema import apply_dtypes
+from src.profiling import phase
+
+DATA_FORMATS = ["csv", "parquet", "feather"]
+FORMAT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+INDEX_EXTENSION = ".npy"
+SPLIT_MANIFEST = "split_manifest.json"
+
+
+def table_path(directory, name, data_format="csv"):
+    """
+    Path of the table ``name`` in ``directory`` for the given format.
+    """
+    return os.path.join(directory, name + FORMAT_EXTENSIONS[data_format])
+
+
+def table_format(path):
+    """
+    The format of a table file, from its extension.
+
+    Raises
+    ------
+    ValueError
+        If the extension is not one of ``FORMAT_EXTENSIONS``.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    for data_format, known in FORMAT_EXTENSIONS.items():
+        if extension == known:
+            return data_format
+    raise ValueError(f"Unknown table format '{extension}'; expected one of {list(FORMAT_EXTENSIONS.values())}.")
+
+
+def arrow_schema(dtypes):
+    """
+    Arrow schema for a ``{column: dtype}`` mapping such as
+    ``src.schema.COMPACT_DTYPES``; categoricals become dictionary columns.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for name, dtype in dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            fields.append((name, pa.dictionary(pa.int8(), pa.string(), ordered=dtype.ordered)))
+        else:
+            fields.append((name, pa.from_numpy_dtype(dtype)))
+    return pa.schema(fields)
+
+
+def _csv_dtypes(dtypes):
+    """
+    The part of ``dtypes`` that ``pandas.read_csv`` can parse into directly.
+    Integer columns are cast after parsing, since they may hold missing values.
+    """
+    parse = {}
+    for name, dtype in (dtypes or {}).items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            parse[name] = "category"
+        elif np.issubdtype(dtype, np.floating):
+            parse[name] = dtype
+    return parse
+
+
+def read_table(path, columns=None, memory_map=True, dtypes=None):
+    """
+    Read a table written by ``write_table`` (or any CSV).
+
+    Parameters
+    ----------
+    path : str
+        Path to a ``.csv``, ``.parquet`` or ``.feather`` file.
+    columns : list of str, optional
+        Only read these columns (default: all).
+    memory_map : bool
+        Map Parquet and Feather files into memory instead of reading them
+        into a buffer first.
+    dtypes : dict, optional
+        Column name to dtype, applied with ``src.schema.apply_dtypes``.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    Raises
+    ------
+    ValueError
+        If a column cannot be stored in its dtype.
+    """
+    if is_split_index(path):
+        return next(_iter_split_index(path, None, columns, memory_map, dtypes))
+    data_format = table_format(path)
+    with phase(f"read {data_format}", path=path):
+        if data_format == "csv":
+            data = pd.read_csv(path, usecols=columns, dtype=_csv_dtypes(dtypes))
+        elif data_format == "parquet":
+            import pyarrow.parquet as pq
+            data = pq.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+        else:
+            import pyarrow.feather as feather
+            data = feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+        return apply_dtypes(data, dtypes) if dtypes else data
+
+
+def iter_table(path, chunk_size, columns=None, dtypes=None):
+    """
+    Read a table in chunks of ``chunk_size`` rows, with the same options as
+    ``read_table``.
+
+    Chunks carry a running RangeIndex, like ``pandas.read_csv(...,
+    chunksize=...)``, whatever the format.
+    """
+    if is_split_index(path):
+        yield from _iter_split_index(path, chunk_size, columns, True, dtypes)
+        return
+    data_format = table_format(path)
+    if data_format == "csv":
+        for chunk in pd.read_csv(path, usecols=columns, dtype=_csv_dtypes(dtypes), chunksize=chunk_size):
+            yield apply_dtypes(chunk, dtypes) if dtypes else chunk
+        return
+    if data_format == "parquet":
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunk_size, columns=columns)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        batches = (table.slice(start, chunk_size) for start in range(0, table.num_rows, chunk_size))
+    start = 0
+    for batch in batches:
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield apply_dtypes(chunk, dtypes) if dtypes else chunk
+
+
+def is_split_index(path):
+    """
+    Whether ``path`` is a split index rather than a table.
+    """
+    return os.path.splitext(path)[1].lower() == INDEX_EXTENSION
+
+
+def write_split_index(directory, source, source_rows, splits):
+    """
+    Write every split of ``source`` as the positions of its rows.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the ``.npy`` index files and of ``SPLIT_MANIFEST``.
+    source : str
+        Path to the table the positions refer to (the validated data).
+    source_rows : int
+        Number of rows of ``source``.
+    splits : dict
+        Split name (e.g. ``"maternal_health_risk_train"``) to an array of row
+        positions, in the order the split's rows should be read. They are
+        stored in the smallest unsigned integer type that holds them.
+
+    Returns
+    -------
+    dict
+        Split name to the path of its index.
+    """
+    dtype = np.min_scalar_type(max(source_rows - 1, 0))
+    manifest = {"source": os.path.relpath(source, directory), "source_rows": source_rows, "splits": {}}
+    paths = {}
+    for name, positions in splits.items():
+        paths[name] = os.path.join(directory, name + INDEX_EXTENSION)
+        with phase("write index", path=paths[name]):
+            np.save(paths[name], np.asarray(positions).astype(dtype))
+        manifest["splits"][name + INDEX_EXTENSION] = len(positions)
+    with open(os.path.join(directory, SPLIT_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return paths
+
+
+def read_split_index(path):
+    """
+    The source table, its number of rows when the index was written, and the
+    row positions of a split index.
+
+    Raises
+    ------
+    ValueError
+        If the index is not listed in the ``SPLIT_MANIFEST`` next to it.
+    """
+    directory, name = os.path.split(path)
+    with open(os.path.join(directory, SPLIT_MANIFEST)) as f:
+        manifest = json.load(f)
+    if name not in manifest["splits"]:
+        raise ValueError(f"'{path}' is not listed in {os.path.join(directory, SPLIT_MANIFEST)}.")
+    source = os.path.normpath(os.path.join(directory, manifest["source"]))
+    return source, manifest["source_rows"], np.load(path)
+
+
+def _iter_split_index(path, chunk_size, columns, memory_map, dtypes):
+    """
+    The rows of a split index, ``chunk_size`` positions at a time (default:
+    all at once), read from its source table.
+    """
+    source, source_rows, positions = read_split_index(path)
+    data_format = table_format(source)
+    with phase(f"read {data_format}", path=source, index=path):
+        if data_format == "csv":
+            rows = pd.read_csv(source, usecols=columns, dtype=_csv_dtypes(dtypes))
+        elif data_format == "parquet":
+            import pyarrow.parquet as pq
+            rows = pq.read_table(source, columns=columns, memory_map=memory_map)
+        else:
+            import pyarrow.feather as feather
+            rows = feather.read_table(source, columns=columns, memory_map=memory_map)
+    # appending rows keeps the positions valid, anything else is a different table
+    if len(rows) < source_rows:
+        raise ValueError(f"'{source}' has {len(rows)} rows but had {source_rows} when '{path}' was written; "
+                         "rerun split_preprocess_data.py.")
+    step = chunk_size or max(len(positions), 1)
+    for start in range(0, max(len(positions), 1), step):
+        part = positions[start:start + step]
+        chunk = rows.iloc[part] if data_format == "csv" else rows.take(part).to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        yield apply_dtypes(chunk, dtypes) if dtypes else chunk
+
+
+def _arrow_table(data, schema=None):
+    import pyarrow as pa
+    return pa.Table.from_pandas(data, schema=schema, preserve_index=False)
+
+
+def write_table(data, path, schema=None, export_csv=False):
+    """
+    Write a DataFrame (without its index) in the format given by ``path``.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        The table to write.
+    path : str
+        Path to a ``.csv``, ``.parquet`` or ``.feather`` file.
+    schema : pyarrow.Schema, optional
+        Column types for the binary formats (default: from ``data.dtypes``).
+    export_csv : bool
+        Also write a CSV copy next to a Parquet or Feather file.
+    """
+    data_format = table_format(path)
+    with phase(f"write {data_format}", path=path):
+        if data_format == "csv":
+            data.to_csv(path, index=False)
+        elif data_format == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(_arrow_table(data, schema), path)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(_arrow_table(data, schema), path, compression="uncompressed")
+    if export_csv and data_format != "csv":
+        with phase("write csv", path=os.path.splitext(path)[0] + ".csv"):
+            data.to_csv(os.path.splitext(path)[0] + ".csv", index=False)
+
+
+def append_table(data, path):
+    """
+    Append rows to an existing table. CSV files are appended in place; the
+    binary formats are rewritten with the old and new rows.
+    """
+    if table_format(path) == "csv":
+        data.to_csv(path, mode="a", header=False, index=False)
+    else:
+        existing = read_table(path)
+        write_table(pd.concat([existing, data[existing.columns]], ignore_index=True), path)
+
+
+def copy_table(source, destination, chunk_size=100_000):
+    """
+    Convert a table to the format of ``destination``, ``chunk_size`` rows at
+    a time.
+    """
+    with TableWriter(destination) as writer:
+        for chunk in iter_table(source, chunk_size):
+            writer.write(chunk)
+
+
+class TableWriter:
+    """
+    Write a table chunk by chunk in the format given by ``path``.
+
+    Every chunk is converted to ``schema`` (default: the types of the first
+    chunk), so chunks whose dtypes were inferred differently still produce a
+    single consistent file.
+
+    Examples
+    --------
+    >>> with TableWriter("validated_data.parquet") as writer:
+    ...     for chunk in chunks:
+    ...         writer.write(chunk)
+    """
+
+    def __init__(self, path, schema=None):
+        self.path = path
+        self.format = table_format(path)
+        self.schema = schema
+        self.n_chunks = 0
+        self._writer = None
+
+    def write(self, chunk):
+        """
+        Append a DataFrame chunk (without its index).
+        """
+        if self.format == "csv":
+            chunk.to_csv(self.path, mode="w" if self.n_chunks == 0 else "a", header=self.n_chunks == 0, index=False)
+        else:
+            table = _arrow_table(chunk, self.schema)
+            if self._writer is None:
+                self._open(table.schema)
+            self._writer.write_table(table)
+        self.n_chunks += 1
+
+    def _open(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.schema = schema
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(self.path, schema)
+        else:
+            self._writer = pa.ipc.new_file(self.path, schema, options=pa.ipc.IpcWriteOptions(compression=None))
+
+    def close(self):
+        """
+        Finish the file; an empty table is written if no chunk was.
+        """
+        if self.format == "csv":
+            if self.n_chunks == 0:
+                open(self.path, "w").close()
+            return
+        if self._writer is None:
+            import pyarrow as pa
+            self._open(self.schema or pa.schema([]))
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,143 @@
+"""Per-class kernel density estimates computed from binned counts.
+
+``seaborn.kdeplot`` evaluates a Gaussian kernel at every observation for
+every point of its evaluation grid, so its cost grows with the number of
+rows. ``class_densities`` instead makes one pass over a feature column that
+counts the rows of every class on a regular grid (linear binning: each value
+is shared between its two neighbouring grid points) together with the
+per-class sums needed for the bandwidth, and then evaluates the kernel at the
+grid points only. The bandwidth, evaluation grid and normalisation follow
+``kdeplot`` with its defaults (Scott's rule, ``cut=3``, ``gridsize=200``, a
+grid per class and densities scaled by the share of each class).
+
+Integer-valued features are binned on a unit grid, one point per value, so
+their estimates are exact; float features use a grid of ``max_bins``
+points over their range.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def stratified_sample(data, by, n_rows, seed=123):
+    """
+    A random sample of about ``n_rows`` rows of ``data`` that keeps the share
+    of every class of ``by``; ``data`` itself if it is not larger.
+    """
+    if n_rows is None or len(data) <= n_rows:
+        return data
+    return data.groupby(by, observed=True, group_keys=False).sample(
+        frac=n_rows / len(data), random_state=seed
+    )
+
+
+def _grid(values, max_bins):
+    """
+    First grid point, spacing and number of points of the binning grid.
+    """
+    low, high = float(values.min()), float(values.max())
+    if np.array_equal(values, np.round(values)) and high - low + 1 <= max_bins:
+        return low, 1.0, max(int(high - low) + 1, 2)
+    return low, max((high - low) / (max_bins - 1), np.finfo(float).tiny), max_bins
+
+
+def binned_counts(values, codes, n_classes, max_bins=1024):
+    """
+    Linear-binned counts of ``values`` for every class on a regular grid.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Feature values without missing values.
+    codes : numpy.ndarray
+        Class code (0 to ``n_classes - 1``) of every value.
+    n_classes : int
+        Number of classes.
+    max_bins : int
+        Maximum number of grid points.
+
+    Returns
+    -------
+    grid : numpy.ndarray
+        Grid points.
+    counts : numpy.ndarray
+        ``(n_classes, len(grid))`` array of (fractional) counts.
+    n : numpy.ndarray
+        Number of values of every class.
+    mean, var : numpy.ndarray
+        Mean and sample variance (``ddof=1``) of every class.
+    """
+    low, step, n_bins = _grid(values, max_bins)
+    position = (values - low) / step
+    lower = np.minimum(position.astype(np.int64), n_bins - 2)
+    upper_share = position - lower
+    index = codes.astype(np.int64) * n_bins + lower
+    size = n_classes * n_bins
+    counts = np.bincount(index, weights=1 - upper_share, minlength=size)
+    counts += np.bincount(index + 1, weights=upper_share, minlength=size)
+
+    # exact moments, around a shift that keeps the sums of squares accurate
+    centered = values.astype(np.float64) - values.mean()
+    n = np.bincount(codes, minlength=n_classes).astype(np.float64)
+    sums = np.bincount(codes, weights=centered, minlength=n_classes)
+    squares = np.bincount(codes, weights=centered * centered, minlength=n_classes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / n
+        var = (squares - n * mean * mean) / (n - 1)
+    grid = low + step * np.arange(n_bins)
+    return grid, counts.reshape(n_classes, n_bins), n, mean + values.mean(), var
+
+
+def class_densities(data, feature, by, max_bins=1024, gridsize=200, cut=3):
+    """
+    Kernel density estimate of ``feature`` for every class of ``by``, as
+    drawn by ``seaborn.kdeplot(data, x=feature, hue=by)``.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Table with the feature and the class column.
+    feature : str
+        Numeric column to estimate the density of.
+    by : str
+        Categorical column with the classes.
+    max_bins : int
+        Maximum number of grid points the values are binned on.
+    gridsize : int
+        Number of points the density is evaluated at.
+    cut : float
+        Number of bandwidths the evaluation grid extends past the data.
+
+    Returns
+    -------
+    dict
+        Class to ``(support, density)`` arrays, for the classes with at least
+        two distinct values. Densities are scaled by the share of the class,
+        so together they integrate to one.
+    """
+    keep = data[feature].notna() & data[by].notna()
+    classes = data.loc[keep, by]
+    if isinstance(classes.dtype, pd.CategoricalDtype):
+        codes, levels = classes.cat.codes.to_numpy(), list(classes.cat.categories)
+    else:
+        codes, levels = pd.factorize(classes, sort=True)
+        levels = list(levels)
+    values = data.loc[keep, feature].to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return {}
+    grid, counts, n, mean, var = binned_counts(values, codes, len(levels), max_bins)
+    extent = pd.Series(values).groupby(codes).agg(["min", "max"])
+
+    densities = {}
+    for code, level in enumerate(levels):
+        if n[code] < 2 or not var[code] > 0:
+            continue
+        bandwidth = np.sqrt(var[code]) * n[code] ** (-1 / 5)
+        occupied = counts[code] > 0
+        points, weights = grid[occupied], counts[code][occupied]
+        low, high = extent.loc[code]
+        support = np.linspace(low - cut * bandwidth, high + cut * bandwidth, gridsize)
+        z = (support[:, None] - points[None, :]) / bandwidth
+        kernel = np.exp(-0.5 * z * z) / (bandwidth * np.sqrt(2 * np.pi))
+        densities[level] = (support, kernel @ weights / len(values))
+    return densities
@@ -0,0 +1,225 @@
+"""Streaming, resumable and cached download of the raw data archive.
+
+``download_file`` streams the response to ``<path>.part`` in fixed-size
+blocks while hashing it, so memory use does not depend on the file size. If
+the transfer is interrupted, the next attempt (within the same call, or a
+later run) asks for the remaining bytes with an HTTP ``Range`` request,
+guarded by ``If-Range`` so that a changed file is downloaded again from the
+start. A completed download is recorded in ``<path>.meta.json`` with its
+SHA-256 and the server's ``ETag``/``Last-Modified``; later runs send them as
+``If-None-Match``/``If-Modified-Since`` and keep the local copy when the
+server answers ``304 Not Modified``, or skip the request entirely when the
+expected SHA-256 is given and matches.
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+import zlib
+import requests
+
+CHUNK_SIZE = 1 << 20
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _dump_json(record, path):
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+
+
+def _hash_file(digest, path, chunk_size=CHUNK_SIZE):
+    """
+    Feed the contents of ``path`` to ``digest``.
+    """
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest
+
+
+def _validators(headers):
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def _expected_size(response, offset):
+    """
+    Total size of the file from Content-Range (206) or Content-Length (200),
+    or None if the server did not say.
+    """
+    content_range = response.headers.get("Content-Range")
+    if response.status_code == 206 and content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length is not None else None
+
+
+def _fetch(session, url, path, cached, timeout, chunk_size):
+    """
+    One request: a conditional GET if there is a verified local copy, a
+    range request if there is a resumable partial download. Returns the
+    status ("cached", "downloaded" or "resumed") and, unless cached, the
+    SHA-256 and validators of the completed ``<path>.part``.
+    """
+    part_path = path + ".part"
+    part_meta_path = part_path + ".json"
+    headers = {"Accept-Encoding": "identity"}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    offset = 0
+    part_meta = _load_json(part_meta_path)
+    if os.path.exists(part_path) and part_meta and part_meta["url"] == url:
+        validator = part_meta.get("etag") or part_meta.get("last_modified")
+        if validator:
+            offset = os.path.getsize(part_path)
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return "cached", None, None
+        if response.status_code == 416:
+            # the partial file is not a prefix of the current one; start over
+            os.remove(part_path)
+            return _fetch(session, url, path, cached, timeout, chunk_size)
+        response.raise_for_status()
+
+        resumed = response.status_code == 206
+        validators = _validators(response.headers)
+        digest = hashlib.sha256()
+        if resumed:
+            _hash_file(digest, part_path, chunk_size)
+        else:
+            offset = 0
+        _dump_json({"url": url, **validators}, part_meta_path)
+        expected_size = _expected_size(response, offset)
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for block in response.iter_content(chunk_size):
+                f.write(block)
+                digest.update(block)
+
+    size = os.path.getsize(part_path)
+    if expected_size is not None and size != expected_size:
+        raise requests.exceptions.ChunkedEncodingError(
+            f"Download of {url} stopped at {size} of {expected_size} bytes."
+        )
+    return ("resumed" if resumed else "downloaded"), digest.hexdigest(), validators
+
+
+def download_file(url, path, expected_sha256=None, retries=3, timeout=60, chunk_size=CHUNK_SIZE, session=None):
+    """
+    Download ``url`` to ``path`` unless the local copy is up to date.
+
+    Parameters
+    ----------
+    url : str
+        URL of the file.
+    path : str
+        Local path of the file. ``<path>.part`` holds an unfinished download
+        and ``<path>.meta.json`` the cache record of the finished one.
+    expected_sha256 : str, optional
+        SHA-256 hex digest the file must have. If the local copy has it, no
+        request is made; if a download does not, it is discarded.
+    retries : int
+        Number of times an interrupted transfer is resumed before giving up.
+    timeout : float
+        Seconds to wait for the server to respond or send data.
+    chunk_size : int
+        Number of bytes written at a time.
+    session : requests.Session, optional
+        Session to use (default: a new one).
+
+    Returns
+    -------
+    str
+        ``"cached"`` if the local copy was kept, ``"downloaded"`` or
+        ``"resumed"`` (the last request continued a partial download).
+
+    Raises
+    ------
+    ValueError
+        If the downloaded file does not match ``expected_sha256``.
+    requests.exceptions.RequestException
+        If the server returns an error, or the transfer is still incomplete
+        after ``retries`` resumes; the partial file is kept for next time.
+    """
+    meta_path = path + ".meta.json"
+    part_path = path + ".part"
+    meta = _load_json(meta_path)
+    cached = None
+    if os.path.exists(path) and meta and meta["url"] == url:
+        local_sha256 = _hash_file(hashlib.sha256(), path, chunk_size).hexdigest()
+        if local_sha256 == meta["sha256"]:
+            if expected_sha256 is not None and local_sha256 == expected_sha256:
+                return "cached"
+            cached = meta
+
+    session = session or requests.Session()
+    for attempt in range(retries + 1):
+        try:
+            status, sha256, validators = _fetch(session, url, path, cached, timeout, chunk_size)
+            break
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.ChunkedEncodingError,
+            requests.exceptions.Timeout,
+        ):
+            if attempt == retries:
+                raise
+    if status == "cached":
+        return status
+
+    if expected_sha256 is not None and sha256 != expected_sha256:
+        os.remove(part_path)
+        os.remove(part_path + ".json")
+        raise ValueError(f"SHA-256 of {url} is {sha256}, expected {expected_sha256}.")
+    os.replace(part_path, path)
+    _dump_json({"url": url, "sha256": sha256, "size": os.path.getsize(path), **validators}, meta_path)
+    os.remove(part_path + ".json")
+    return status
+
+
+def _crc32(path, chunk_size=CHUNK_SIZE):
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def extract_member(zip_path, member, write_to):
+    """
+    Extract a single member of a zip archive, unless ``write_to`` already
+    holds it with the same size and CRC-32.
+
+    Returns
+    -------
+    str
+        ``"extracted"`` or ``"unchanged"``.
+
+    Raises
+    ------
+    KeyError
+        If the archive has no such member.
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        info = archive.getinfo(member)
+        target = os.path.join(write_to, member)
+        if (
+            os.path.isfile(target)
+            and os.path.getsize(target) == info.file_size
+            and _crc32(target) == info.CRC
+        ):
+            return "unchanged"
+        archive.extract(info, write_to)
+    return "extracted"
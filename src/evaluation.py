@@ -0,0 +1,320 @@
+"""Test-set metrics from a single pass of the model over the test data.
+
+``EvaluationAccumulator`` takes the decision scores of each chunk of the
+test set (one ``decision_function`` call per chunk), derives the predictions
+from them (``src.inference.predict_from_decision``) and keeps only what the
+metrics need: the confusion counts, updated with one ``np.bincount`` per
+chunk, and the scores of every class. Accuracy, weighted recall and F-beta
+come from the confusion counts, and every one-vs-rest ROC curve and AUC from
+one sort of each class's scores, computed as ``sklearn.metrics.roc_curve``
+and ``roc_auc_score`` do. With ``n_bins`` the scores are kept as per-class
+histograms of positives and negatives instead, so memory does not grow with
+the test set; thresholds are then the bin edges.
+
+``bootstrap_metrics`` resamples the test rows without scoring them again:
+all resample indices are drawn as one matrix per block of resamples, and
+one ``np.bincount`` gives the confusion counts of every resample and another
+how often each row was drawn, from which the AUCs follow.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from src.inference import predict_from_decision
+
+# most resamples drawn at a time, and most (resample, row) counts per block:
+# a block holds a few int64 arrays of that many entries (64 MiB each)
+BOOTSTRAP_BLOCK_SIZE = 500
+BOOTSTRAP_BLOCK_CELLS = 1 << 23
+
+
+def model_scores(model, X):
+    """
+    Scores and predicted labels of ``X`` from one pass of the model:
+    ``decision_function`` if the model has one, else ``predict_proba``.
+    """
+    classes = np.asarray(model.classes_)
+    if hasattr(model, "decision_function"):
+        y_score = model.decision_function(X)
+        return y_score, predict_from_decision(y_score, classes)
+    y_score = model.predict_proba(X)
+    return y_score, classes[y_score.argmax(axis=1)]
+
+
+def score_range(model, n_classes):
+    """
+    Interval holding every score of ``model_scores``: one-vs-rest SVC
+    decision scores are vote counts plus a confidence in (-1/3, 1/3).
+    """
+    if hasattr(model, "decision_function"):
+        return -0.5, n_classes - 0.5
+    return 0.0, 1.0
+
+
+def confusion_scores(confusion, beta=2):
+    """
+    Accuracy, weighted recall and weighted F-beta from confusion counts
+    (true labels in rows), as ``accuracy_score``, ``recall_score`` and
+    ``fbeta_score`` with ``average="weighted"`` compute them. ``confusion``
+    may be a stack of matrices (shape ``(..., n_classes, n_classes)``), in
+    which case every score is an array over the stack.
+    """
+    confusion = np.asarray(confusion, dtype=np.float64)
+    true_positives = np.diagonal(confusion, axis1=-2, axis2=-1)
+    support = confusion.sum(axis=-1)
+    predicted = confusion.sum(axis=-2)
+    n = support.sum(axis=-1)
+    recall = np.divide(true_positives, support, out=np.zeros_like(support), where=support > 0)
+    beta2 = beta * beta
+    denominator = (1 + beta2) * true_positives + beta2 * (support - true_positives) + (predicted - true_positives)
+    fbeta = np.divide((1 + beta2) * true_positives, denominator, out=np.zeros_like(support), where=denominator > 0)
+    return {
+        "accuracy": true_positives.sum(axis=-1) / n,
+        "recall_weighted": (recall * support).sum(axis=-1) / n,
+        f"F{beta:g}_weighted": (fbeta * support).sum(axis=-1) / n,
+    }
+
+
+def roc_from_counts(fps, tps):
+    """
+    ROC curve and AUC from cumulative false and true positive counts at
+    decreasing thresholds, with the intermediate collinear points dropped
+    as ``roc_curve(drop_intermediate=True)`` does.
+    """
+    if len(fps) > 2:
+        keep = np.where(np.r_[True, np.logical_or(np.diff(fps, 2), np.diff(tps, 2)), True])[0]
+        fps, tps = fps[keep], tps[keep]
+    fps, tps = np.r_[0, fps], np.r_[0, tps]
+    fpr = fps / fps[-1] if fps[-1] > 0 else np.full(fps.shape, np.nan)
+    tpr = tps / tps[-1] if tps[-1] > 0 else np.full(tps.shape, np.nan)
+    return fpr, tpr, np.trapz(tpr, fpr)
+
+
+def sorted_roc(positive, scores):
+    """
+    One-vs-rest ROC curve and AUC of one class from its exact scores.
+    """
+    order = np.argsort(scores, kind="mergesort")[::-1]
+    scores, positive = scores[order], positive[order]
+    last = np.r_[np.nonzero(np.diff(scores))[0], len(scores) - 1]
+    tps = np.cumsum(positive)[last]
+    return roc_from_counts(1 + last - tps, tps)
+
+
+def binned_roc(positive_counts, negative_counts):
+    """
+    One-vs-rest ROC curve and AUC of one class from histograms of the
+    scores of its positives and negatives, thresholds at the bin edges.
+    """
+    occupied = (positive_counts + negative_counts) > 0
+    tps = np.cumsum(positive_counts[::-1])[occupied[::-1]]
+    fps = np.cumsum(negative_counts[::-1])[occupied[::-1]]
+    return roc_from_counts(fps, tps)
+
+
+def weighted_auc(positive, scores, weights):
+    """
+    One-vs-rest AUC of one class for every row of ``weights``, the number of
+    times each test row is counted (shape ``(n_resamples, n_rows)``). Equal to
+    ``roc_auc_score`` on the test set repeated by those weights: the share of
+    (positive, negative) pairs ranked correctly, ties counting a half.
+    """
+    order = np.argsort(scores, kind="mergesort")
+    sorted_scores = scores[order]
+    starts = np.r_[0, np.nonzero(np.diff(sorted_scores))[0] + 1]
+    weights = weights[:, order]
+    is_positive = positive[order]
+    # weight of the positives and negatives of every group of tied scores
+    positives = np.add.reduceat(weights * is_positive, starts, axis=1)
+    negatives = np.add.reduceat(weights * ~is_positive, starts, axis=1)
+    below = np.cumsum(negatives, axis=1) - negatives
+    pairs = positives.sum(axis=1) * negatives.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (positives * (below + 0.5 * negatives)).sum(axis=1) / pairs
+
+
+def _bootstrap_block(true, pred, y_score, n_classes, n_resamples, seed, beta):
+    """
+    Metrics of ``n_resamples`` bootstrap resamples drawn with ``seed``.
+    """
+    n_rows = len(true)
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, n_rows, size=(n_resamples, n_rows))
+    offsets = np.arange(n_resamples)[:, None]
+
+    cells = true * n_classes + pred
+    size = n_classes * n_classes
+    confusion = np.bincount((offsets * size + cells[indices]).ravel(), minlength=n_resamples * size)
+    metrics = confusion_scores(confusion.reshape(n_resamples, n_classes, n_classes), beta)
+
+    weights = np.bincount((offsets * n_rows + indices).ravel(), minlength=n_resamples * n_rows)
+    weights = weights.reshape(n_resamples, n_rows)
+    for k in range(n_classes):
+        metrics[k] = weighted_auc(true == k, y_score[:, k], weights)
+    return metrics
+
+
+def bootstrap_metrics(true, pred, y_score, n_classes, n_resamples=10_000, seed=123, n_jobs=1,
+                      block_size=None, beta=2):
+    """
+    Accuracy, weighted recall, weighted F-beta and every one-vs-rest AUC of
+    bootstrap resamples of the test rows.
+
+    Parameters
+    ----------
+    true, pred : numpy.ndarray
+        Class codes of the true and predicted label of every test row.
+    y_score : numpy.ndarray of shape (n_rows, n_classes)
+        Scores of every test row.
+    n_classes : int
+        Number of classes.
+    n_resamples : int
+        Number of resamples.
+    seed : int
+        Random seed. Block ``i`` of ``block_size`` resamples is drawn from
+        the ``i``-th child of ``np.random.SeedSequence(seed)``, so the result
+        does not depend on ``n_jobs``.
+    n_jobs : int
+        Number of processes the blocks are spread over; 1 computes them in
+        this process.
+    block_size : int, optional
+        Resamples drawn at a time; bounds the memory used to
+        ``block_size * n_rows`` counts. By default ``BOOTSTRAP_BLOCK_SIZE``,
+        or fewer so that a block holds at most ``BOOTSTRAP_BLOCK_CELLS``
+        counts (but at least one resample), so memory does not grow with
+        the number of test rows beyond a single resample.
+    beta : float
+        Beta of the F-beta score.
+
+    Returns
+    -------
+    dict
+        Metric name (``"accuracy"``, ``"recall_weighted"``, ``"F2_weighted"``)
+        or class code (AUC) to an array with one value per resample.
+    """
+    if block_size is None:
+        block_size = max(1, min(BOOTSTRAP_BLOCK_SIZE, BOOTSTRAP_BLOCK_CELLS // max(len(true), 1)))
+    sizes = [min(block_size, n_resamples - start) for start in range(0, n_resamples, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(true, pred, y_score, n_classes, size, block_seed, beta) for size, block_seed in zip(sizes, seeds)]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            blocks = list(pool.map(_bootstrap_block, *zip(*args)))
+    else:
+        blocks = [_bootstrap_block(*block_args) for block_args in args]
+    return {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+
+
+class EvaluationAccumulator:
+    """
+    Confusion counts and one-vs-rest ROC data of a test set, fed in chunks.
+
+    Parameters
+    ----------
+    classes : sequence of str
+        Class labels, in the column order of the scores (``model.classes_``).
+    n_bins : int, optional
+        If given, scores are kept as ``n_bins`` histogram bins over
+        ``score_range`` per class instead of exactly; scores outside the
+        range are counted in the first or last bin.
+    score_range : tuple of float, optional
+        Lowest and highest score (required with ``n_bins``).
+
+    Examples
+    --------
+    >>> evaluation = EvaluationAccumulator(model.classes_)
+    >>> for chunk in chunks:
+    ...     y_score, y_pred = model_scores(model, chunk[features])
+    ...     evaluation.update(chunk["RiskLevel"], y_score, y_pred)
+    >>> evaluation.scores(), evaluation.roc_curves()
+    """
+
+    def __init__(self, classes, n_bins=None, score_range=None):
+        self.classes = np.asarray(classes)
+        n_classes = len(self.classes)
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        self.n_bins = n_bins
+        if n_bins is not None:
+            low, high = score_range
+            self._edges = np.linspace(low, high, n_bins + 1)
+            # positives and negatives of every class, per bin
+            self._histograms = np.zeros((n_classes, 2, n_bins), dtype=np.int64)
+        else:
+            self._scores, self._true, self._pred = [], [], []
+
+    def _codes(self, labels):
+        codes = pd.Categorical(np.asarray(labels, dtype=object), categories=self.classes).codes.astype(np.int64)
+        if (codes < 0).any():
+            unknown = np.asarray(labels, dtype=object)[codes < 0][0]
+            raise ValueError(f"Label {unknown!r} is not one of the model's classes {list(self.classes)}.")
+        return codes
+
+    def update(self, y_true, y_score, y_pred):
+        """
+        Add a chunk: its true labels, scores (one column per class) and
+        predicted labels.
+        """
+        n_classes = len(self.classes)
+        true = self._codes(y_true)
+        pred = self._codes(y_pred)
+        self.confusion += np.bincount(true * n_classes + pred, minlength=n_classes * n_classes).reshape(
+            n_classes, n_classes
+        )
+        y_score = np.asarray(y_score, dtype=np.float64)
+        if self.n_bins is None:
+            self._scores.append(y_score)
+            self._true.append(true)
+            self._pred.append(pred)
+            return
+        bins = np.clip(np.searchsorted(self._edges, y_score, side="right") - 1, 0, self.n_bins - 1)
+        for k in range(n_classes):
+            index = (true != k) * self.n_bins + bins[:, k]
+            self._histograms[k] += np.bincount(index, minlength=2 * self.n_bins).reshape(2, self.n_bins)
+
+    def scores(self, beta=2):
+        """
+        Accuracy, weighted recall and weighted F-beta (see ``confusion_scores``).
+        """
+        return confusion_scores(self.confusion, beta)
+
+    def roc_curves(self):
+        """
+        ``(fpr, tpr, auc)`` of every class against the rest.
+        """
+        curves = {}
+        if self.n_bins is None:
+            y_score = np.concatenate(self._scores)
+            true = np.concatenate(self._true)
+            for k, class_name in enumerate(self.classes):
+                curves[class_name] = sorted_roc(true == k, y_score[:, k])
+        else:
+            for k, class_name in enumerate(self.classes):
+                curves[class_name] = binned_roc(self._histograms[k, 0], self._histograms[k, 1])
+        return curves
+
+    def bootstrap_intervals(self, n_resamples=10_000, confidence=0.95, seed=123, n_jobs=1, beta=2):
+        """
+        Percentile bootstrap confidence intervals of the scores and AUCs
+        (see ``bootstrap_metrics``); needs the exact scores (no ``n_bins``).
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per metric (``AUC <class>`` for the AUCs) with the
+            ``estimate`` on the whole test set and the ``lower`` and
+            ``upper`` bounds of the interval.
+        """
+        if self.n_bins is not None:
+            raise ValueError("Bootstrap intervals need the exact scores; they are not kept with n_bins.")
+        true, pred = np.concatenate(self._true), np.concatenate(self._pred)
+        resampled = bootstrap_metrics(
+            true, pred, np.concatenate(self._scores), len(self.classes), n_resamples, seed, n_jobs, beta=beta
+        )
+        estimates = {**self.scores(beta), **{k: auc for k, (_, _, auc) in enumerate(self.roc_curves().values())}}
+        tail = (1 - confidence) / 2 * 100
+        rows = []
+        for name, values in resampled.items():
+            lower, upper = np.nanpercentile(values, [tail, 100 - tail])
+            label = f"AUC {self.classes[name]}" if isinstance(name, int) else name
+            rows.append({"metric": label, "estimate": estimates[name], "lower": lower, "upper": upper})
+        return pd.DataFrame(rows).set_index("metric")
@@ -0,0 +1,221 @@
+"""Figures of the EDA and evaluation scripts, rendered in worker processes.
+
+Each ``render_*`` function draws one figure from precomputed data (a
+correlation matrix, per-class density curves, confusion matrix counts, ROC
+points) and saves it, so it can run in another process while the calling
+script carries on with its metrics. ``FigureRenderer`` sends them to a
+process pool whose workers use matplotlib's non-interactive Agg backend, and
+records the wall time of every figure (also in the ``--profile`` trace, see
+``src/profiling.py``). Plotting libraries are only imported
+by the functions that draw, so the scripts themselves never import them.
+"""
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.profiling import phase, record
+
+
+def _use_agg():
+    # pyplot is imported up front so that figure times do not include it
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot
+
+
+def _timed(render, args, kwargs):
+    start = time.perf_counter()
+    render(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+class FigureRenderer:
+    """
+    Render figures in a pool of processes while the caller keeps working.
+
+    Parameters
+    ----------
+    max_workers : int
+        Number of worker processes. With 0, every figure is rendered in the
+        calling process as soon as it is submitted.
+
+    Examples
+    --------
+    >>> with FigureRenderer(2) as renderer:
+    ...     renderer.submit("roc_curves", render_roc_curves, curves, path)
+    ...     # compute metrics here
+    >>> renderer.times  # seconds each figure took
+    """
+
+    def __init__(self, max_workers=2):
+        self._pool = ProcessPoolExecutor(max_workers, initializer=_use_agg) if max_workers > 0 else None
+        self._futures = {}
+        self._submitted = {}
+        self.times = {}
+
+    def submit(self, name, render, *args, **kwargs):
+        """
+        Render a figure with ``render(*args, **kwargs)``; ``name`` labels its
+        time. ``render`` and its arguments must be picklable.
+        """
+        if self._pool is None:
+            _use_agg()
+            with phase(f"render {name}"):
+                self.times[name] = _timed(render, args, kwargs)
+        else:
+            self._submitted[name] = time.perf_counter()
+            self._futures[name] = self._pool.submit(_timed, render, args, kwargs)
+
+    def wait(self):
+        """
+        Wait for every submitted figure and return the seconds each took to
+        render. Raises the first error of a failed figure.
+        """
+        for name, future in self._futures.items():
+            self.times[name] = future.result()
+            record(f"render {name}", self.times[name], start=self._submitted[name], track="figure workers")
+        self._futures = {}
+        return self.times
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.wait()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=exc_type is not None)
+        return False
+
+
+def render_correlation_heatmap(corr_matrix, path):
+    """
+    Save the heatmap of the feature correlation matrix.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(
+        corr_matrix,
+        annot=True,
+        fmt=".2f",
+        cmap="viridis",
+        square=True,
+        cbar_kws={"label": "Correlation"}
+    )
+    plt.title("Correlation heatmap of maternal health features")
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def draw_densities(ax, feature, densities, levels, hue="RiskLevel"):
+    """
+    Draw per-class density curves (``src.density.class_densities``) on
+    ``ax`` with the artists, colours and legend of
+    ``sns.kdeplot(x=feature, hue=hue, fill=True, alpha=0.4)``.
+    """
+    import seaborn as sns
+    from matplotlib.colors import to_rgba
+    from matplotlib.patches import Patch
+
+    colors = dict(zip(levels, sns.color_palette(n_colors=len(levels))))
+    for level in reversed(levels):
+        if level not in densities:
+            continue
+        support, density = densities[level]
+        artist = ax.fill_between(
+            support, 0, density,
+            facecolor=to_rgba(colors[level], 0.4),
+            edgecolor=to_rgba(colors[level], 1),
+        )
+        artist.sticky_edges.y[:] = (0, np.inf)
+    ax.set_xlabel(feature)
+    ax.set_ylabel("Density")
+    handles = [
+        Patch(facecolor=to_rgba(colors[level], 0.4), edgecolor=to_rgba(colors[level], 1))
+        for level in levels
+    ]
+    ax.legend(handles, levels, title=hue)
+
+
+def render_density_grid(features, path, densities=None, levels=None, data=None):
+    """
+    Save the grid of per-class feature densities, three panels per row.
+
+    Draws the precomputed ``densities`` (feature to ``class_densities``
+    result, with the class order ``levels``) or, if ``data`` is given
+    instead, runs ``sns.kdeplot`` on its rows.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    cols = 3
+    rows = math.ceil(len(features) / cols)
+    fig, axes = plt.subplots(rows, cols, figsize=(12, 4 * rows), squeeze=False)
+    for idx, feature in enumerate(features):
+        r, c = divmod(idx, cols)
+        ax = axes[r][c]
+        if data is None:
+            draw_densities(ax, feature, densities[feature], levels)
+        else:
+            sns.kdeplot(
+                data=data,
+                x=feature,
+                hue="RiskLevel",
+                fill=True,
+                alpha=0.4,
+                ax=ax
+            )
+        ax.set_title(f"{feature} distribution by RiskLevel")
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def render_confusion_matrix(matrix, labels, path):
+    """
+    Save the confusion matrix figure from its counts (true labels in rows).
+    """
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import ConfusionMatrixDisplay
+
+    fig, ax = plt.subplots(figsize=(6, 5))
+    ConfusionMatrixDisplay(matrix, display_labels=labels).plot(
+        cmap="Blues",
+        ax=ax,
+        colorbar=True,
+    )
+    ax.set_title("Confusion Matrix – Maternal Health Risk Classifier")
+    fig.tight_layout()
+    fig.savefig(path, dpi=300)
+    plt.close(fig)
+
+
+def render_roc_curves(curves, path):
+    """
+    Save the One-vs-Rest ROC curve figure.
+
+    ``curves`` maps each class to its ``(fpr, tpr, auc)``; every curve is
+    labelled with its AUC.
+    """
+    import matplotlib.pyplot as plt
+    from sklearn.metrics import RocCurveDisplay
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    for class_name, (fpr, tpr, auc) in curves.items():
+        RocCurveDisplay(
+            fpr=fpr,
+            tpr=tpr,
+            roc_auc=auc,
+            name=f"{class_name} (AUC={auc:.3f})",
+            pos_label=1,
+        ).plot(ax=ax)
+
+    plt.title("One-vs-Rest ROC Curves for Maternal Health Risk Classification")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
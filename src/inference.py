@@ -0,0 +1,106 @@
+"""Helpers for loading the fitted classifier and scoring maternal health records."""
+
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from src.model_artifact import load_model_artifact
+
+
+def load_pipeline(pipeline_from):
+    """
+    Load the fitted classification pipeline from a pickle file.
+
+    Parameters
+    ----------
+    pipeline_from : str
+        Path to the pickle written by ``fit_maternal_health_risk_classifier.py``.
+        Either a fitted search object (e.g. ``RandomizedSearchCV``), in which
+        case its ``best_estimator_`` is returned, or a fitted pipeline.
+
+    Returns
+    -------
+    sklearn.pipeline.Pipeline
+        The fitted pipeline.
+    """
+    with open(pipeline_from, 'rb') as f:
+        model = pickle.load(f)
+    return getattr(model, 'best_estimator_', model)
+
+
+def load_model(model_from):
+    """
+    Load a model for scoring from either a model artifact or a pickle.
+
+    Parameters
+    ----------
+    model_from : str
+        Path to a model artifact directory (see ``src.model_artifact``), whose
+        arrays are memory-mapped, or to a pickled pipeline/search object.
+
+    Returns
+    -------
+    CompiledSVCScorer or sklearn.pipeline.Pipeline
+        A fitted model exposing ``decision_function``, ``classes_`` and
+        ``feature_names_in_``.
+    """
+    if os.path.isdir(model_from):
+        return load_model_artifact(model_from)
+    return load_pipeline(model_from)
+
+
+def predict_from_decision(y_score, classes):
+    """
+    Recover ``SVC.predict`` labels from one-vs-rest decision scores.
+
+    The one-vs-rest decision function of a multiclass ``SVC`` is the number
+    of one-vs-one votes per class plus a tie-breaking confidence term in
+    (-1/3, 1/3). Rounding recovers the votes, and taking the first class with
+    the most votes reproduces libsvm's prediction, so the model does not need
+    to be evaluated a second time.
+
+    Parameters
+    ----------
+    y_score : numpy.ndarray of shape (n_samples, n_classes)
+        Output of ``decision_function``.
+    classes : numpy.ndarray of shape (n_classes,)
+        Class labels in the column order of ``y_score``.
+
+    Returns
+    -------
+    numpy.ndarray of shape (n_samples,)
+        Predicted class labels.
+    """
+    return np.asarray(classes)[np.rint(y_score).argmax(axis=1)]
+
+
+def decision_columns(classes):
+    """
+    Column names used for per-class decision scores in prediction outputs.
+    """
+    return [f"decision_{c.replace(' ', '_')}" for c in classes]
+
+
+def score_records(pipeline, X):
+    """
+    Score records and return predictions and decision scores as a DataFrame.
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline or CompiledSVCScorer
+        Fitted model exposing ``decision_function``.
+    X : pandas.DataFrame
+        Records containing (at least) the feature columns the pipeline was
+        fitted on.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per input record with a ``predicted_risk_level`` column and
+        one ``decision_<class>`` column per risk level.
+    """
+    classes = pipeline.classes_
+    y_score = pipeline.decision_function(X[pipeline.feature_names_in_])
+    scores = pd.DataFrame(y_score, columns=decision_columns(classes))
+    scores.insert(0, "predicted_risk_level", predict_from_decision(y_score, classes))
+    return scores
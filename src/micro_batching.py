@@ -0,0 +1,166 @@
+"""Request micro-batching and latency accounting for the inference server."""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Merge concurrently submitted scoring requests into single batched calls.
+
+    Requests are queued by the caller threads and a single background thread
+    drains the queue: it waits for the first request, then keeps collecting
+    requests until either the next one would take the batch over
+    ``max_batch_size`` records (it then starts the next batch) or
+    ``max_wait`` seconds have passed since the first one arrived. The merged
+    batch is scored with one call to ``score_fn`` and each request receives
+    its own slice of the result. If that call fails, every request of the
+    batch is scored again on its own, so only the failing requests get the
+    exception.
+
+    Parameters
+    ----------
+    score_fn : callable
+        Function taking a list of records (dicts) and returning a sequence of
+        per-record results of the same length.
+    max_batch_size : int
+        Maximum number of records scored in one call. A single request larger
+        than this is scored on its own.
+    max_wait : float
+        Maximum time in seconds to wait for more requests after the first
+        request of a batch arrives.
+    stats : LatencyStats, optional
+        Collector that receives the size of every scored batch.
+    """
+
+    def __init__(self, score_fn, max_batch_size=256, max_wait=0.005, stats=None):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = stats
+        self._queue = queue.Queue()
+        # a request that did not fit in the last batch, to start the next one
+        self._pending = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """
+        Queue a list of records for scoring and return a ``Future`` that
+        resolves to the list of per-record results.
+        """
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def _collect(self):
+        item, self._pending = self._pending, None
+        batch = [item if item is not None else self._queue.get()]
+        n_records = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_records < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if n_records + len(item[0]) > self.max_batch_size:
+                self._pending = item
+                break
+            batch.append(item)
+            n_records += len(item[0])
+        return batch, n_records
+
+    def _run(self):
+        while True:
+            batch, n_records = self._collect()
+            records = [record for request, _ in batch for record in request]
+            try:
+                results = self.score_fn(records)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    self._run_separately(batch)
+                continue
+            if self.stats is not None:
+                self.stats.record_batch(n_records)
+            start = 0
+            for request, future in batch:
+                future.set_result(results[start:start + len(request)])
+                start += len(request)
+
+    def _run_separately(self, batch):
+        for request, future in batch:
+            try:
+                results = self.score_fn(request)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if self.stats is not None:
+                self.stats.record_batch(len(request))
+            future.set_result(results)
+
+
+class LatencyStats:
+    """
+    Thread-safe request latency and throughput counters.
+
+    Latencies are kept for the most recent ``window`` requests and used to
+    report p50/p99; request, record and batch counts are cumulative.
+    """
+
+    def __init__(self, window=10_000):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.n_requests = 0
+        self.n_records = 0
+        self.n_batches = 0
+        self.n_batched_records = 0
+        self.n_errors = 0
+
+    def record_request(self, latency, n_records):
+        with self._lock:
+            self._latencies.append(latency)
+            self.n_requests += 1
+            self.n_records += n_records
+
+    def record_error(self):
+        with self._lock:
+            self.n_errors += 1
+
+    def record_batch(self, n_records):
+        with self._lock:
+            self.n_batches += 1
+            self.n_batched_records += n_records
+
+    def summary(self):
+        """
+        Return the current counters as a JSON-serializable dict.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies)
+            uptime = time.perf_counter() - self._started
+            n_requests, n_records = self.n_requests, self.n_records
+            n_batches, n_errors = self.n_batches, self.n_errors
+            n_batched_records = self.n_batched_records
+        p50, p99 = (np.percentile(latencies, [50, 99]) * 1000 if latencies.size else (None, None))
+        return {
+            "requests": n_requests,
+            "records": n_records,
+            "batches": n_batches,
+            "errors": n_errors,
+            "mean_batch_size": n_batched_records / n_batches if n_batches else None,
+            "latency_p50_ms": None if p50 is None else float(p50),
+            "latency_p99_ms": None if p99 is None else float(p99),
+            "uptime_s": uptime,
+            "requests_per_s": n_requests / uptime,
+            "records_per_s": n_records / uptime,
+        }
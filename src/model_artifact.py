@@ -0,0 +1,150 @@
+"""Versioned, memory-mappable model artifact for the compiled SVC scorer.
+
+An artifact is a directory holding one raw ``.npy`` file per inference array
+plus a ``manifest.json`` describing the format version, feature order,
+classes, hyperparameters and a hash of the training data. Arrays are opened
+with ``mmap_mode="r"`` by default, so loading takes milliseconds and several
+scoring processes on one host share the same pages of the page cache.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from src.compiled_scorer import CompiledSVCScorer, compile_pipeline
+
+ARTIFACT_FORMAT = "maternal-risk-svc"
+ARTIFACT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+ARRAY_NAMES = ["feature_weight", "support_vectors", "support_sq_norms", "pair_coef", "intercept"]
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    SHA-256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_model_artifact(scorer, artifact_to, data_sha256=None, params=None):
+    """
+    Write a compiled scorer as a versioned artifact directory.
+
+    Parameters
+    ----------
+    scorer : CompiledSVCScorer
+        Scorer returned by ``compile_pipeline``.
+    artifact_to : str
+        Artifact directory. It will be created if it does not exist; existing
+        files of the same name are overwritten.
+    data_sha256 : str, optional
+        Hash of the training data the model was fitted on.
+    params : dict, optional
+        Selected hyperparameters, recorded in the manifest for reference.
+
+    Returns
+    -------
+    dict
+        The manifest that was written.
+    """
+    os.makedirs(artifact_to, exist_ok=True)
+    arrays = {}
+    for name in ARRAY_NAMES:
+        # C-contiguous float64 so the files can be memory-mapped as-is
+        array = np.ascontiguousarray(getattr(scorer, name), dtype=np.float64)
+        file_name = f"{name}.npy"
+        np.save(os.path.join(artifact_to, file_name), array)
+        arrays[name] = {"file": file_name, "dtype": str(array.dtype), "shape": list(array.shape)}
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "feature_names": list(scorer.feature_names),
+        "classes": [str(c) for c in scorer.classes_],
+        "params": params or {},
+        "data_sha256": data_sha256,
+        "arrays": arrays,
+    }
+    with open(os.path.join(artifact_to, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(artifact_from):
+    """
+    Read and check the manifest of an artifact directory.
+
+    Raises
+    ------
+    ValueError
+        If the manifest is not a supported artifact format or version.
+    """
+    with open(os.path.join(artifact_from, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError("Not a maternal risk model artifact.")
+    if manifest.get("version") != ARTIFACT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact version {manifest.get('version')} "
+            f"(expected {ARTIFACT_VERSION})."
+        )
+    return manifest
+
+
+def load_model_artifact(artifact_from, mmap_mode="r"):
+    """
+    Load a compiled scorer from an artifact directory.
+
+    Parameters
+    ----------
+    artifact_from : str
+        Artifact directory written by ``save_model_artifact``.
+    mmap_mode : str or None
+        Passed to ``numpy.load``. The default ``"r"`` memory-maps the arrays
+        read-only; ``None`` reads them into memory.
+
+    Returns
+    -------
+    CompiledSVCScorer
+        The scorer.
+
+    Raises
+    ------
+    ValueError
+        If the manifest is unsupported or an array does not match it.
+    """
+    manifest = read_manifest(artifact_from)
+    arrays = {}
+    for name in ARRAY_NAMES:
+        spec = manifest["arrays"][name]
+        array = np.load(os.path.join(artifact_from, spec["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+        if list(array.shape) != spec["shape"] or str(array.dtype) != spec["dtype"]:
+            raise ValueError(f"Array '{name}' does not match the artifact manifest.")
+        arrays[name] = array
+    return CompiledSVCScorer(
+        feature_names=manifest["feature_names"],
+        classes=manifest["classes"],
+        **arrays,
+    )
+
+
+def save_search_artifact(search, artifact_to, training_data):
+    """
+    Compile the best pipeline of a fitted hyperparameter search and save it
+    as an artifact, recording the selected C/gamma (and number of Nystroem
+    components) and the training data hash.
+    """
+    svc = search.best_estimator_[-1]
+    params = {"C": float(svc.C), "gamma": float(svc._gamma)}
+    if hasattr(svc, "nystroem_"):
+        params["n_components"] = len(svc.nystroem_.components_)
+    return save_model_artifact(
+        compile_pipeline(search.best_estimator_),
+        artifact_to,
+        data_sha256=file_sha256(training_data),
+        params=params,
+    )
@@ -0,0 +1,242 @@
+"""Content-hashed, parallel runner for the analysis pipeline.
+
+Each ``Stage`` declares the files it reads, the source files that define it,
+its command-line parameters and the files it writes. A stage's cache key is a
+SHA-256 over all of those inputs, so file timestamps (a ``git checkout``, a
+touched CSV) never trigger a rebuild: a stage is skipped when its key matches
+the one recorded after its last successful run and its outputs still have the
+recorded contents. Stages whose dependencies are done run concurrently.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.model_artifact import file_sha256
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    Parameters
+    ----------
+    name : str
+        Unique stage name.
+    command : list of str
+        Command to run (without the parameters).
+    params : dict
+        Command-line options, passed as ``--<key>=<value>`` (``True`` passes
+        the flag ``--<key>``, ``False`` leaves it out); part of the key.
+    sources : list of str
+        Files defining the stage (its script and the ``src`` modules it uses).
+    inputs : list of str
+        Data files the stage reads.
+    outputs : list of str
+        Files the stage writes.
+    deps : list of str
+        Names of stages that must finish first.
+    """
+
+    def __init__(self, name, command, params=None, sources=(), inputs=(), outputs=(), deps=()):
+        self.name = name
+        self.command = list(command)
+        self.params = dict(params or {})
+        self.sources = list(sources)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+
+    def argv(self):
+        """
+        Full command line of the stage.
+        """
+        return self.command + [
+            f"--{key}" if value is True else f"--{key}={value}"
+            for key, value in self.params.items()
+            if value is not False
+        ]
+
+    def cache_key(self):
+        """
+        SHA-256 over the command, parameters and the contents of the source
+        and input files.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.command, self.params], sort_keys=True).encode())
+        for path in self.sources + self.inputs:
+            digest.update(path.encode())
+            digest.update(file_sha256(path).encode() if os.path.exists(path) else b"missing")
+        return digest.hexdigest()
+
+
+def source_closure(script, root="."):
+    """
+    The script and every ``src`` module it imports, directly or through other
+    ``src`` modules (imports inside functions included), as paths relative to
+    ``root``; the ``sources`` of a stage running ``script``.
+    """
+    sources, pending = [script], [script]
+    while pending:
+        with open(os.path.join(root, pending.pop())) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for module in modules:
+                path = module.replace(".", "/") + ".py"
+                if module.startswith("src.") and path not in sources and os.path.isfile(os.path.join(root, path)):
+                    sources.append(path)
+                    pending.append(path)
+    return [script] + sorted(sources[1:])
+
+
+def output_hashes(stage):
+    """
+    Hashes of a stage's outputs, or None if any output is missing.
+    """
+    if not all(os.path.isfile(path) for path in stage.outputs):
+        return None
+    return {path: file_sha256(path) for path in stage.outputs}
+
+
+def _run_stage(stage, log_dir):
+    """
+    Run one stage as a subprocess, writing its stdout/stderr to
+    ``<log_dir>/<name>.log``. Returns (return code, wall seconds).
+    """
+    start = time.perf_counter()
+    with open(os.path.join(log_dir, f"{stage.name}.log"), "w") as log:
+        returncode = subprocess.call(stage.argv(), stdout=log, stderr=subprocess.STDOUT)
+    return returncode, time.perf_counter() - start
+
+
+def select_stages(stages, targets=None):
+    """
+    The stages needed for ``targets`` (all stages if None), in definition order.
+
+    Raises
+    ------
+    ValueError
+        If a target or dependency is not a known stage.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    needed = set()
+    pending = list(targets or by_name)
+    while pending:
+        name = pending.pop()
+        if name not in by_name:
+            raise ValueError(f"Unknown stage '{name}'; expected one of {list(by_name)}.")
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in needed]
+
+
+def run_pipeline(stages, cache_dir=".pipeline_cache", max_workers=2, force=False, echo=print):
+    """
+    Run stages in dependency order, skipping cache hits.
+
+    A stage is started as soon as all its dependencies have finished, so
+    independent stages run concurrently (up to ``max_workers`` at a time).
+    Its cache key is computed at that point, from the inputs its
+    dependencies have just written. After a successful run the key and the
+    output hashes are recorded in ``<cache_dir>/<name>.json``. If a stage
+    fails, its dependents are not started; stages already running finish.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        Stages to run; every dependency must be in the list.
+    cache_dir : str
+        Directory holding the per-stage cache records and logs.
+    max_workers : int
+        Maximum number of stages running at the same time.
+    force : bool
+        Rerun every stage regardless of the cache.
+    echo : callable
+        Called with a progress message for every stage that starts or ends.
+
+    Returns
+    -------
+    list of dict
+        One record per stage with its ``stage`` name, ``status`` (``"ran"``,
+        ``"cached"``, ``"failed"`` or ``"skipped"``), and ``seconds`` of
+        wall time, in definition order.
+
+    Raises
+    ------
+    ValueError
+        If a stage depends on a stage that is not in ``stages``.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    order = [stage.name for stage in stages]
+    remaining = {stage.name: stage for stage in stages}
+    status = {}
+    seconds = {}
+    running = {}
+
+    def record_path(stage):
+        return os.path.join(cache_dir, f"{stage.name}.json")
+
+    def is_cached(stage, key):
+        if force or not os.path.exists(record_path(stage)):
+            return False
+        with open(record_path(stage)) as f:
+            record = json.load(f)
+        return record["key"] == key and record["outputs"] == output_hashes(stage)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while remaining or running:
+            # start every stage whose dependencies are done
+            progressed = False
+            for name in list(remaining):
+                stage = remaining[name]
+                if any(status.get(dep) in ("failed", "skipped") for dep in stage.deps):
+                    status[name], seconds[name] = "skipped", 0.0
+                    del remaining[name]
+                    progressed = True
+                    continue
+                if not all(status.get(dep) in ("ran", "cached") for dep in stage.deps):
+                    continue
+                del remaining[name]
+                progressed = True
+                start = time.perf_counter()
+                key = stage.cache_key()
+                if is_cached(stage, key):
+                    status[name], seconds[name] = "cached", time.perf_counter() - start
+                    echo(f"[cached]  {name}")
+                    continue
+                echo(f"[start]   {name}")
+                running[pool.submit(_run_stage, stage, cache_dir)] = (stage, key)
+            if not running:
+                if not progressed:
+                    raise ValueError(f"Stages {list(remaining)} depend on stages that are not in the pipeline.")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                returncode, seconds[stage.name] = future.result()
+                if returncode == 0:
+                    status[stage.name] = "ran"
+                    with open(record_path(stage), "w") as f:
+                        json.dump({"key": key, "outputs": output_hashes(stage)}, f, indent=2)
+                    echo(f"[done]    {stage.name} ({seconds[stage.name]:.1f}s)")
+                else:
+                    status[stage.name] = "failed"
+                    if os.path.exists(record_path(stage)):
+                        os.remove(record_path(stage))
+                    echo(
+                        f"[failed]  {stage.name} (exit code {returncode}); "
+                        f"see {os.path.join(cache_dir, stage.name + '.log')}"
+                    )
+
+    return [{"stage": name, "status": status[name], "seconds": seconds[name]} for name in order]
@@ -0,0 +1,205 @@
+"""Named-phase instrumentation shared by the scripts, written as a trace.
+
+A script decorated with ``profiled`` takes a ``--profile`` flag. When it is
+set, every ``phase`` entered while the script runs records its wall time,
+CPU time (of this process), the peak of memory allocated by Python while it
+ran (``tracemalloc``) and the peak resident set size of the process so far.
+Phases nest. At exit, even after an error, the phases are written as a Chrome
+trace (``chrome://tracing`` or https://ui.perfetto.dev open it), with the
+measurements in each event's ``args``. ``utils/compare_profiles.py`` compares
+two traces.
+
+Without ``--profile``, ``phase`` does nothing and ``tracemalloc`` is not
+started, so the scripts run as before. With it, tracing allocations slows
+allocation-heavy phases down somewhat; compare profiled runs with profiled
+runs. Work done in other processes (figure workers, joblib workers) counts
+towards wall time only; durations measured there can be added with
+``record``.
+"""
+
+import functools
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+PROFILE_DIR = "results/profiles"
+
+_active = None
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class Profiler:
+    """
+    Records named phases as Chrome trace events.
+
+    Parameters
+    ----------
+    name : str
+        Name of the traced process (usually the script).
+    trace_memory : bool
+        Also record the ``tracemalloc`` peak of every phase.
+
+    Examples
+    --------
+    >>> profiler = Profiler("fit")
+    >>> with profiler.phase("pickle load", path=path):
+    ...     model = pickle.load(f)
+    >>> profiler.write("fit.json")
+    """
+
+    def __init__(self, name, trace_memory=True):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.events = []
+        self._origin = time.perf_counter()
+        self._stack = []
+        self._tracks = {"main": 0}
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def phase(self, name, **args):
+        """
+        Measure the enclosed block as phase ``name``; ``args`` (e.g. a path
+        or a number of rows) are stored with it.
+        """
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # fold the peak so far into the enclosing phase before resetting it
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frame = {"peak": 0}
+        self._stack.append(frame)
+        start_us, start_cpu = self._now_us(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_us, cpu = self._now_us() - start_us, time.process_time() - start_cpu
+            self._stack.pop()
+            event_args = {"cpu_s": cpu, "peak_rss_mb": _peak_rss_mb(), **args}
+            if self.trace_memory:
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+                event_args["traced_peak_mb"] = peak / 2 ** 20
+            self.events.append({"name": name, "ph": "X", "ts": start_us, "dur": wall_us,
+                                "pid": os.getpid(), "tid": 0, "args": event_args})
+
+    def record(self, name, seconds, start=None, track="measured elsewhere", **args):
+        """
+        Add a phase measured outside this process (a figure worker, a search
+        candidate's fits), ``seconds`` long. Such phases are drawn on their
+        own ``track``, one after the other from ``start`` (a ``perf_counter``
+        value; default: the end of the track's last phase).
+        """
+        tid = self._tracks.setdefault(track, len(self._tracks))
+        if start is not None:
+            start_us = (start - self._origin) * 1e6
+        else:
+            ends = [e["ts"] + e["dur"] for e in self.events if e["tid"] == tid]
+            start_us = max(ends) if ends else self._now_us()
+        self.events.append({"name": name, "ph": "X", "ts": start_us, "dur": seconds * 1e6,
+                            "pid": os.getpid(), "tid": tid, "args": {"track": track, **args}})
+
+    def trace(self):
+        """
+        The Chrome trace of the phases recorded so far.
+        """
+        metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0,
+                     "args": {"name": self.name}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                      "args": {"name": track}} for track, tid in self._tracks.items()]
+        return {
+            "traceEvents": metadata + sorted(self.events, key=lambda e: (e["tid"], e["ts"])),
+            "displayTimeUnit": "ms",
+            "otherData": {"script": self.name, "argv": sys.argv, "python": sys.version.split()[0],
+                          "peak_rss_mb": _peak_rss_mb()},
+        }
+
+    def write(self, path):
+        """
+        Write the trace to ``path`` as JSON.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.trace(), f, indent=1)
+
+
+def phase(name, **args):
+    """
+    ``Profiler.phase`` of the active profiler; does nothing if there is none.
+    """
+    return nullcontext() if _active is None else _active.phase(name, **args)
+
+
+def record(name, seconds, **kwargs):
+    """
+    ``Profiler.record`` of the active profiler; does nothing if there is none.
+    """
+    if _active is not None:
+        _active.record(name, seconds, **kwargs)
+
+
+def record_search(search, start=None):
+    """
+    Record every candidate of a fitted search, with its fit and score time
+    summed over the cross-validation splits (from ``cv_results_``; the fits
+    may have run in parallel in other processes), from ``start`` on.
+    """
+    if _active is None:
+        return
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    for i, params in enumerate(results["params"]):
+        seconds = (results["mean_fit_time"][i] + results["mean_score_time"][i]) * n_splits
+        args = {name.split("__")[-1]: value for name, value in params.items()}
+        if "iter" in results:
+            args["iter"] = int(results["iter"][i])
+        _active.record(f"candidate {i}", float(seconds), start=start if i == 0 else None,
+                       track="search candidates (fit + score time)", mean_test_score=float(results["mean_test_score"][i]), **args)
+
+
+def default_profile_path(script):
+    """
+    ``results/profiles/<script>-<date>-<time>.json``.
+    """
+    return os.path.join(PROFILE_DIR, f"{script}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+def profiled(script):
+    """
+    Decorator for a click ``main`` with the ``--profile`` flag and the
+    ``--profile-to`` option: with the flag, the call runs under a
+    ``Profiler`` (as phase ``script``) and the trace is written to
+    ``profile_to`` (default: ``default_profile_path(script)``).
+    """
+    def decorate(main):
+        @functools.wraps(main)
+        def wrapper(*args, profile=False, profile_to=None, **kwargs):
+            global _active
+            if not profile:
+                return main(*args, **kwargs)
+            path = os.path.abspath(profile_to or default_profile_path(script))
+            _active = Profiler(script)
+            try:
+                with _active.phase(script):
+                    return main(*args, **kwargs)
+            finally:
+                _active.write(path)
+                _active = None
+                print(f"profile written to {path}", file=sys.stderr)
+        return wrapper
+    return decorate
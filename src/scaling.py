@@ -0,0 +1,86 @@
+"""Fitting the preprocessor and writing scaled tables chunk by chunk.
+
+``split_preprocess_data.py`` fits its ``ColumnTransformer`` (a
+``StandardScaler`` on the numeric features) on the whole training table and
+builds both scaled tables in memory. ``fit_in_chunks`` fits the same
+preprocessor on an iterable of chunks instead: the first chunk fits the
+column transformer, which fixes the columns and feature names, and every
+later chunk updates the scaler's statistics with ``partial_fit``, which
+merges the chunk's count, mean and variance into the running ones
+(the pairwise update of Chan, Golub and LeVeque). The result equals the
+in-memory fit up to floating-point rounding. ``scale_table`` then transforms
+a table and writes it one chunk at a time, so memory is bounded by the
+chunk size.
+"""
+
+import pandas as pd
+from src.data_io import TableWriter, arrow_schema, iter_table, table_format
+from src.schema import COMPACT_DTYPES, SCALED_DTYPES, apply_dtypes, model_features
+
+
+def fit_in_chunks(preprocessor, chunks, label="RiskLevel"):
+    """
+    Fit a column transformer on an iterable of DataFrame chunks.
+
+    Parameters
+    ----------
+    preprocessor : sklearn.compose.ColumnTransformer
+        Unfitted transformer whose transformers all have ``partial_fit``.
+    chunks : iterable of pandas.DataFrame
+        Training rows, with the ``label`` column (which is dropped).
+    label : str
+        Name of the target column.
+
+    Returns
+    -------
+    sklearn.compose.ColumnTransformer
+        ``preprocessor``, fitted.
+
+    Raises
+    ------
+    ValueError
+        If there are no rows, or a transformer has no ``partial_fit``.
+    """
+    fitted = False
+    for chunk in chunks:
+        X = model_features(chunk.drop(columns=[label]))
+        if len(X) == 0:
+            continue
+        if not fitted:
+            preprocessor.fit(X)
+            fitted = True
+            continue
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer in ("drop", "passthrough") or len(columns) == 0:
+                continue
+            if not hasattr(transformer, "partial_fit"):
+                raise ValueError(f"Transformer '{name}' cannot be fitted in chunks.")
+            transformer.partial_fit(X[columns])
+    if not fitted:
+        raise ValueError("No training rows to fit the preprocessor on.")
+    return preprocessor
+
+
+def scaled_frame(preprocessor, data, label="RiskLevel"):
+    """
+    The scaled features of ``data`` with its ``label`` column, in
+    ``SCALED_DTYPES``.
+    """
+    scaled = pd.DataFrame(preprocessor.transform(model_features(data.drop(columns=[label]))),
+                          columns=preprocessor.get_feature_names_out())
+    scaled[label] = data[label].to_numpy()
+    return apply_dtypes(scaled, SCALED_DTYPES)
+
+
+def scale_table(preprocessor, source, destination, chunk_size=100_000):
+    """
+    Write ``scaled_frame`` of the table at ``source`` to ``destination``,
+    ``chunk_size`` rows at a time. Returns the number of rows written.
+    """
+    schema = None if table_format(destination) == "csv" else arrow_schema(SCALED_DTYPES)
+    n_rows = 0
+    with TableWriter(destination, schema) as writer:
+        for chunk in iter_table(source, chunk_size, dtypes=COMPACT_DTYPES):
+            writer.write(scaled_frame(preprocessor, chunk))
+            n_rows += len(chunk)
+    return n_rows
@@ -0,0 +1,191 @@
+"""Columns, valid ranges and in-memory dtypes of the maternal health risk data.
+
+The valid range of every feature (checked by ``src.validation``) also decides
+how it is stored once validated: integer features use the smallest integer
+type of at least 16 bits that holds their range, float features stay float64
+(float32 does not hold their decimal values exactly, which changes the fitted
+model) and RiskLevel is a categorical over ``RISK_LEVELS``. Integer features
+with missing values (up to 5% are valid) are stored as float32 instead, which
+holds every integer of their range exactly. These dtypes are for storage and
+memory only: the preprocessor and the classifier are fitted and applied on
+float64 features (``model_features``), so the fitted model and its scores do
+not depend on how the tables are stored. This module only needs
+NumPy and pandas, so scripts that read validated tables can use it without
+importing pandera.
+"""
+
+import numpy as np
+import pandas as pd
+
+EXPECTED_COLUMNS = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate", "RiskLevel"]
+FEATURE_COLS = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate"]
+RISK_LEVELS = ["low risk", "mid risk", "high risk"]
+
+# column type and valid (inclusive) range of every feature
+FEATURE_RANGES = {
+    "Age": (int, 10, 65),
+    "SystolicBP": (int, 60, 200),
+    "DiastolicBP": (int, 40, 140),
+    "BS": (float, 1.0, 25.0),
+    "BodyTemp": (float, 95.0, 105.0),
+    "HeartRate": (int, 50, 150),
+}
+
+RISK_LEVEL_DTYPE = pd.CategoricalDtype(RISK_LEVELS, ordered=True)
+
+
+def compact_dtype(dtype, low, high):
+    """
+    The smallest dtype holding every value of a feature with the given type
+    and valid range exactly. Integers get at least 16 bits, so sums and
+    differences of a few values do not overflow; floats stay float64.
+    """
+    if dtype is float:
+        return np.dtype(np.float64)
+    for candidate in (np.int16, np.int32, np.int64):
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            return np.dtype(candidate)
+    raise ValueError(f"No integer dtype holds the range [{low}, {high}].")
+
+
+# dtypes of the validated data and the train/test splits
+COMPACT_DTYPES = {
+    **{name: compact_dtype(*FEATURE_RANGES[name]) for name in FEATURE_COLS},
+    "RiskLevel": RISK_LEVEL_DTYPE,
+}
+
+# dtypes of the scaled train/test splits: the preprocessor's float64 output
+SCALED_DTYPES = {
+    **{name: np.dtype(np.float64) for name in FEATURE_COLS},
+    "RiskLevel": RISK_LEVEL_DTYPE,
+}
+
+
+def apply_dtypes(data, dtypes=COMPACT_DTYPES):
+    """
+    Cast the columns of ``data`` that appear in ``dtypes``.
+
+    Integer columns with missing values are cast to float32 instead.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Table to cast; columns not in ``dtypes`` are left as they are.
+    dtypes : dict
+        Column name to dtype, e.g. ``COMPACT_DTYPES``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        ``data`` itself if no column needs casting, otherwise a copy.
+
+    Raises
+    ------
+    ValueError
+        If a value changes when cast: a non-integer or out-of-range value in
+        an integer column, or a RiskLevel that is not one of ``RISK_LEVELS``.
+    """
+    converted = {}
+    for name, dtype in dtypes.items():
+        if name not in data.columns or data[name].dtype == dtype:
+            continue
+        column = data[name]
+        categorical = isinstance(dtype, pd.CategoricalDtype)
+        integer = not categorical and np.issubdtype(dtype, np.integer)
+        if not categorical and column.dtype == object:
+            # numbers read as text, e.g. from a column that also held non-numeric cells
+            try:
+                column = pd.to_numeric(column)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Column '{name}' cannot be stored as {dtype}: {e}") from None
+        if integer and column.isna().any():
+            dtype, integer = np.dtype(np.float32), False
+            if column.dtype == dtype:
+                continue
+        try:
+            cast = column.astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column '{name}' cannot be stored as {dtype}: {e}") from None
+        if categorical:
+            lost = cast.isna() & column.notna()
+        elif integer:
+            lost = cast != column
+        else:
+            lost = None
+        if lost is not None and lost.any():
+            raise ValueError(
+                f"Column '{name}' cannot be stored as {dtype}: value {column[lost].iloc[0]!r} is not representable."
+            )
+        converted[name] = cast
+    return data.assign(**converted) if converted else data
+
+
+def unstorable_values(data, dtypes=COMPACT_DTYPES):
+    """
+    Which values of ``data`` ``apply_dtypes`` cannot store exactly.
+
+    A value is unstorable if it is not a number in a numeric column, not a
+    whole number in the range of an integer column, or not a category of a
+    categorical column. Missing values are storable.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Table to check; columns not in ``dtypes`` are not checked.
+    dtypes : dict
+        Column name to dtype, e.g. ``COMPACT_DTYPES``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Boolean frame with the index of ``data`` and a column for each
+        checked column.
+    """
+    unstorable = {}
+    for name, dtype in dtypes.items():
+        if name not in data.columns:
+            continue
+        column = data[name]
+        if isinstance(dtype, pd.CategoricalDtype):
+            bad = column.notna() & ~column.isin(dtype.categories)
+        else:
+            values = pd.to_numeric(column, errors="coerce")
+            bad = values.isna()
+            if np.issubdtype(dtype, np.integer):
+                info = np.iinfo(dtype)
+                bad |= (values != values.round()) | (values < info.min) | (values > info.max)
+            bad &= column.notna()
+        unstorable[name] = bad.to_numpy(dtype=bool)
+    return pd.DataFrame(unstorable, index=data.index)
+
+
+def model_features(data):
+    """
+    ``data`` with its feature columns cast to float64, the dtype the
+    preprocessor and the classifier are fitted and scored on.
+
+    Integer features convert exactly, so the model sees the same values as
+    from pandas' default int64 and float64 columns. Columns that are not
+    features are left as they are.
+    """
+    columns = [name for name in FEATURE_COLS if name in data.columns and data[name].dtype != np.float64]
+    if not columns:
+        return data
+    return data.astype({name: np.float64 for name in columns})
+
+
+def inferred_dtypes(data):
+    """
+    ``data`` with the dtypes ``pandas.read_csv`` infers for it: int64,
+    float64 and object strings.
+    """
+    wide = {}
+    for name, column in data.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            wide[name] = column.astype(object)
+        elif np.issubdtype(column.dtype, np.integer):
+            wide[name] = column.astype(np.int64)
+        else:
+            wide[name] = column.astype(np.float64)
+    return pd.DataFrame(wide, index=data.index)
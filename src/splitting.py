@@ -0,0 +1,183 @@
+"""Deterministic train/test assignment of rows from a seeded hash of their
+content.
+
+``train_test_split`` needs the whole table in memory and assigns rows by
+their position, so the split changes when rows are added. ``row_uniforms``
+instead hashes every row's values (features rounded to float32, so a value
+hashes the same whatever dtype it is read with, and RiskLevel by its position
+in ``RISK_LEVELS``) together with the seed and maps the hash to a number in
+[0, 1).
+
+``BalancedHashSplit`` goes through the rows in order and keeps, for every
+RiskLevel, the number of rows seen and of rows put in the test set. A row
+goes to the test set if its number is below the test rows its class is
+short of, ``test_size * seen - test`` (counting the row): a class that is a
+row or more short takes the row, one that is not short leaves it in train,
+and in between the row's hash decides. Every class therefore has
+within one row of ``test_size`` of its rows in the test set after every row,
+like ``stratify=``. A row's side only depends on its hash and the rows
+before it, so reading the table in chunks of any size or any format gives
+the same split, and appending rows leaves the side of every earlier row
+unchanged. Unlike a fixed threshold on the hash, identical rows may land on
+different sides, as with ``train_test_split``.
+"""
+
+import numpy as np
+import pandas as pd
+from src.data_io import TableWriter, arrow_schema, iter_table, read_table, table_format
+from src.schema import COMPACT_DTYPES, FEATURE_COLS, RISK_LEVELS
+
+
+def _mix(values):
+    # the splitmix64 finalizer: every input bit affects every output bit
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def row_uniforms(data, seed=123):
+    """
+    A number in [0, 1) for every row of ``data``, from a hash of its feature
+    values and RiskLevel keyed on ``seed``.
+    """
+    features = data[FEATURE_COLS].to_numpy(dtype=np.float32).astype(np.float64)
+    levels = pd.Categorical(data["RiskLevel"].astype(str), categories=RISK_LEVELS).codes
+    canonical = pd.DataFrame(features, columns=FEATURE_COLS).assign(RiskLevel=levels)
+    # pandas only applies its hash key to strings, so the seed is mixed in afterwards
+    hashes = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    hashes = _mix(hashes ^ _mix(np.array([seed % 2 ** 64], dtype=np.uint64)))
+    # the top 53 bits as a double in [0, 1)
+    return (hashes >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+class BalancedHashSplit:
+    """
+    Train/test assignment of consecutive chunks of a table, balanced within
+    every RiskLevel.
+
+    Parameters
+    ----------
+    test_size : float
+        Fraction of the rows of every class in the test set.
+    seed : int
+        Key of the row hashes.
+
+    Attributes
+    ----------
+    seen, test : numpy.ndarray
+        Rows seen and rows put in the test set so far, per class of
+        ``RISK_LEVELS`` (the last entry counts rows of any other label).
+    """
+
+    def __init__(self, test_size=0.3, seed=123):
+        self.test_size = test_size
+        self.seed = seed
+        self.seen = np.zeros(len(RISK_LEVELS) + 1, dtype=np.int64)
+        self.test = np.zeros(len(RISK_LEVELS) + 1, dtype=np.int64)
+
+    def test_mask(self, chunk):
+        """
+        Whether each row of ``chunk``, the next rows of the table, belongs
+        to the test set.
+        """
+        uniforms = row_uniforms(chunk, self.seed).tolist()
+        # labels outside RISK_LEVELS get code -1, which counts in the last entry
+        codes = pd.Categorical(chunk["RiskLevel"].astype(str), categories=RISK_LEVELS).codes.tolist()
+        seen, test = self.seen.tolist(), self.test.tolist()
+        in_test = np.zeros(len(uniforms), dtype=bool)
+        for i, (code, uniform) in enumerate(zip(codes, uniforms)):
+            seen[code] += 1
+            if uniform < self.test_size * seen[code] - test[code]:
+                in_test[i] = True
+                test[code] += 1
+        self.seen[:], self.test[:] = seen, test
+        return in_test
+
+
+def hash_test_mask(data, test_size=0.3, seed=123):
+    """
+    Whether each row of ``data`` belongs to the test set of a
+    ``BalancedHashSplit`` of the whole table.
+    """
+    return BalancedHashSplit(test_size, seed).test_mask(data)
+
+
+def _assigned_chunks(source, test_size, seed, chunk_size):
+    """
+    Every chunk of ``source`` (the whole table if ``chunk_size`` is None)
+    with its test mask, from one ``BalancedHashSplit`` of all the chunks.
+    """
+    chunks = iter_table(source, chunk_size, dtypes=COMPACT_DTYPES) if chunk_size else [
+        read_table(source, dtypes=COMPACT_DTYPES)
+    ]
+    splitter = BalancedHashSplit(test_size, seed)
+    for chunk in chunks:
+        yield chunk, splitter.test_mask(chunk)
+
+
+def _add_counts(counts, chunk, in_test):
+    levels = chunk["RiskLevel"].astype(str)
+    counts["train"] += levels[~in_test].value_counts().reindex(RISK_LEVELS, fill_value=0)
+    counts["test"] += levels[in_test].value_counts().reindex(RISK_LEVELS, fill_value=0)
+
+
+def _empty_counts():
+    return pd.DataFrame(0, index=pd.Index(RISK_LEVELS, name="RiskLevel"), columns=["train", "test"])
+
+
+def hash_split_table(source, train_path, test_path, test_size=0.3, seed=123, chunk_size=None):
+    """
+    Split a table into train and test tables, ``chunk_size`` rows at a time.
+
+    Parameters
+    ----------
+    source : str
+        Path to the validated data (any format).
+    train_path, test_path : str
+        Paths of the train and test tables; their extensions select the
+        format. Rows keep their order and ``COMPACT_DTYPES``.
+    test_size : float
+        Fraction of the rows of every RiskLevel in the test set.
+    seed : int
+        Key of the row hashes.
+    chunk_size : int, optional
+        Rows read and written at a time (default: the whole table at once).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Number of train and test rows of every RiskLevel.
+    """
+    counts = _empty_counts()
+    schemas = [None if table_format(path) == "csv" else arrow_schema(COMPACT_DTYPES) for path in (train_path, test_path)]
+    with TableWriter(train_path, schemas[0]) as train, TableWriter(test_path, schemas[1]) as test:
+        for chunk, in_test in _assigned_chunks(source, test_size, seed, chunk_size):
+            train.write(chunk[~in_test])
+            test.write(chunk[in_test])
+            _add_counts(counts, chunk, in_test)
+    return counts
+
+
+def hash_split_positions(source, test_size=0.3, seed=123, chunk_size=None):
+    """
+    The row positions of the train and test sets of ``hash_split_table``,
+    for ``src.data_io.write_split_index``.
+
+    Returns
+    -------
+    train, test : numpy.ndarray
+        Increasing positions of the train and test rows in ``source``.
+    counts : pandas.DataFrame
+        Number of train and test rows of every RiskLevel.
+    n_rows : int
+        Number of rows of ``source``.
+    """
+    counts = _empty_counts()
+    train, test = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    n_rows = 0
+    for chunk, in_test in _assigned_chunks(source, test_size, seed, chunk_size):
+        train.append(n_rows + np.flatnonzero(~in_test))
+        test.append(n_rows + np.flatnonzero(in_test))
+        _add_counts(counts, chunk, in_test)
+        n_rows += len(chunk)
+    return np.concatenate(train), np.concatenate(test), counts, n_rows
@@ -0,0 +1,152 @@
+"""Synthetic maternal health records with the class-conditional distributions
+of the validated data, for testing the pipeline at sizes the real data does
+not reach.
+
+``class_profiles`` summarises the validated data per RiskLevel: the class
+shares, the feature rows, mean and covariance of every class and the
+resolution the values are recorded at. ``generate_rows`` draws a class for
+every new row from the class shares, copies a random row of that class and
+adds Gaussian noise with the class covariance scaled by Scott's factor (a
+smoothed bootstrap). The result is shrunk towards the class mean so that its
+variance is the class variance again, which keeps each class's means,
+variances and correlations between features. Values are rounded to the
+recorded resolution and clipped to the valid ranges of ``src.schema``, so
+clean rows always pass validation.
+
+A ``duplicate_rate`` fraction of rows is then replaced by copies of other
+rows, and an ``error_rate`` fraction gets one invalid value each (a feature
+above its valid range or an unknown RiskLevel), which ``validate_data.py``
+reports and removes.
+"""
+
+import numpy as np
+import pandas as pd
+from src.schema import EXPECTED_COLUMNS, FEATURE_COLS, FEATURE_RANGES, RISK_LEVELS
+
+
+def _decimals(values, max_decimals=3):
+    """
+    Number of decimals the values are recorded with.
+    """
+    for decimals in range(max_decimals + 1):
+        scaled = values * 10 ** decimals
+        if np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-3):
+            return decimals
+    return max_decimals
+
+
+def class_profiles(data):
+    """
+    What ``generate_rows`` needs to know about every class of ``data``.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Validated data with the ``EXPECTED_COLUMNS``.
+
+    Returns
+    -------
+    dict
+        ``"levels"``: the RiskLevels present, ``"shares"``: their share of
+        the rows, ``"rows"``, ``"means"`` and ``"noise"``: the feature rows
+        (rows with missing values left out), mean and square root of the
+        noise covariance of every class, ``"shrink"``: the factor that
+        restores the class variances, ``"decimals"``: the recorded decimals
+        of every feature.
+    """
+    complete = data.dropna(subset=EXPECTED_COLUMNS)
+    labels = complete["RiskLevel"].astype(str)
+    levels = [level for level in RISK_LEVELS if (labels == level).any()]
+    values = complete[FEATURE_COLS].to_numpy(dtype=np.float64)
+    rows, means, noise, shrink = [], [], [], []
+    for level in levels:
+        class_rows = values[(labels == level).to_numpy()]
+        # Scott's rule for a d-dimensional kernel: n ** (-1 / (d + 4))
+        factor = len(class_rows) ** (-1 / (len(FEATURE_COLS) + 4))
+        covariance = np.cov(class_rows, rowvar=False) if len(class_rows) > 1 else np.zeros((len(FEATURE_COLS),) * 2)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        rows.append(class_rows)
+        means.append(class_rows.mean(axis=0))
+        noise.append(factor * eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None)))
+        shrink.append(1 / np.sqrt(1 + factor ** 2))
+    counts = np.array([len(r) for r in rows], dtype=np.float64)
+    return {
+        "levels": levels,
+        "shares": counts / counts.sum(),
+        "rows": rows,
+        "means": means,
+        "noise": noise,
+        "shrink": shrink,
+        "decimals": [_decimals(values[:, j]) for j in range(len(FEATURE_COLS))],
+    }
+
+
+def inject_errors(data, error_rate, rng):
+    """
+    Give a random ``error_rate`` fraction of the rows of ``data`` one invalid
+    value each (in place): a feature above its valid range, or an unknown
+    RiskLevel.
+    """
+    n_rows = len(data)
+    dirty = rng.choice(n_rows, size=int(n_rows * error_rate), replace=False)
+    column = rng.integers(len(EXPECTED_COLUMNS), size=len(dirty))
+    for j, name in enumerate(EXPECTED_COLUMNS):
+        rows = dirty[column == j]
+        if name == "RiskLevel":
+            data.loc[rows, name] = "unknown risk"
+        else:
+            _, _, high = FEATURE_RANGES[name]
+            data.loc[rows, name] = high + rng.integers(1, 10, size=len(rows))
+    return data
+
+
+def generate_rows(profiles, n_rows, seed=123, error_rate=0.0, duplicate_rate=0.0):
+    """
+    Draw synthetic rows following ``class_profiles(data)``.
+
+    Parameters
+    ----------
+    profiles : dict
+        Result of ``class_profiles``.
+    n_rows : int
+        Number of rows.
+    seed : int or numpy.random.SeedSequence
+        Seed of the draws.
+    error_rate : float
+        Fraction of rows with one invalid value.
+    duplicate_rate : float
+        Fraction of rows replaced by a copy of another row (before the
+        errors are injected).
+
+    Returns
+    -------
+    pandas.DataFrame
+        The ``EXPECTED_COLUMNS`` in the raw CSV's types: integer features
+        as int64, float features as float64 and RiskLevel as strings.
+    """
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(len(profiles["levels"]), size=n_rows, p=profiles["shares"])
+    values = np.empty((n_rows, len(FEATURE_COLS)))
+    for code, rows in enumerate(profiles["rows"]):
+        members = np.flatnonzero(codes == code)
+        mean = profiles["means"][code]
+        draws = rows[rng.integers(len(rows), size=len(members))] - mean
+        draws += rng.standard_normal((len(members), len(FEATURE_COLS))) @ profiles["noise"][code].T
+        values[members] = mean + draws * profiles["shrink"][code]
+
+    columns = {}
+    for j, name in enumerate(FEATURE_COLS):
+        dtype, low, high = FEATURE_RANGES[name]
+        column = np.clip(np.round(values[:, j], profiles["decimals"][j]), low, high)
+        columns[name] = column.astype(np.int64) if dtype is int else column
+    columns["RiskLevel"] = np.array(profiles["levels"], dtype=object)[codes]
+    data = pd.DataFrame(columns, columns=EXPECTED_COLUMNS)
+
+    n_duplicates = int(n_rows * duplicate_rate)
+    if n_duplicates:
+        source = np.arange(n_rows)
+        source[rng.choice(n_rows, size=n_duplicates, replace=False)] = rng.integers(n_rows, size=n_duplicates)
+        data = data.iloc[source].reset_index(drop=True)
+    if error_rate:
+        inject_errors(data, error_rate, rng)
+    return data
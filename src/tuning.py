@@ -0,0 +1,306 @@
+"""Hyperparameter search engines for the SVC maternal health risk classifier."""
+
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy.stats import loguniform, rankdata
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import get_scorer
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.model_selection import RandomizedSearchCV, HalvingRandomSearchCV, ParameterSampler, check_cv
+from sklearn.svm import SVC
+from sklearn.utils import _safe_indexing
+from src.approximate_kernel import NystroemSVC
+
+SEARCH_ENGINES = ["random", "halving", "kernel-cache"]
+KERNEL_ENGINES = ["exact", "nystroem"]
+
+
+def make_classifier(kernel_engine="exact", random_state=None):
+    """
+    The classifier step tuned by the search: an exact RBF ``SVC`` or its
+    approximation trained by mini-batch SGD (``NystroemSVC``, see
+    ``src/approximate_kernel.py``). Both take ``C`` and ``gamma``.
+
+    Raises
+    ------
+    ValueError
+        If ``kernel_engine`` is not one of ``KERNEL_ENGINES``.
+    """
+    if kernel_engine == "exact":
+        return SVC(random_state=random_state)
+    if kernel_engine == "nystroem":
+        return NystroemSVC(random_state=random_state)
+    raise ValueError(f"Unknown kernel engine '{kernel_engine}'; expected one of {KERNEL_ENGINES}.")
+
+
+def svc_param_distributions():
+    """
+    Log-uniform search space over the SVC's C and gamma.
+    """
+    return {
+        "svc__C": loguniform(1e-2, 1e3),
+        "svc__gamma": loguniform(1e-4, 1e1),
+    }
+
+
+def local_param_distributions(best_params, width=0.5):
+    """
+    Log-uniform search space of ``width`` decades either side of a previous
+    optimum, for refitting around known-good hyperparameters.
+    """
+    return {
+        name: loguniform(value / 10 ** width, value * 10 ** width)
+        for name, value in best_params.items()
+    }
+
+
+def search_compute_time(search):
+    """
+    Total CPU-side time in seconds the search spent fitting and scoring
+    candidates, from its ``cv_results_`` (independent of ``n_jobs``).
+    """
+    results = search.cv_results_
+    return float(((results["mean_fit_time"] + results["mean_score_time"]) * search.n_splits_).sum())
+
+
+def make_search(estimator, engine="random", n_candidates=100, cv=10, random_state=123, n_jobs=-1,
+                param_distributions=None):
+    """
+    Build a hyperparameter search over ``svc_param_distributions``.
+
+    Parameters
+    ----------
+    estimator : sklearn.pipeline.Pipeline
+        Preprocessor + SVC pipeline to tune.
+    engine : {"random", "halving", "kernel-cache"}
+        ``"random"`` evaluates every candidate with full ``cv``-fold cross-
+        validation on all rows (``RandomizedSearchCV``). ``"halving"`` runs
+        successive halving on the number of training rows
+        (``HalvingRandomSearchCV``): all candidates start on a small subsample
+        and only the best third of each round is re-evaluated on three times
+        as many rows, so weak candidates cost little. ``"kernel-cache"``
+        evaluates the same candidates and folds as ``"random"`` but computes
+        each fold's squared-distance matrix once and shares it across all
+        candidates (``KernelCacheSearchCV``).
+    n_candidates : int
+        Number of sampled hyperparameter combinations.
+    cv : int
+        Number of cross-validation folds.
+    random_state : int
+        Seed for sampling candidates and subsamples.
+    n_jobs : int
+        Number of parallel jobs.
+    param_distributions : dict, optional
+        Search space; defaults to ``svc_param_distributions()``.
+
+    Returns
+    -------
+    RandomizedSearchCV, HalvingRandomSearchCV or KernelCacheSearchCV
+        Unfitted search object scored on ``recall_weighted``. Each is fitted
+        on a DataFrame or an array of features.
+
+    Raises
+    ------
+    ValueError
+        If ``engine`` is not one of ``SEARCH_ENGINES``, or is
+        ``"kernel-cache"`` and the last step is not an ``SVC``.
+    """
+    common = dict(
+        param_distributions=param_distributions or svc_param_distributions(),
+        n_jobs=n_jobs,
+        return_train_score=True,
+        cv=cv,
+        scoring='recall_weighted',
+        random_state=random_state,
+    )
+    if engine == "random":
+        return RandomizedSearchCV(estimator, n_iter=n_candidates, **common)
+    if engine == "halving":
+        return HalvingRandomSearchCV(
+            estimator,
+            n_candidates=n_candidates,
+            factor=3,
+            resource="n_samples",
+            min_resources="exhaust",
+            **common,
+        )
+    if engine == "kernel-cache":
+        if not isinstance(estimator[-1], SVC):
+            raise ValueError("The kernel-cache engine needs an exact SVC as the last step.")
+        return KernelCacheSearchCV(estimator, n_iter=n_candidates, **common)
+    raise ValueError(f"Unknown search engine '{engine}'; expected one of {SEARCH_ENGINES}.")
+
+
+def ranked_results(cv_results):
+    """
+    Tabulate a search's ``cv_results_`` with one row per candidate.
+
+    For random search this is ``cv_results_`` as a DataFrame. Successive
+    halving evaluates a candidate once per round it survives, so only each
+    candidate's last (largest-sample) evaluation is kept, and candidates are
+    ranked by how far they got and then by score. ``rank_test_score`` is
+    recomputed accordingly.
+
+    Parameters
+    ----------
+    cv_results : dict
+        The ``cv_results_`` attribute of a fitted search.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per candidate, with ``rank_test_score`` 1 for the best.
+    """
+    results = pd.DataFrame(cv_results)
+    if "iter" not in results:
+        return results
+    params = results["params"].astype(str)
+    results = (
+        results.assign(_params=params)
+        .sort_values("iter")
+        .drop_duplicates("_params", keep="last")
+        .drop(columns="_params")
+        .sort_values(["iter", "mean_test_score"], ascending=False)
+    )
+    results["rank_test_score"] = range(1, len(results) + 1)
+    return results
+
+
+def _fit_precomputed(svc, params, sq_dist_train, sq_dist_test, y_train, y_test, scorer, return_train_score):
+    """
+    Fit one candidate on a cached fold: exponentiate the fold's squared
+    distances with the candidate's gamma and fit an SVC on the kernel.
+    """
+    params = dict(params)
+    gamma = params.pop("gamma")
+    start = time.perf_counter()
+    model = clone(svc).set_params(**params, kernel="precomputed")
+    model.fit(np.exp(-gamma * sq_dist_train), y_train)
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    test_score = scorer(model, np.exp(-gamma * sq_dist_test), y_test)
+    score_time = time.perf_counter() - start
+    train_score = scorer(model, np.exp(-gamma * sq_dist_train), y_train) if return_train_score else np.nan
+    return fit_time, score_time, test_score, train_score
+
+
+class KernelCacheSearchCV:
+    """
+    Randomized search over an RBF SVC that shares kernel work across candidates.
+
+    Every candidate of a ``RandomizedSearchCV`` over C and gamma refits the
+    same preprocessor on the same folds and lets libsvm recompute the same
+    pairwise distances. Here the preprocessor is fitted and the squared
+    Euclidean distance matrices (train x train and validation x train) are
+    computed once per fold. Each candidate then only exponentiates them with
+    its gamma and fits ``SVC(kernel="precomputed")``. Candidates and folds
+    are sampled exactly as ``RandomizedSearchCV`` samples them, so
+    ``cv_results_`` and the selected model match it (up to floating-point
+    differences in the kernel). Candidate fits run in parallel with joblib.
+    The distance matrices are memory-mapped to the workers rather than
+    copied, but they are n_train x n_train per fold, so this suits training
+    sets where that fits in memory.
+
+    After fitting, the best parameters are refitted on all rows as an
+    ordinary RBF pipeline, so ``best_estimator_`` is interchangeable with
+    the one from ``RandomizedSearchCV``.
+
+    Parameters
+    ----------
+    estimator : sklearn.pipeline.Pipeline
+        Preprocessing steps followed by an RBF ``SVC`` as the last step.
+    param_distributions : dict
+        Distributions for ``<svc step>__C`` and ``<svc step>__gamma``.
+    n_iter, cv, scoring, random_state, n_jobs, return_train_score
+        As for ``RandomizedSearchCV``.
+    """
+
+    def __init__(self, estimator, param_distributions, n_iter=10, cv=5, scoring=None,
+                 random_state=None, n_jobs=None, return_train_score=False):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.cv = cv
+        self.scoring = scoring
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.return_train_score = return_train_score
+
+    def fit(self, X, y):
+        """
+        Run the search and refit the best candidate on all of ``X`` and ``y``.
+        """
+        y = np.asarray(y)
+        svc_name, svc = self.estimator.steps[-1]
+        prefix = f"{svc_name}__"
+        candidates = list(ParameterSampler(self.param_distributions, self.n_iter, random_state=self.random_state))
+        cv = check_cv(self.cv, y, classifier=True)
+        splits = list(cv.split(X, y))
+        scorer = get_scorer(self.scoring)
+
+        # the shared work: one preprocessor fit and two distance matrices per fold
+        folds = []
+        for train, test in splits:
+            # rows of a DataFrame or an array alike
+            X_train, X_test = _safe_indexing(X, train), _safe_indexing(X, test)
+            preprocessor = clone(self.estimator[:-1]).fit(X_train, y[train])
+            Z_train = np.asarray(preprocessor.transform(X_train), dtype=np.float64)
+            Z_test = np.asarray(preprocessor.transform(X_test), dtype=np.float64)
+            folds.append((
+                euclidean_distances(Z_train, squared=True),
+                euclidean_distances(Z_test, Z_train, squared=True),
+                y[train],
+                y[test],
+            ))
+
+        out = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_precomputed)(
+                svc,
+                {k[len(prefix):]: v for k, v in params.items()},
+                *fold,
+                scorer,
+                self.return_train_score,
+            )
+            for params in candidates
+            for fold in folds
+        )
+        out = np.array(out, dtype=np.float64).reshape(len(candidates), len(folds), 4)
+
+        results = {}
+        for i, key in enumerate(["fit_time", "score_time", "test_score", "train_score"]):
+            if key == "train_score" and not self.return_train_score:
+                continue
+            if key.endswith("_score"):
+                for split in range(len(folds)):
+                    results[f"split{split}_{key}"] = out[:, split, i]
+            results[f"mean_{key}"] = out[:, :, i].mean(axis=1)
+            results[f"std_{key}"] = out[:, :, i].std(axis=1)
+        for name in candidates[0]:
+            results[f"param_{name}"] = np.array([params[name] for params in candidates])
+        results["params"] = candidates
+        results["rank_test_score"] = rankdata(-results["mean_test_score"], method="min").astype(np.int32)
+
+        self.cv_results_ = results
+        self.n_splits_ = len(folds)
+        self.best_index_ = int(results["rank_test_score"].argmin())
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = results["mean_test_score"][self.best_index_]
+        self.scorer_ = scorer
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+    @property
+    def classes_(self):
+        return self.best_estimator_.classes_
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def decision_function(self, X):
+        return self.best_estimator_.decision_function(X)
+
+    def score(self, X, y):
+        return self.scorer_(self.best_estimator_, X, y)
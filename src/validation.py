@@ -0,0 +1,611 @@
+"""Data validation schema for the maternal health risk data."""
+
+import json
+import numpy as np
+import pandas as pd
+import pandera.pandas as pa
+from src.schema import EXPECTED_COLUMNS, FEATURE_COLS, RISK_LEVELS, FEATURE_RANGES, COMPACT_DTYPES, apply_dtypes, unstorable_values
+from src.data_io import TableWriter, table_format, arrow_schema, write_table
+
+
+def build_schema(dtypes=True, column_checks=True, frame_checks=True):
+    """
+    Build the pandera schema for the maternal health risk data.
+
+    Column checks cover data types, valid ranges for numerical features and
+    valid RiskLevel categories. Frame-level checks cover duplicate and empty
+    rows, at most 5% missing values per column, at least 5% of observations
+    per RiskLevel and no constant-valued features. Each group can be left
+    out, which the chunked validator uses to run only the checks that can be
+    decided one chunk at a time.
+    """
+    column_types = {"RiskLevel": str, **{name: dtype for name, (dtype, _, _) in FEATURE_RANGES.items()}}
+    column_check_lists = {
+        # check for correct category labels
+        "RiskLevel": [pa.Check.isin(RISK_LEVELS)],
+        # check for outliers and anomalous values
+        **{name: [pa.Check.between(low, high)] for name, (_, low, high) in FEATURE_RANGES.items()},
+    }
+    columns = {
+        name: pa.Column(
+            column_types[name] if dtypes else None,
+            column_check_lists[name] if column_checks else None,
+            nullable=True,
+        )
+        for name in column_types
+    }
+
+    # the order of these checks is mirrored by ChunkedValidator.frame_check_results
+    return pa.DataFrameSchema(
+        columns,
+        checks=[] if not frame_checks else [
+            # check for duplicate rows and empty rows
+            pa.Check(lambda df: ~df.duplicated().any(), error="Duplicate rows found."),
+            pa.Check(lambda df: ~(df.isna().all(axis=1)).any(), error="Empty rows found."),
+            # check for missingness not beyond expected threshold
+            pa.Check(lambda df: (df.isna().mean() <= 0.05).all(), error="Some columns have more than 5% missing values."),
+            # check for label imbalance in target variable
+            pa.Check(
+                lambda df: (df["RiskLevel"].value_counts(normalize=True) >= 0.05).all(),
+                error="One or more RiskLevel categories have <5% of observations.",
+            ),
+
+            # make sure there is no column with constant values
+            pa.Check(
+                lambda df: df[FEATURE_COLS].nunique().min() > 1,
+                error="One or more features have no variation.",
+            ),
+        ],
+        drop_invalid_rows=False,
+    )
+
+
+VALIDATION_ENGINES = ["pandera", "vectorized"]
+
+
+def validate_frame(data, engine="pandera"):
+    """
+    Validate a DataFrame against ``build_schema`` and drop invalid rows.
+
+    Rows flagged by a column check (or an index-level failure case) are
+    dropped together with empty rows; frame-level failures such as duplicate
+    detection are reported but do not remove rows.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Data with the ``EXPECTED_COLUMNS``; missing ones are reported.
+    engine : {"pandera", "vectorized"}
+        ``"pandera"`` validates with the pandera schema. ``"vectorized"``
+        evaluates the same checks in one pass with ``ChunkedValidator`` and
+        returns the same rows and the same error message. It falls back to
+        pandera if a column is missing or a feature column is not numeric,
+        since pandera then reports the missing column or the failing
+        check's exception.
+
+    Returns
+    -------
+    tuple of (pandas.DataFrame, str or None)
+        The validated data, and the pandera error message as an indented
+        JSON string (None if validation passed).
+
+    Raises
+    ------
+    ValueError
+        If ``engine`` is not one of ``VALIDATION_ENGINES``.
+    """
+    complete = all(name in data for name in EXPECTED_COLUMNS)
+    numeric = complete and all(pd.api.types.is_numeric_dtype(data[name]) for name in FEATURE_COLS)
+    if engine == "vectorized" and numeric:
+        validator = ChunkedValidator()
+        invalid, empty = validator.scan(data)
+        error_message = validator.error_message()
+        if error_message is None:
+            return data, None
+        if data.index.is_unique:
+            # same rows and index as the drop/reset_index/dropna below,
+            # from the row masks instead of a lookup of the failure labels
+            position = np.cumsum(~invalid) - 1
+            keep = ~(invalid | empty)
+            validated_data = data[keep].set_axis(pd.RangeIndex(len(data))[position[keep]])
+            return validated_data, error_message
+        error_cases = validator.failure_cases()
+    elif engine in VALIDATION_ENGINES:
+        schema = build_schema()
+        try:
+            schema.validate(data, lazy=True)
+        except pa.errors.SchemaErrors as e:
+            error_cases = e.failure_cases
+            error_message = json.dumps(e.message, indent=2)
+        else:
+            return data, None
+    else:
+        raise ValueError(f"Unknown validation engine '{engine}'; expected one of {VALIDATION_ENGINES}.")
+
+    # filter out invalid rows based on the error cases: keep the duplicate rows
+    if not error_cases.empty:
+        invalid_indices = error_cases["index"].dropna().unique()
+        validated_data = (
+            data.drop(index=invalid_indices)
+            .reset_index(drop=True)
+            .dropna(how="all")
+        )
+    else:
+        validated_data = data
+    return validated_data, error_message
+
+
+def drop_unstorable_rows(data):
+    """
+    Drop the rows of validated data holding a value that does not fit
+    ``COMPACT_DTYPES``.
+
+    A failed dtype check (e.g. an Age of 25.5, or a non-numeric cell) is
+    reported for the whole column without naming rows, so ``validate_frame``
+    keeps those rows, and ``apply_dtypes`` could not store them.
+
+    Returns
+    -------
+    tuple of (pandas.DataFrame, pandas.DataFrame)
+        The storable rows, and the dropped values as a frame with columns
+        ``column``, ``failure_case`` and ``index`` (the row label), ordered
+        by column and then by row.
+    """
+    unstorable = unstorable_values(data)
+    mask = unstorable.to_numpy()
+    row_idx, column_idx = np.nonzero(mask)
+    order = np.lexsort((row_idx, column_idx))
+    row_idx, column_idx = row_idx[order], column_idx[order]
+    cases = pd.DataFrame({
+        "column": unstorable.columns.to_numpy(dtype=object)[column_idx],
+        "failure_case": data[unstorable.columns].to_numpy(dtype=object)[row_idx, column_idx],
+        "index": data.index.to_numpy()[row_idx],
+    })
+    return (data[~mask.any(axis=1)] if len(cases) else data), cases
+
+
+def storage_error_message(failure_cases):
+    """
+    The values dropped by ``drop_unstorable_rows``, per column, as an
+    indented JSON string (None if no row was dropped).
+    """
+    errors = []
+    for name in COMPACT_DTYPES:
+        group = failure_cases[failure_cases["column"] == name]
+        if group.empty:
+            continue
+        values = group.sort_values("index", kind="stable")["failure_case"]
+        errors.append({
+            "column": name,
+            "dtype": str(COMPACT_DTYPES[name]),
+            "error": (
+                f"Column '{name}' cannot be stored as {COMPACT_DTYPES[name]}; rows dropped with values: "
+                f"{', '.join(values.apply(str))}"
+            ),
+        })
+    return json.dumps({"STORAGE": errors}, indent=2) if errors else None
+
+
+def column_check_failures(data):
+    """
+    Evaluate every column check of ``build_schema`` in one vectorized pass.
+
+    The features are read into one float array and compared against the
+    ``FEATURE_RANGES`` bounds at once; RiskLevel is factorized once, which
+    gives its missing values, the ``RISK_LEVELS`` check and the category
+    counts together. Missing values pass, as they do for the nullable
+    pandera columns.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Data with the ``EXPECTED_COLUMNS``. Non-numeric feature values are
+        treated as missing.
+
+    Returns
+    -------
+    columns : list of str
+        Column of each check, in schema order (RiskLevel, then features).
+    failed : numpy.ndarray
+        Boolean failure matrix of shape (n_rows, n_checks).
+    isna : numpy.ndarray
+        Boolean missing-value matrix of the same shape.
+    features : numpy.ndarray
+        The features as float64, shape (n_rows, len(FEATURE_COLS)).
+    risk_level_codes : numpy.ndarray
+        Code of every row's RiskLevel in ``risk_levels`` (-1 if missing).
+    risk_levels : numpy.ndarray
+        The distinct RiskLevel values.
+    """
+    feature_data = data[FEATURE_COLS]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in feature_data.dtypes):
+        feature_data = feature_data.apply(pd.to_numeric, errors="coerce")
+    features = feature_data.to_numpy(dtype=np.float64)
+    low = np.array([FEATURE_RANGES[name][1] for name in FEATURE_COLS], dtype=np.float64)
+    high = np.array([FEATURE_RANGES[name][2] for name in FEATURE_COLS], dtype=np.float64)
+
+    columns = ["RiskLevel"] + FEATURE_COLS
+    # column-major, so that the per-column writes and the per-row
+    # reductions in ChunkedValidator run over contiguous memory
+    failed = np.empty((len(columns), len(data)), dtype=bool).T
+    isna = np.empty((len(columns), len(data)), dtype=bool).T
+    # NaN compares False on both sides, so missing features never fail
+    np.logical_or(features < low, features > high, out=failed[:, 1:])
+    np.isnan(features, out=isna[:, 1:])
+
+    risk_level_codes, risk_levels = pd.factorize(data["RiskLevel"])
+    risk_levels = np.asarray(risk_levels, dtype=object)
+    # a trailing True so that missing values (code -1) pass
+    known = np.append(np.isin(risk_levels, RISK_LEVELS), True)
+    isna[:, 0] = risk_level_codes < 0
+    failed[:, 0] = ~known[risk_level_codes]
+    return columns, failed, isna, features, risk_level_codes, risk_levels
+
+
+def failure_cases_from_matrix(data, columns, failed, checks):
+    """
+    Turn a failure matrix into pandera-style ``failure_cases`` rows, ordered
+    by column and then by row, without a Python-level loop over failures.
+    """
+    column_idx, row_idx = np.nonzero(failed.T)
+    failure_case = np.empty(len(row_idx), dtype=object)
+    for j, name in enumerate(columns):
+        in_column = column_idx == j
+        failure_case[in_column] = data[name].to_numpy()[row_idx[in_column]]
+    return pd.DataFrame({
+        "schema_context": "Column",
+        "column": np.array(columns, dtype=object)[column_idx],
+        "check": np.array([str(check.error) for check in checks], dtype=object)[column_idx],
+        "check_number": 0,
+        "failure_case": failure_case,
+        "index": data.index.to_numpy()[row_idx],
+    })
+
+
+class RowHashSet:
+    """
+    Set of 64-bit row hashes stored as sorted NumPy runs.
+
+    Each batch of hashes is sorted and kept as a run; runs are merged when
+    the newer one grows as large as the one before it, so there are only
+    O(log n) runs to search. Membership of a whole batch is checked with one
+    ``searchsorted`` per run, and a hash takes 8 bytes rather than the ~70 of
+    a Python set entry.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def add(self, hashes):
+        """
+        Add a batch of hashes. Returns True if any of them was already in the
+        set or occurs twice in the batch.
+        """
+        hashes = np.sort(np.asarray(hashes, dtype=np.uint64))
+        repeated = hashes[1:] == hashes[:-1]
+        seen = bool(repeated.any())
+        if seen:
+            hashes = hashes[np.append(True, ~repeated)]
+        for run in self.runs:
+            if seen:
+                break
+            position = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            seen = bool((run[position] == hashes).any())
+        self.runs.append(hashes)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= len(self.runs[-1]):
+            newer = self.runs.pop()
+            self.runs[-1] = np.union1d(self.runs[-1], newer)
+        return seen
+
+
+def _common_dtype(dtypes):
+    """
+    The dtype ``pandas.read_csv`` infers for a whole column from the dtypes it
+    inferred for each chunk: object if any chunk is, else the NumPy promotion
+    (int64 + float64 -> float64).
+    """
+    dtypes = list(dtypes)
+    if any(dtype == object for dtype in dtypes):
+        return np.dtype(object)
+    return np.result_type(*dtypes)
+
+
+class ChunkedValidator:
+    """
+    Validate the data one chunk at a time with the checks of ``build_schema``.
+
+    Column checks (ranges and RiskLevel categories) are run on every chunk,
+    so their invalid rows can be dropped before the chunk is written. With
+    the default ``"vectorized"`` engine they are evaluated in one pass over
+    a NumPy failure matrix (``column_check_failures``); ``"pandera"`` runs
+    the pandera column checks instead, which is also the fallback for
+    chunks with non-numeric feature columns. The frame-level checks are
+    decided from state kept across chunks: a ``RowHashSet`` of 64-bit row
+    hashes for duplicates, counts of empty rows, missing values and
+    RiskLevel categories, and the running minimum and maximum of every
+    feature for the no-variation check. Data types are checked once at the
+    end against the dtype each column would have been inferred as had the
+    whole file been read at once.
+
+    Memory is bounded by the chunk size plus the row hashes (8 bytes per
+    distinct row, until the first duplicate is found) and the collected
+    failure cases.
+
+    Parameters
+    ----------
+    engine : {"pandera", "vectorized"}
+        How column checks are evaluated.
+
+    Examples
+    --------
+    >>> validator = ChunkedValidator()
+    >>> for chunk in pd.read_csv(path, chunksize=100_000):
+    ...     valid_rows = validator.update(chunk)
+    >>> error_message = validator.error_message()
+    """
+
+    def __init__(self, engine="vectorized"):
+        if engine not in VALIDATION_ENGINES:
+            raise ValueError(f"Unknown validation engine '{engine}'; expected one of {VALIDATION_ENGINES}.")
+        self.engine = engine
+        self.schema = build_schema()
+        self.column_schema = build_schema(dtypes=False, frame_checks=False)
+        self.dtype_schema = build_schema(column_checks=False, frame_checks=False)
+        self.n_rows = 0
+        self.row_hashes = RowHashSet()
+        self.risk_level_ids = {}
+        self.has_duplicates = False
+        self.n_empty_rows = 0
+        self.n_missing = np.zeros(len(EXPECTED_COLUMNS), dtype=np.int64)
+        self.risk_level_counts = pd.Series(dtype=np.int64)
+        self.feature_min = np.full(len(FEATURE_COLS), np.nan)
+        self.feature_max = np.full(len(FEATURE_COLS), np.nan)
+        self.chunk_dtypes = {name: [] for name in EXPECTED_COLUMNS}
+        self.dtype_probe = {name: [] for name in EXPECTED_COLUMNS}
+        self.column_failure_cases = []
+
+    def update(self, chunk):
+        """
+        Validate one chunk and return its valid rows.
+
+        Rows failing a column check and empty rows are dropped, as in
+        ``validate_frame``; duplicate rows are only reported. The chunk's
+        index must continue from the previous chunk (as it does for
+        ``pandas.read_csv(..., chunksize=...)``) so that failure cases refer
+        to rows of the whole file.
+        """
+        invalid, empty = self.scan(chunk)
+        return chunk[~(invalid | empty)]
+
+    def scan(self, chunk):
+        """
+        Validate one chunk and return boolean masks of its rows that failed a
+        column check and of its empty rows.
+
+        Raises
+        ------
+        ValueError
+            If the chunk lacks one of the ``EXPECTED_COLUMNS``.
+        """
+        missing = [name for name in EXPECTED_COLUMNS if name not in chunk.columns]
+        if missing:
+            raise ValueError(f"Columns {missing} not in the data; chunked validation needs all of {EXPECTED_COLUMNS}.")
+        chunk = chunk[EXPECTED_COLUMNS]
+        self.n_rows += len(chunk)
+        columns, failed, isna, features, risk_level_codes, risk_levels = column_check_failures(chunk)
+        numeric = all(pd.api.types.is_numeric_dtype(chunk[name]) for name in FEATURE_COLS)
+
+        if self.engine == "vectorized" and numeric:
+            checks = [self.schema.columns[name].checks[0] for name in columns]
+            if failed.any():
+                self.column_failure_cases.append(failure_cases_from_matrix(chunk, columns, failed, checks))
+            invalid = failed.any(axis=1)
+        else:
+            invalid = np.zeros(len(chunk), dtype=bool)
+            try:
+                self.column_schema.validate(chunk, lazy=True)
+            except pa.errors.SchemaErrors as e:
+                self.column_failure_cases.append(e.failure_cases)
+                invalid = chunk.index.isin(e.failure_cases["index"].dropna())
+            # non-numeric feature values are not missing
+            isna[:, 1:] = chunk[FEATURE_COLS].isna().to_numpy()
+        empty = isna.all(axis=1)
+
+        # running state for the frame checks
+        self.n_empty_rows += int(empty.sum())
+        self.n_missing += isna.sum(axis=0)
+        level_counts = np.bincount(risk_level_codes[risk_level_codes >= 0], minlength=len(risk_levels))
+        self.risk_level_counts = self.risk_level_counts.add(pd.Series(level_counts, index=risk_levels), fill_value=0)
+        self.feature_min = np.fmin(self.feature_min, np.fmin.reduce(features, axis=0, initial=np.nan))
+        self.feature_max = np.fmax(self.feature_max, np.fmax.reduce(features, axis=0, initial=np.nan))
+        if not self.has_duplicates:
+            # hash a dtype-independent form of each row (float features and a
+            # RiskLevel id that is stable across chunks), so that e.g. 25 and
+            # 25.0 read in different chunks hash alike
+            ids = np.array([self.risk_level_ids.setdefault(level, len(self.risk_level_ids)) for level in risk_levels] + [-1])
+            canonical = np.column_stack([
+                features if numeric else chunk[FEATURE_COLS].astype(str).to_numpy(),
+                ids[risk_level_codes],
+            ])
+            hashes = pd.util.hash_pandas_object(pd.DataFrame(canonical), index=False).to_numpy()
+            self.has_duplicates = self.row_hashes.add(hashes)
+
+        for j, name in enumerate(columns):
+            self.chunk_dtypes[name].append(chunk[name].dtype)
+            if not self.dtype_probe[name] and not isna[:, j].all():
+                self.dtype_probe[name].append(chunk[name].iloc[int(np.argmin(isna[:, j]))])
+            if isna[:, j].any() and np.nan not in self.dtype_probe[name]:
+                self.dtype_probe[name].append(np.nan)
+
+        return np.asarray(invalid), empty
+
+    def frame_check_results(self):
+        """
+        Pass/fail of each frame-level check of ``build_schema``, in order.
+        """
+        counts = self.risk_level_counts
+        return [
+            not self.has_duplicates,
+            self.n_empty_rows == 0,
+            bool((self.n_missing / max(self.n_rows, 1) <= 0.05).all()),
+            bool((counts / counts.sum() >= 0.05).all()) if counts.sum() else True,
+            # nunique() > 1 for every feature
+            bool((self.feature_min < self.feature_max).all()),
+        ]
+
+    def column_dtypes(self):
+        """
+        The dtype of each column had the whole file been read at once.
+        """
+        return {name: _common_dtype(dtypes) for name, dtypes in self.chunk_dtypes.items() if dtypes}
+
+    def _dtype_errors(self):
+        """
+        Validate a two-row probe per column, cast to the whole-file dtype,
+        against the schema's dtypes. Returns pandera's message and failure
+        cases, or (None, None) if the dtypes pass.
+        """
+        column_dtypes = self.column_dtypes()
+        probe = pd.DataFrame({
+            name: pd.Series((values * 2)[:2] if values else [np.nan] * 2).astype(column_dtypes.get(name, object))
+            for name, values in self.dtype_probe.items()
+        })
+        try:
+            self.dtype_schema.validate(probe, lazy=True)
+        except pa.errors.SchemaErrors as e:
+            return e.message, e.failure_cases
+        return None, None
+
+    def failure_cases(self):
+        """
+        All failures seen so far as a pandera ``failure_cases`` frame: one row
+        per failing value of a column check (with its row ``index``), then
+        dtype failures and failed frame-level checks (``index`` None).
+        """
+        frames = list(self.column_failure_cases)
+        _, dtype_cases = self._dtype_errors()
+        if dtype_cases is not None:
+            frames.append(dtype_cases)
+        failed_checks = [
+            (i, check) for i, (check, passed) in enumerate(zip(self.schema.checks, self.frame_check_results()))
+            if not passed
+        ]
+        if failed_checks:
+            frames.append(pd.DataFrame({
+                "schema_context": "DataFrameSchema",
+                "column": None,
+                "check": [check.error for _, check in failed_checks],
+                "check_number": [i for i, _ in failed_checks],
+                "failure_case": False,
+                "index": None,
+            }))
+        columns = ["schema_context", "column", "check", "check_number", "failure_case", "index"]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        cases = pd.concat(frames, ignore_index=True)[columns]
+        return cases.astype({"check_number": np.float64})
+
+    def error_message(self):
+        """
+        The validation errors as the same indented JSON string that
+        ``validate_frame`` returns for the whole data (None if it passed).
+        """
+        column_dtypes = self.column_dtypes()
+        data_errors = []
+
+        # element-wise failures, merged across chunks in column order
+        if self.column_failure_cases:
+            cases = pd.concat(self.column_failure_cases, ignore_index=True)
+            for name in self.schema.columns:
+                for (check, check_number), group in cases[cases["column"] == name].groupby(
+                    ["check", "check_number"], sort=False
+                ):
+                    # failure cases in row order, as for the whole data
+                    values = group.sort_values("index", kind="stable")["failure_case"]
+                    if name in column_dtypes:
+                        values = values.astype(column_dtypes[name])
+                    data_errors.append({
+                        "schema": self.schema.name,
+                        "column": name,
+                        "check": check,
+                        "error": (
+                            f"Column '{name}' failed element-wise validator number {int(check_number)}: "
+                            f"{check} failure cases: {', '.join(values.apply(str))}"
+                        ),
+                    })
+
+        for i, (check, passed) in enumerate(zip(self.schema.checks, self.frame_check_results())):
+            if not passed:
+                data_errors.append({
+                    "schema": self.schema.name,
+                    "column": None,
+                    "check": check.error,
+                    "error": f"DataFrameSchema '{self.schema.name}' failed series or dataframe validator {i}: {check}",
+                })
+
+        message = {}
+        if data_errors:
+            message["DATA"] = {"DATAFRAME_CHECK": data_errors}
+        dtype_message, _ = self._dtype_errors()
+        if dtype_message is not None:
+            message.update(dtype_message)
+
+        return json.dumps(message, indent=2) if message else None
+
+
+def validate_csv_in_chunks(raw_data, output_file, chunk_size=100_000, engine="vectorized"):
+    """
+    Validate a CSV file chunk by chunk, writing valid rows as they are found.
+
+    The out-of-core counterpart of reading the whole file and calling
+    ``validate_frame``: the same rows are kept and the same error message is
+    returned, while only ``chunk_size`` rows are held in memory at a time.
+    The one exception is a feature column that does not parse as numbers:
+    pandera then reports the range check's exception for the whole column,
+    while here only the chunks holding non-numeric values are affected.
+    The header is checked first: if one of the ``EXPECTED_COLUMNS`` is
+    missing, the checks cannot be split into chunks, and the whole file is
+    validated with pandera instead, which reports the missing columns.
+
+    Parameters
+    ----------
+    raw_data : str
+        Path to the raw CSV file with the ``EXPECTED_COLUMNS``.
+    output_file : str
+        Path of the validated table to write; its extension selects the
+        format (see ``src.data_io``). Rows are written with
+        ``COMPACT_DTYPES``; valid rows that do not fit them are dropped.
+    chunk_size : int
+        Number of rows read and validated at a time.
+    engine : {"pandera", "vectorized"}
+        How column checks are evaluated; see ``ChunkedValidator``.
+
+    Returns
+    -------
+    tuple of (int, str or None, str or None)
+        The number of rows written, the error message as an indented JSON
+        string (None if validation passed), and the ``storage_error_message``
+        of the valid rows dropped by ``drop_unstorable_rows``.
+    """
+    header = pd.read_csv(raw_data, nrows=0).columns
+    if not set(EXPECTED_COLUMNS) <= set(header):
+        validated_data, error_message = validate_frame(pd.read_csv(raw_data), "pandera")
+        validated_data, cases = drop_unstorable_rows(validated_data)
+        write_table(apply_dtypes(validated_data), output_file)
+        return len(validated_data), error_message, storage_error_message(cases)
+
+    validator = ChunkedValidator(engine)
+    n_written = 0
+    dropped = []
+    schema = None if table_format(output_file) == "csv" else arrow_schema(COMPACT_DTYPES)
+    with TableWriter(output_file, schema) as writer:
+        for chunk in pd.read_csv(raw_data, chunksize=chunk_size):
+            valid_rows, cases = drop_unstorable_rows(validator.update(chunk))
+            writer.write(apply_dtypes(valid_rows))
+            n_written += len(valid_rows)
+            dropped.append(cases)
+    cases = pd.concat(dropped, ignore_index=True) if dropped else pd.DataFrame(columns=["column", "failure_case", "index"])
+    return n_written, validator.error_message(), storage_error_message(cases)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the tests import the pipeline modules the way the scripts do
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import pytest
+from sklearn.compose import make_column_selector, make_column_transformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from src.approximate_kernel import NystroemSVC
+from src.compiled_scorer import compile_pipeline
+from src.data_io import read_table
+from src.inference import load_pipeline
+from src.model_artifact import load_model_artifact, save_model_artifact
+from src.schema import COMPACT_DTYPES, FEATURE_COLS, model_features
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+MODEL = os.path.join(ROOT, "results", "models", "maternal_risk_classifier.pickle")
+ARTIFACT = os.path.join(ROOT, "results", "models", "maternal_risk_classifier")
+TRAINING_DATA = os.path.join(ROOT, "data", "processed", "maternal_health_risk_train.csv")
+TEST_DATA = os.path.join(ROOT, "data", "processed", "maternal_health_risk_test.csv")
+
+# the kernel expansion sums the terms in a different order from libsvm, so
+# decision scores differ in the last digits (up to about 1.4e-7 seen so far)
+DECISION_ATOL = 1e-6
+
+
+def read_features(path):
+    return model_features(read_table(path, dtypes=COMPACT_DTYPES)[FEATURE_COLS])
+
+
+def read_labels(path):
+    return read_table(path, columns=["RiskLevel"], dtypes=COMPACT_DTYPES)["RiskLevel"].astype(str)
+
+
+def assert_scorer_matches(pipeline, scorer, X):
+    np.testing.assert_array_equal(scorer.predict(X), pipeline.predict(X))
+    np.testing.assert_allclose(scorer.decision_function(X), pipeline.decision_function(X), rtol=0, atol=DECISION_ATOL)
+    np.testing.assert_array_equal(scorer.classes_, pipeline.classes_)
+
+
+@pytest.fixture(scope="module")
+def X_test():
+    return read_features(TEST_DATA)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return load_pipeline(MODEL)
+
+
+def test_compiled_svc_matches_pipeline(pipeline, X_test):
+    assert_scorer_matches(pipeline, compile_pipeline(pipeline), X_test)
+
+
+def test_committed_artifact_matches_pipeline(pipeline, X_test):
+    assert_scorer_matches(pipeline, load_model_artifact(ARTIFACT), X_test)
+
+
+def test_nystroem_pipeline_compiles(tmp_path, X_test):
+    preprocessor = make_column_transformer(
+        (StandardScaler(), make_column_selector(dtype_include="number")),
+        remainder="passthrough",
+        verbose_feature_names_out=False,
+    )
+    svc = NystroemSVC(C=50.0, gamma=0.5, n_components=100, n_epochs=3, random_state=0)
+    nystroem = Pipeline([("columntransformer", preprocessor), ("svc", svc)])
+    nystroem.fit(read_features(TRAINING_DATA), read_labels(TRAINING_DATA))
+
+    scorer = compile_pipeline(nystroem)
+    assert scorer.support_vectors.shape == (100, len(FEATURE_COLS))
+    assert_scorer_matches(nystroem, scorer, X_test)
+
+    save_model_artifact(scorer, str(tmp_path / "artifact"))
+    assert_scorer_matches(nystroem, load_model_artifact(str(tmp_path / "artifact")), X_test)
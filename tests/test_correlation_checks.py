@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.correlation_checks import (
+    CORRELATION_THRESHOLD, PPS_THRESHOLD, feature_feature_check, feature_label_check,
+)
+from src.data_io import read_table
+from src.schema import COMPACT_DTYPES, EXPECTED_COLUMNS
+
+TRAINING_DATA = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "maternal_health_risk_train.csv")
+
+# PPS of the committed training data for RiskLevel, from ppscore's algorithm
+# (per-feature DecisionTreeClassifier, 4-fold weighted F1, random_state=42),
+# which deepchecks' FeatureLabelCorrelation uses
+EXPECTED_PPS = {
+    "BS": 0.46205887396612866,
+    "Age": 0.34119553207354164,
+    "SystolicBP": 0.31788512024435694,
+    "DiastolicBP": 0.17741410663966636,
+    "HeartRate": 0.13824336598063974,
+    "BodyTemp": 0.06350524519783364,
+}
+# the most correlated pair, well below the 0.92 threshold
+EXPECTED_MAX_SPEARMAN = (("SystolicBP", "DiastolicBP"), 0.7535043749244529)
+
+
+@pytest.fixture(scope="module")
+def train_df():
+    # the committed table also holds the row index of the split
+    return read_table(TRAINING_DATA, dtypes=COMPACT_DTYPES)[EXPECTED_COLUMNS]
+
+
+def test_feature_label_check_on_training_data(train_df):
+    passed, pps = feature_label_check(train_df, label="RiskLevel")
+    assert passed
+    assert list(pps.index) == list(EXPECTED_PPS)
+    assert pps.to_dict() == pytest.approx(EXPECTED_PPS, abs=1e-9)
+
+
+def test_feature_feature_check_on_training_data(train_df):
+    passed, pairs, correlation = feature_feature_check(train_df, label="RiskLevel", n_pairs=0)
+    assert passed
+    assert pairs == []
+    (first, second), expected = EXPECTED_MAX_SPEARMAN
+    assert correlation.loc[first, second] == pytest.approx(expected, abs=1e-12)
+    upper = np.triu(correlation.abs().to_numpy(), k=1)
+    assert upper.max() == pytest.approx(expected, abs=1e-12)
+
+
+def test_checks_fail_on_a_leaking_feature(train_df):
+    codes = train_df["RiskLevel"].cat.codes.astype(np.int16)
+    leaking = train_df.assign(Leak=codes, LeakCopy=codes * 2 + 1)
+    label_passed, pps = feature_label_check(leaking, label="RiskLevel")
+    assert not label_passed
+    assert pps["Leak"] == pytest.approx(1.0) and pps["Leak"] >= PPS_THRESHOLD
+    feature_passed, pairs, _ = feature_feature_check(leaking, label="RiskLevel", n_pairs=0)
+    assert not feature_passed
+    assert pairs == [("Leak", "LeakCopy")]
+
+
+def test_matches_deepchecks(train_df):
+    pytest.importorskip("deepchecks")
+    from deepchecks.tabular import Dataset
+    from deepchecks.tabular.checks import FeatureFeatureCorrelation, FeatureLabelCorrelation
+
+    dataset = Dataset(train_df.assign(RiskLevel=train_df["RiskLevel"].astype(str)), label="RiskLevel", cat_features=[])
+    feature_label = FeatureLabelCorrelation().add_condition_feature_pps_less_than(PPS_THRESHOLD).run(dataset)
+    feature_feature = FeatureFeatureCorrelation().add_condition_max_number_of_pairs_above_threshold(
+        threshold=CORRELATION_THRESHOLD, n_pairs=0
+    ).run(dataset)
+
+    label_passed, pps = feature_label_check(train_df, label="RiskLevel")
+    assert pd.Series(feature_label.value["train"]).to_dict() == pytest.approx(pps.to_dict(), abs=1e-9)
+    assert feature_label.passed_conditions() == label_passed
+
+    feature_passed, _, correlation = feature_feature_check(train_df, label="RiskLevel", n_pairs=0)
+    expected = feature_feature.value.loc[correlation.index, correlation.columns]
+    np.testing.assert_allclose(correlation.to_numpy(), expected.to_numpy(), atol=1e-12)
+    assert feature_feature.passed_conditions() == feature_passed
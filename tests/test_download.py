@@ -0,0 +1,149 @@
+import hashlib
+import os
+import random
+import threading
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from src.download import CHUNK_SIZE, download_file, extract_member
+
+RAW_DATA = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "Maternal Health Risk Data Set.csv")
+MEMBER = os.path.basename(RAW_DATA)
+
+
+class ArchiveServer(ThreadingHTTPServer):
+    """
+    Serves the file at ``path`` with an ETag, answering conditional and
+    range requests. ``cut_after`` bytes into the next response, the
+    connection is closed (once).
+    """
+
+    def __init__(self, path):
+        super().__init__(("127.0.0.1", 0), ArchiveHandler)
+        self.path = path
+        self.cut_after = None
+        self.requests = []
+        self.bytes_sent = 0
+        self.reload()
+
+    def reload(self):
+        with open(self.path, "rb") as f:
+            self.data = f.read()
+        self.etag = '"' + hashlib.sha256(self.data).hexdigest()[:16] + '"'
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/{os.path.basename(self.path)}"
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", server.etag) == server.etag:
+            start = int(range_header.split("=")[1].split("-")[0])
+        body = memoryview(server.data)[start:]
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(server.data) - 1}/{len(server.data)}")
+        self.end_headers()
+        if server.cut_after is not None:
+            body, server.cut_after = body[:server.cut_after], None
+            self.close_connection = True
+        self.wfile.write(body)
+        server.bytes_sent += len(body)
+
+
+@pytest.fixture
+def server(tmp_path):
+    # the raw data CSV and an incompressible filler a few blocks long
+    served = tmp_path / "served" / "archive.zip"
+    served.parent.mkdir()
+    with zipfile.ZipFile(served, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(RAW_DATA, MEMBER)
+        archive.writestr("filler.bin", random.Random(123).randbytes(4 * CHUNK_SIZE), compress_type=zipfile.ZIP_STORED)
+    server = ArchiveServer(str(served))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def zip_path(tmp_path):
+    (tmp_path / "raw").mkdir()
+    return str(tmp_path / "raw" / "archive.zip")
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_cold_download(server, zip_path):
+    assert download_file(server.url, zip_path) == "downloaded"
+    assert read_bytes(zip_path) == server.data
+    assert sorted(os.listdir(os.path.dirname(zip_path))) == ["archive.zip", "archive.zip.meta.json"]
+
+
+def test_unchanged_file_is_not_sent_again(server, zip_path):
+    download_file(server.url, zip_path)
+    server.bytes_sent = 0
+    assert download_file(server.url, zip_path) == "cached"
+    assert server.requests[-1].get("If-None-Match") == server.etag
+    assert server.bytes_sent == 0
+
+
+def test_known_sha256_makes_no_request(server, zip_path):
+    download_file(server.url, zip_path)
+    n_requests = len(server.requests)
+    assert download_file(server.url, zip_path, expected_sha256=hashlib.sha256(server.data).hexdigest()) == "cached"
+    assert len(server.requests) == n_requests
+
+
+def test_cut_transfer_is_resumed(server, zip_path):
+    size = len(server.data)
+    server.cut_after = size // 2
+    assert download_file(server.url, zip_path) == "resumed"
+    # the block being received when the connection dropped is fetched again
+    offset = int(server.requests[-1]["Range"].split("=")[1].rstrip("-"))
+    assert size // 2 - CHUNK_SIZE < offset <= size // 2
+    assert server.requests[-1]["If-Range"] == server.etag
+    assert server.bytes_sent < size + CHUNK_SIZE
+    assert read_bytes(zip_path) == server.data
+
+
+def test_changed_file_is_downloaded_again(server, zip_path):
+    download_file(server.url, zip_path)
+    with zipfile.ZipFile(server.path, "a") as archive:
+        archive.writestr("changed.txt", "new release")
+    server.reload()
+    assert download_file(server.url, zip_path) == "downloaded"
+    assert read_bytes(zip_path) == server.data
+
+
+def test_wrong_sha256_is_rejected(server, zip_path):
+    with pytest.raises(ValueError, match="SHA-256"):
+        download_file(server.url, zip_path, expected_sha256="0" * 64)
+    assert os.listdir(os.path.dirname(zip_path)) == []
+
+
+def test_only_the_member_is_extracted(server, zip_path):
+    download_file(server.url, zip_path)
+    out = os.path.dirname(zip_path)
+    assert extract_member(zip_path, MEMBER, out) == "extracted"
+    assert read_bytes(os.path.join(out, MEMBER)) == read_bytes(RAW_DATA)
+    assert extract_member(zip_path, MEMBER, out) == "unchanged"
+    assert sorted(os.listdir(out)) == sorted(["archive.zip", "archive.zip.meta.json", MEMBER])
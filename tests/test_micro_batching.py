@@ -0,0 +1,34 @@
+import threading
+from src.micro_batching import LatencyStats, MicroBatcher
+
+
+class BlockingScorer:
+    """
+    Doubles every record, records the size of every call and holds the
+    first call until ``release`` is set, so that later requests queue up.
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batch_sizes = []
+
+    def __call__(self, records):
+        self.release.wait()
+        self.batch_sizes.append(len(records))
+        return [2 * record for record in records]
+
+
+def test_batches_stay_within_max_batch_size():
+    scorer = BlockingScorer()
+    stats = LatencyStats()
+    batcher = MicroBatcher(scorer, max_batch_size=4, max_wait=0.05, stats=stats)
+    requests = [[0]] + [[i, i + 1, i + 2] for i in range(1, 30, 3)] + [list(range(5)), [7]]
+    futures = [batcher.submit(request) for request in requests]
+    scorer.release.set()
+
+    for request, future in zip(requests, futures):
+        assert future.result(timeout=10) == [2 * record for record in request]
+    # only the single request of 5 records goes over the limit, on its own
+    assert [size for size in scorer.batch_sizes if size > 4] == [5]
+    assert sum(scorer.batch_sizes) == sum(len(request) for request in requests)
+    assert stats.n_batches == len(scorer.batch_sizes)
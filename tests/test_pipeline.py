@@ -0,0 +1,33 @@
+import os
+from scripts.run_pipeline import pipeline_stages
+from src.pipeline import source_closure
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_source_closure_follows_src_imports(tmp_path):
+    write(tmp_path / "scripts" / "run.py", "import os\nfrom src.first import f\n")
+    write(tmp_path / "src" / "first.py", "import numpy\n\ndef f():\n    from src.second import g\n    return g()\n")
+    write(tmp_path / "src" / "second.py", "import src.third\n\ndef g():\n    return src.third.h()\n")
+    write(tmp_path / "src" / "third.py", "from src.first import f\n\ndef h():\n    return 1\n")
+    write(tmp_path / "src" / "unused.py", "")
+    assert source_closure("scripts/run.py", str(tmp_path)) == [
+        "scripts/run.py", "src/first.py", "src/second.py", "src/third.py",
+    ]
+
+
+def test_stage_sources_cover_imported_modules():
+    stages = {stage.name: stage for stage in pipeline_stages()}
+    assert "src/schema.py" in stages["validate"].sources
+    # loaded through src/inference.py
+    assert {"src/model_artifact.py", "src/compiled_scorer.py"} <= set(stages["evaluate"].sources)
+    for stage in stages.values():
+        if stage.command[-1].startswith("scripts/"):
+            assert stage.sources[0] == stage.command[-1]
+            assert set(source_closure(stage.command[-1], ROOT)) <= set(stage.sources)
+        assert all(os.path.isfile(os.path.join(ROOT, path)) for path in stage.sources)
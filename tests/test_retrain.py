@@ -0,0 +1,25 @@
+import math
+import pandas as pd
+import pytest
+from scripts.retrain_maternal_health_risk_classifier import split_new_rows
+from src.schema import RISK_LEVELS
+
+
+def new_rows(n_per_class):
+    levels = [level for level in RISK_LEVELS for _ in range(n_per_class)]
+    return pd.DataFrame({"Age": range(len(levels)), "RiskLevel": levels})
+
+
+@pytest.mark.parametrize("n_per_class", [1, 2, 3])
+def test_small_batches_are_split(n_per_class):
+    # 6 rows give a test side of 2 rows, too few to hold all 3 classes
+    new_df = new_rows(n_per_class)
+    train, test = split_new_rows(new_df, test_size=0.3, random_state=123)
+    assert len(test) == math.ceil(0.3 * len(new_df))
+    assert sorted(train.index.append(test.index)) == list(new_df.index)
+
+
+def test_large_batches_are_stratified():
+    train, test = split_new_rows(new_rows(10), test_size=0.3, random_state=123)
+    assert test["RiskLevel"].value_counts().to_dict() == {level: 3 for level in RISK_LEVELS}
+    assert train["RiskLevel"].value_counts().to_dict() == {level: 7 for level in RISK_LEVELS}
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_io import read_table, write_table
+from src.schema import COMPACT_DTYPES, RISK_LEVELS, apply_dtypes
+from src.splitting import BalancedHashSplit, hash_split_positions, hash_split_table, hash_test_mask
+from src.synthetic import class_profiles, generate_rows
+
+VALIDATED_DATA = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "validated_data.csv")
+
+
+@pytest.fixture(scope="module")
+def validated():
+    return read_table(VALIDATED_DATA, dtypes=COMPACT_DTYPES)
+
+
+@pytest.fixture(scope="module")
+def synthetic(validated):
+    return apply_dtypes(generate_rows(class_profiles(validated), 20_000, seed=7))
+
+
+@pytest.mark.parametrize("chunk_size", [97, 1000, 4096])
+def test_chunked_split_matches_whole_table(synthetic, tmp_path, chunk_size):
+    source = tmp_path / "validated_data.csv"
+    write_table(synthetic, str(source))
+    whole = hash_split_positions(str(source), 0.3, 123)
+    chunked = hash_split_positions(str(source), 0.3, 123, chunk_size)
+    np.testing.assert_array_equal(whole[0], chunked[0])
+    np.testing.assert_array_equal(whole[1], chunked[1])
+    pd.testing.assert_frame_equal(whole[2], chunked[2])
+
+
+def test_split_tables_match_positions(synthetic, tmp_path):
+    source, train, test = (str(tmp_path / name) for name in ("data.csv", "train.csv", "test.csv"))
+    write_table(synthetic, source)
+    counts = hash_split_table(source, train, test, 0.3, 123, chunk_size=4096)
+    train_rows, test_rows, position_counts, n_rows = hash_split_positions(source, 0.3, 123)
+    data = read_table(source, dtypes=COMPACT_DTYPES)
+    pd.testing.assert_frame_equal(read_table(train, dtypes=COMPACT_DTYPES), data.iloc[train_rows].reset_index(drop=True))
+    pd.testing.assert_frame_equal(read_table(test, dtypes=COMPACT_DTYPES), data.iloc[test_rows].reset_index(drop=True))
+    pd.testing.assert_frame_equal(counts, position_counts)
+    assert n_rows == len(data)
+
+
+def test_appended_rows_leave_earlier_rows_in_place(synthetic):
+    before = hash_test_mask(synthetic.iloc[:12_345], 0.3, 123)
+    after = hash_test_mask(synthetic, 0.3, 123)
+    np.testing.assert_array_equal(before, after[:12_345])
+
+
+@pytest.mark.parametrize("test_size", [0.1, 0.3, 0.5])
+def test_every_class_within_one_row_of_its_share(validated, synthetic, test_size):
+    for data in (validated, synthetic):
+        splitter = BalancedHashSplit(test_size, seed=123)
+        in_test = np.concatenate([splitter.test_mask(data.iloc[start:start + 500]) for start in range(0, len(data), 500)])
+        for level in RISK_LEVELS:
+            rows = (data["RiskLevel"] == level).to_numpy()
+            assert abs(in_test[rows].sum() - test_size * rows.sum()) < 1
+
+
+def test_split_depends_on_seed(validated):
+    assert not np.array_equal(hash_test_mask(validated, 0.3, 1), hash_test_mask(validated, 0.3, 2))
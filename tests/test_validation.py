@@ -0,0 +1,85 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_io import read_table
+from src.schema import COMPACT_DTYPES, apply_dtypes
+from src.validation import (
+    VALIDATION_ENGINES, drop_unstorable_rows, storage_error_message, validate_csv_in_chunks, validate_frame,
+)
+
+RAW_DATA = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "Maternal Health Risk Data Set.csv")
+
+
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_csv(RAW_DATA)
+
+
+def validate_in_memory(path, engine):
+    validated_data, _ = validate_frame(pd.read_csv(path), engine)
+    validated_data, dropped = drop_unstorable_rows(validated_data)
+    return apply_dtypes(validated_data), storage_error_message(dropped)
+
+
+def validate_chunked(path, engine, tmp_path):
+    output_file = str(tmp_path / "validated_data.csv")
+    _, _, storage_message = validate_csv_in_chunks(path, output_file, chunk_size=200, engine=engine)
+    return read_table(output_file, dtypes=COMPACT_DTYPES), storage_message
+
+
+def dropped_values(storage_message):
+    return {error["column"]: error["error"].split(": ")[-1] for error in json.loads(storage_message)["STORAGE"]}
+
+
+@pytest.mark.parametrize("engine", VALIDATION_ENGINES)
+@pytest.mark.parametrize("value, column", [(25.5, "Age"), ("abc", "HeartRate")])
+def test_unstorable_rows_are_dropped(raw_df, tmp_path, engine, value, column):
+    path = str(tmp_path / "raw.csv")
+    edited = raw_df.astype({column: object})
+    edited.loc[3, column] = value
+    edited.to_csv(path, index=False)
+    expected, _ = validate_in_memory(RAW_DATA, engine)
+
+    validated_data, storage_message = validate_in_memory(path, engine)
+    assert dropped_values(storage_message) == {column: str(value)}
+    assert validated_data.dtypes.to_dict() == COMPACT_DTYPES
+    assert str(value) not in validated_data[column].astype(str).tolist()
+    if column == "Age":
+        # only the edited row is lost
+        assert len(validated_data) == len(expected) - 1
+
+    chunked, chunked_message = validate_chunked(path, engine, tmp_path)
+    assert chunked_message == storage_message
+    assert chunked.dtypes.to_dict() == COMPACT_DTYPES
+
+
+def test_storable_data_is_kept(raw_df):
+    validated_data, dropped = drop_unstorable_rows(raw_df)
+    assert validated_data is raw_df
+    assert dropped.empty and storage_error_message(dropped) is None
+    assert np.array_equal(apply_dtypes(validated_data).to_numpy(), raw_df.to_numpy())
+
+
+@pytest.mark.parametrize("engine", VALIDATION_ENGINES)
+def test_chunked_missing_column_is_reported(raw_df, tmp_path, engine):
+    path = str(tmp_path / "raw.csv")
+    raw_df.drop(columns="HeartRate").to_csv(path, index=False)
+    expected, expected_message = validate_frame(pd.read_csv(path), "pandera")
+
+    output_file = str(tmp_path / "validated_data.csv")
+    n_written, error_message, _ = validate_csv_in_chunks(path, output_file, chunk_size=200, engine=engine)
+    assert error_message == expected_message
+    assert "column 'HeartRate' not in dataframe" in error_message
+    assert n_written == len(expected)
+    pd.testing.assert_frame_equal(pd.read_csv(output_file), expected.reset_index(drop=True))
+
+
+def test_vectorized_missing_column_matches_pandera(raw_df):
+    data = raw_df.drop(columns="HeartRate")
+    expected, expected_message = validate_frame(data, "pandera")
+    validated_data, error_message = validate_frame(data, "vectorized")
+    assert error_message == expected_message
+    assert "column 'HeartRate' not in dataframe" in error_message
+    pd.testing.assert_frame_equal(validated_data, expected)
@@ -0,0 +1,75 @@
+"""Compare the exact SVC with the Nystroem + SGD approximation as the number
+of training rows grows.
+
+For every size, synthetic training rows following the validated data
+(``src/synthetic.py``) are drawn, and the pipeline of ``--pipeline-from``
+(its preprocessor and selected C and gamma) is refitted on them with each
+engine of ``src.tuning.KERNEL_ENGINES``: the exact ``SVC``, and
+``NystroemSVC`` (``src/approximate_kernel.py``). Both are scored on the same
+held-out synthetic test set. The training time and the weighted recall (the
+search's scoring, which equals the accuracy) are printed. The exact SVC only
+runs up to ``--max-exact-rows`` rows, since its training time grows with the
+square to cube of the rows.
+
+Example command line usage:
+python utils/benchmark_approximate_kernel.py --validated-data=data/processed/validated_data.csv --pipeline-from=results/models/maternal_risk_classifier.pickle --sizes="1000,10000,30000,100000,1000000"
+
+"""
+
+import os
+import sys
+import time
+import click
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import recall_score
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import read_table
+from src.inference import load_pipeline
+from src.schema import COMPACT_DTYPES, FEATURE_COLS, apply_dtypes
+from src.synthetic import class_profiles, generate_rows
+from src.tuning import KERNEL_ENGINES, make_classifier
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data the synthetic rows follow (any format)")
+@click.option("--pipeline-from", type=str, required=True, help="Path to the fitted search or pipeline whose preprocessor, C and gamma are used")
+@click.option("--sizes", type=str, default="1000,10000,30000,100000,1000000", help="Comma-separated numbers of training rows")
+@click.option("--test-rows", type=int, default=20000, help="Number of synthetic test rows")
+@click.option("--max-exact-rows", type=int, default=30000, help="Largest size the exact SVC is trained on")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, pipeline_from, sizes, test_rows, max_exact_rows, seed):
+    """print the training time and weighted recall of both engines at every size"""
+    pipeline = load_pipeline(pipeline_from)
+    svc = pipeline[-1]
+    profiles = class_profiles(read_table(validated_data))
+    # the test rows are drawn with a different seed from the training rows
+    test_df = apply_dtypes(generate_rows(profiles, test_rows, seed + 1), COMPACT_DTYPES)
+
+    rows = []
+    for n_rows in sorted(int(size) for size in sizes.split(",")):
+        train_df = apply_dtypes(generate_rows(profiles, n_rows, seed), COMPACT_DTYPES)
+        for engine in KERNEL_ENGINES:
+            if engine == "exact" and n_rows > max_exact_rows:
+                continue
+            model = clone(pipeline).set_params(svc=make_classifier(engine, random_state=seed))
+            model.set_params(svc__C=svc.C, svc__gamma=svc.gamma)
+            start = time.perf_counter()
+            model.fit(train_df[FEATURE_COLS], train_df["RiskLevel"])
+            elapsed = time.perf_counter() - start
+            predicted = model.predict(test_df[FEATURE_COLS])
+            rows.append({
+                "rows": n_rows,
+                "engine": engine,
+                "fit_s": elapsed,
+                "recall_weighted": recall_score(test_df["RiskLevel"], predicted, average="weighted"),
+            })
+            print(f"{engine:<9} {n_rows:>10} rows {elapsed:>9.2f}s  recall_weighted {rows[-1]['recall_weighted']:.3f}",
+                  flush=True)
+    print()
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Time the vectorized bootstrap intervals of the evaluator against a loop.
+
+The fitted model scores the test data once. ``src.evaluation.bootstrap_metrics``
+then computes the scores and AUCs of ``--n-resamples`` resamples, with each
+value of ``--jobs``. The first ``--n-checked`` resamples are also
+recomputed one at a time with sklearn's ``accuracy_score``,
+``recall_score``, ``fbeta_score`` and ``roc_auc_score`` on the same indices,
+which gives the time per resample of a loop. The script fails if any value
+differs, or if the result depends on the number of jobs.
+
+Example command line usage:
+python utils/benchmark_bootstrap.py --pipeline-from=results/models/maternal_risk_classifier.pickle --test-data=data/processed/maternal_health_risk_test.csv --n-resamples=10000 --jobs="1,2,4"
+
+"""
+
+import os
+import pickle
+import sys
+import time
+import click
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, fbeta_score, recall_score, roc_auc_score
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import read_table
+from src.evaluation import EvaluationAccumulator, bootstrap_metrics, model_scores
+from src.schema import COMPACT_DTYPES
+
+
+def loop_metrics(true, pred, y_score, indices):
+    """
+    The metrics of every row of ``indices``, one sklearn call per metric.
+    """
+    results = {"accuracy": [], "recall_weighted": [], "F2_weighted": [],
+               **{k: [] for k in range(y_score.shape[1])}}
+    for sample in indices:
+        t, p = true[sample], pred[sample]
+        results["accuracy"].append(accuracy_score(t, p))
+        results["recall_weighted"].append(recall_score(t, p, average="weighted"))
+        results["F2_weighted"].append(fbeta_score(t, p, beta=2, average="weighted"))
+        for k in range(y_score.shape[1]):
+            results[k].append(roc_auc_score(t == k, y_score[sample, k]))
+    return {name: np.array(values) for name, values in results.items()}
+
+
+@click.command()
+@click.option("--pipeline-from", type=str, required=True, help="Path to the pickled fitted pipeline or search object")
+@click.option("--test-data", type=str, required=True, help="Path to the test data (any format)")
+@click.option("--n-resamples", type=int, default=10_000, help="Number of bootstrap resamples")
+@click.option("--jobs", type=str, default="1,2", help="Comma-separated numbers of processes to time")
+@click.option("--n-checked", type=int, default=200, help="Resamples recomputed with sklearn")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(pipeline_from, test_data, n_resamples, jobs, n_checked, seed):
+    """print the time of the vectorized bootstrap per number of jobs and of a per-resample sklearn loop"""
+    with open(pipeline_from, "rb") as f:
+        model = pickle.load(f)
+    test_df = read_table(test_data, dtypes=COMPACT_DTYPES)
+    y_score, y_pred = model_scores(model, test_df.drop(columns=["RiskLevel"]))
+    evaluation = EvaluationAccumulator(model.classes_)
+    evaluation.update(test_df["RiskLevel"], y_score, y_pred)
+    true, pred = evaluation._codes(test_df["RiskLevel"]), evaluation._codes(y_pred)
+    n_classes = len(model.classes_)
+
+    rows, results = [], {}
+    for n_jobs in [int(j) for j in jobs.split(",")]:
+        start = time.perf_counter()
+        results[n_jobs] = bootstrap_metrics(true, pred, y_score, n_classes, n_resamples, seed, n_jobs)
+        rows.append({"method": f"vectorized, {n_jobs} job(s)", "resamples": n_resamples,
+                     "wall_s": time.perf_counter() - start})
+    first, *others = results.values()
+    for other in others:
+        assert all(np.array_equal(first[name], other[name], equal_nan=True) for name in first), \
+            "result depends on the number of jobs"
+
+    # the first block's indices, drawn as bootstrap_metrics draws them
+    block_seed = np.random.SeedSequence(seed).spawn(1)[0]
+    indices = np.random.default_rng(block_seed).integers(0, len(true), size=(n_checked, len(true)))
+    start = time.perf_counter()
+    expected = loop_metrics(true, pred, y_score, indices)
+    loop_s = time.perf_counter() - start
+    rows.append({"method": "sklearn loop (extrapolated)", "resamples": n_resamples,
+                 "wall_s": loop_s / n_checked * n_resamples})
+    checked = bootstrap_metrics(true, pred, y_score, n_classes, n_checked, seed, block_size=n_checked)
+    for name, values in expected.items():
+        assert np.allclose(checked[name], values, rtol=1e-12), f"{name} differs from sklearn"
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.3f"))
+    print()
+    print(evaluation.bootstrap_intervals(n_resamples, seed=seed).to_string(float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    main()
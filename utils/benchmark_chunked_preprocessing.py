@@ -0,0 +1,92 @@
+"""Compare the in-memory and chunked modes of ``split_preprocess_data.py``.
+
+Synthetic validated data of ``--n-rows`` rows (``src/synthetic.py``) is split
+with ``--split-mode=hash`` twice: once loading the tables to fit and apply the
+preprocessor, once with ``--chunk-size``, which fits it with ``partial_fit``
+and writes the scaled tables chunk by chunk (``src/scaling.py``). The wall
+time and peak memory of each run come from its ``--profile`` trace. The script
+fails if the pickled preprocessors' statistics or the scaled tables differ by
+more than ``--rtol``.
+
+Example command line usage:
+python utils/benchmark_chunked_preprocessing.py --validated-data=data/processed/validated_data.csv --n-rows=5000000 --chunk-size=500000
+
+"""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import click
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import read_table, write_table
+from src.schema import COMPACT_DTYPES, apply_dtypes
+from src.synthetic import class_profiles, generate_rows
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCALER_ATTRIBUTES = ["mean_", "var_", "scale_", "n_samples_seen_"]
+
+
+def run_split(validated_data, workdir, chunk_size=None):
+    """
+    Run ``split_preprocess_data.py --split-mode=hash`` into ``workdir`` and
+    return its wall time and peak memory.
+    """
+    trace_path = os.path.join(workdir, "profile.json")
+    argv = [
+        sys.executable, "scripts/split_preprocess_data.py",
+        f"--validated-data={validated_data}", f"--data-to={workdir}", f"--preprocessor-to={workdir}",
+        "--data-format=parquet", "--split-mode=hash", "--profile", f"--profile-to={trace_path}",
+    ] + ([f"--chunk-size={chunk_size}"] if chunk_size else [])
+    subprocess.run(argv, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with open(trace_path) as f:
+        trace = json.load(f)
+    phases = {e["name"]: e["dur"] / 1e6 for e in trace["traceEvents"] if e["ph"] == "X"}
+    return {"wall_s": phases["split_preprocess_data"], "scaler_fit_s": phases["scaler fit"],
+            "peak_rss_mb": trace["otherData"]["peak_rss_mb"]}
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data the synthetic rows follow (any format)")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of synthetic rows")
+@click.option("--chunk-size", type=int, default=100_000, help="Rows per chunk of the chunked run")
+@click.option("--rtol", type=float, default=1e-6, help="Largest accepted relative difference")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, n_rows, chunk_size, rtol, seed):
+    """print the time and peak memory of both modes and check that they write the same preprocessor and tables"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "validated_data.parquet")
+        data = generate_rows(class_profiles(read_table(validated_data)), n_rows, seed)
+        write_table(apply_dtypes(data, COMPACT_DTYPES), data_path)
+
+        rows, preprocessors = [], {}
+        for mode, size in [("in memory", None), (f"chunks of {chunk_size}", chunk_size)]:
+            workdir = os.path.join(tmp, str(size))
+            rows.append({"mode": mode, "rows": n_rows, **run_split(data_path, workdir, size)})
+            with open(os.path.join(workdir, "maternal_risk_preprocessor.pickle"), "rb") as f:
+                preprocessors[size] = pickle.load(f)
+        print(pd.DataFrame(rows).to_string(index=False, float_format="%.3f"))
+
+        expected, actual = preprocessors[None], preprocessors[chunk_size]
+        assert list(expected.get_feature_names_out()) == list(actual.get_feature_names_out()), "different features"
+        for name in SCALER_ATTRIBUTES:
+            a = getattr(expected.named_transformers_["standardscaler"], name)
+            b = getattr(actual.named_transformers_["standardscaler"], name)
+            assert np.allclose(a, b, rtol=rtol, atol=0), f"scaler {name} differs"
+            print(f"scaler {name}: largest relative difference {np.max(np.abs(a - b) / np.abs(a)):.1e}")
+        for table in ["scaled_maternal_health_risk_train", "scaled_maternal_health_risk_test"]:
+            a = read_table(os.path.join(tmp, "None", f"{table}.parquet"))
+            b = read_table(os.path.join(tmp, str(chunk_size), f"{table}.parquet"))
+            assert a["RiskLevel"].equals(b["RiskLevel"]), f"{table}: labels differ"
+            features = a.columns.drop("RiskLevel")
+            assert np.allclose(a[features], b[features], rtol=rtol, atol=rtol), f"{table}: values differ"
+        print("preprocessors and scaled tables agree")
+
+
+if __name__ == "__main__":
+    main()
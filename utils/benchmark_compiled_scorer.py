@@ -0,0 +1,86 @@
+"""Check the compiled NumPy scorer against the sklearn pipeline and compare latency.
+
+Example command line usage:
+python utils/benchmark_compiled_scorer.py --pipeline-from=results/models/maternal_risk_classifier.pickle --test-data=data/processed/maternal_health_risk_test.csv
+
+"""
+
+import warnings
+warnings.filterwarnings("ignore")
+
+import os
+import sys
+import time
+import click
+import numpy as np
+import pandas as pd
+from sklearn import set_config
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.inference import load_pipeline
+from src.compiled_scorer import compile_pipeline
+from src.schema import COMPACT_DTYPES
+from src.data_io import read_table
+
+
+def check_agreement(pipeline, scorer, X, atol=1e-6):
+    """
+    Check that the compiled scorer reproduces the pipeline's predictions
+    exactly and its decision scores within ``atol``.
+
+    Returns:
+        float: The maximum absolute difference between decision scores.
+
+    Raises:
+        AssertionError: If any prediction differs or a decision score differs
+        by more than ``atol``.
+    """
+    n_mismatch = int((pipeline.predict(X) != scorer.predict(X)).sum())
+    assert n_mismatch == 0, f"{n_mismatch} predictions differ from the sklearn pipeline."
+    max_diff = np.abs(pipeline.decision_function(X) - scorer.decision_function(X)).max()
+    assert max_diff <= atol, f"Decision scores differ by up to {max_diff:.3g}."
+    return max_diff
+
+
+def median_latency(fn, X, repeats):
+    """Median wall time in milliseconds of ``fn(X)`` over ``repeats`` calls."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+@click.command()
+@click.option("--pipeline-from", type=str, required=True, help="Path to the fitted pipeline object (pickle)")
+@click.option("--test-data", type=str, required=True, help="Path to a CSV, Parquet or Feather file of records with the feature columns")
+@click.option("--batch-sizes", type=str, default="1,10,100,1000,10000", help="Comma-separated batch sizes to time")
+@click.option("--repeats", type=int, default=50, help="Number of timed calls per batch size")
+def main(pipeline_from, test_data, batch_sizes, repeats):
+    """verify the compiled scorer and print sklearn vs compiled latency per batch size"""
+    # the evaluator scores with pandas output enabled, so time the sklearn path the same way
+    set_config(transform_output="pandas")
+    pipeline = load_pipeline(pipeline_from)
+    scorer = compile_pipeline(pipeline)
+    X = read_table(test_data, columns=list(pipeline.feature_names_in_), dtypes=COMPACT_DTYPES)
+
+    max_diff = check_agreement(pipeline, scorer, X)
+    print(f"Agreement on {len(X)} rows: identical predictions, max decision difference {max_diff:.3g}")
+
+    rows = []
+    for n in [int(b) for b in batch_sizes.split(",")]:
+        batch = X.sample(n, replace=n > len(X), random_state=123).reset_index(drop=True)
+        sklearn_ms = median_latency(pipeline.decision_function, batch, repeats)
+        compiled_ms = median_latency(scorer.decision_function, batch, repeats)
+        rows.append({
+            "batch_size": n,
+            "sklearn_ms": sklearn_ms,
+            "compiled_ms": compiled_ms,
+            "speedup": sklearn_ms / compiled_ms,
+        })
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Check the native correlation checks of ``eda.py`` against the model-based ones.
+
+``src.correlation_checks`` computes the predictive power scores (PPS) of the
+feature-label check without fitting a model. This script computes them
+again the way ``ppscore`` (used by deepchecks' ``FeatureLabelCorrelation``)
+does, with a ``DecisionTreeClassifier`` per feature, ``cross_val_score`` and
+``f1_score``, and fails if any score differs. If deepchecks is installed, its
+``FeatureLabelCorrelation`` and ``FeatureFeatureCorrelation`` checks are run
+too, and the script fails if their scores, correlations or pass/fail results
+differ from the native ones. The time of each implementation is reported for
+the training data and for the training data resampled to ``--n-rows`` rows.
+
+Example command line usage:
+python utils/benchmark_correlation_checks.py --training-data=data/processed/maternal_health_risk_train.csv --n-rows=1000000
+
+"""
+
+import os
+import sys
+import time
+import click
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+from sklearn.model_selection import cross_val_score
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.correlation_checks import (
+    PPS_THRESHOLD, CORRELATION_THRESHOLD, feature_label_check, feature_feature_check,
+)
+from src.data_io import read_table
+from src.schema import COMPACT_DTYPES
+
+
+def reference_pps(data, label="RiskLevel", sample=5000, cv=4, random_state=42):
+    """
+    PPS of every feature computed like ``ppscore.score`` for a
+    classification target.
+    """
+    scores = {}
+    for feature in data.columns.drop(label):
+        df = data[[feature, label]].dropna()
+        if sample and len(df) > sample:
+            df = df.sample(sample, random_state=random_state)
+        df[label] = df[label].astype(str)
+        shuffled = df.sample(frac=1, random_state=random_state)
+        target = LabelEncoder().fit_transform(shuffled[label])
+        model_score = cross_val_score(
+            DecisionTreeClassifier(), shuffled[feature].to_numpy().reshape(-1, 1), target,
+            cv=cv, scoring="f1_weighted",
+        ).mean()
+        naive = np.full(len(df), df[label].value_counts().index[0])
+        random = df[label].sample(frac=1, random_state=random_state)
+        baseline = max(
+            f1_score(df[label], naive, average="weighted"),
+            f1_score(df[label], random, average="weighted"),
+        )
+        scores[feature] = max(0.0, (model_score - baseline) / (1 - baseline))
+    return pd.Series(scores, name="pps").sort_values(ascending=False)
+
+
+def deepchecks_results(data, label="RiskLevel"):
+    """
+    PPS, correlation matrix and pass/fail of the deepchecks checks, or None
+    if deepchecks is not installed.
+    """
+    try:
+        from deepchecks.tabular import Dataset
+        from deepchecks.tabular.checks import FeatureLabelCorrelation, FeatureFeatureCorrelation
+    except ImportError:
+        return None
+    dataset = Dataset(data, label=label, cat_features=[])
+    feature_label = FeatureLabelCorrelation().add_condition_feature_pps_less_than(PPS_THRESHOLD).run(dataset)
+    feature_feature = FeatureFeatureCorrelation().add_condition_max_number_of_pairs_above_threshold(
+        threshold=CORRELATION_THRESHOLD, n_pairs=0
+    ).run(dataset)
+    return {
+        "pps": pd.Series(feature_label.value["train"]),
+        "correlation": feature_feature.value,
+        "feature_label_passed": feature_label.passed_conditions(),
+        "feature_feature_passed": feature_feature.passed_conditions(),
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+@click.command()
+@click.option("--training-data", type=str, required=True, help="Path to the training data (any format)")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of rows of the resampled training data")
+@click.option("--seed", type=int, default=123, help="Random seed of the resampling")
+def main(training_data, n_rows, seed):
+    """print the time of the native and the model-based correlation checks and fail if they disagree"""
+    train_df = read_table(training_data, dtypes=COMPACT_DTYPES)
+    resampled = train_df.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+
+    rows = []
+    for name, data in [("training data", train_df), (f"{n_rows} rows", resampled)]:
+        native_s, (label_passed, pps) = timed(lambda: feature_label_check(data))
+        feature_s, (feature_passed, pairs, correlation) = timed(lambda: feature_feature_check(data))
+        reference_s, expected = timed(lambda: reference_pps(data))
+        assert np.allclose(pps[expected.index], expected, atol=1e-12), f"{name}: PPS differ\n{pps}\n{expected}"
+        rows.append({"data": name, "implementation": "native", "feature_label_s": native_s,
+                     "feature_feature_s": feature_s, "max_pps": pps.max(), "passed": label_passed and feature_passed})
+        rows.append({"data": name, "implementation": "decision trees", "feature_label_s": reference_s,
+                     "feature_feature_s": np.nan, "max_pps": expected.max(), "passed": bool((expected < PPS_THRESHOLD).all())})
+
+        deepchecks_s, deepchecks = timed(lambda: deepchecks_results(data))
+        if deepchecks is not None:
+            assert np.allclose(pps[deepchecks["pps"].index], deepchecks["pps"], atol=1e-9), f"{name}: PPS differ from deepchecks"
+            assert np.allclose(correlation, deepchecks["correlation"].loc[correlation.index, correlation.columns].astype(float)), \
+                f"{name}: correlations differ from deepchecks"
+            assert (label_passed, feature_passed) == (deepchecks["feature_label_passed"], deepchecks["feature_feature_passed"]), \
+                f"{name}: pass/fail differs from deepchecks"
+            rows.append({"data": name, "implementation": "deepchecks", "feature_label_s": deepchecks_s,
+                         "feature_feature_s": np.nan, "max_pps": deepchecks["pps"].max(),
+                         "passed": deepchecks["feature_label_passed"] and deepchecks["feature_feature_passed"]})
+        print(f"{name}: PPS {pps.round(4).to_dict()}, feature pairs above {CORRELATION_THRESHOLD}: {pairs}")
+    if deepchecks is None:
+        print("deepchecks is not installed; compared with the decision-tree reference only")
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.4g"))
+
+
+if __name__ == "__main__":
+    main()
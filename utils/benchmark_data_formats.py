@@ -0,0 +1,100 @@
+"""Compare the CSV, Parquet and Feather formats for the pipeline's intermediate tables.
+
+The validated data is resampled to the requested size and split and scaled
+like ``split_preprocess_data.py`` does, giving the tables every stage hands
+to the next one, with the compact dtypes of ``src.schema``. Each table is
+written and read back in every format of ``src.data_io``; the best of
+``--repeats`` write and read times, the time to read only the feature
+columns and the size on disk are reported. The script fails if a table does
+not read back with the values and dtypes it was written with.
+
+Example command line usage:
+python utils/benchmark_data_formats.py --validated-data=data/processed/validated_data.csv --n-rows=1000000
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+import click
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import DATA_FORMATS, table_path, read_table, write_table
+from src.schema import FEATURE_COLS, COMPACT_DTYPES, SCALED_DTYPES, apply_dtypes
+
+
+def stage_tables(validated_df, n_rows, seed):
+    """
+    The validated, train/test and scaled train/test tables for ``n_rows``
+    resampled rows, with the dtypes they are read with.
+    """
+    validated = validated_df.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    train, test = train_test_split(validated, test_size=0.3, random_state=seed, stratify=validated["RiskLevel"])
+    scaler = StandardScaler().fit(train[FEATURE_COLS])
+    scaled = {}
+    for name, split in [("train", train), ("test", test)]:
+        scaled[name] = pd.DataFrame(scaler.transform(split[FEATURE_COLS]), columns=FEATURE_COLS)
+        scaled[name]["RiskLevel"] = split["RiskLevel"].values
+        scaled[name] = apply_dtypes(scaled[name], SCALED_DTYPES)
+    return {
+        "validated_data": (validated, COMPACT_DTYPES),
+        "maternal_health_risk_train": (train, COMPACT_DTYPES),
+        "maternal_health_risk_test": (test, COMPACT_DTYPES),
+        "scaled_maternal_health_risk_train": (scaled["train"], SCALED_DTYPES),
+        "scaled_maternal_health_risk_test": (scaled["test"], SCALED_DTYPES),
+    }
+
+
+def best_time(fn, repeats):
+    """
+    Best wall time of ``repeats`` calls, and the last result.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data (any format)")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of rows of the validated table")
+@click.option("--repeats", type=int, default=3, help="Timing repeats; the best is reported")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, n_rows, repeats, seed):
+    """print the write/read time and size of every stage's table in every format"""
+    tables = stage_tables(read_table(validated_data, dtypes=COMPACT_DTYPES), n_rows, seed)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for stage, (data, dtypes) in tables.items():
+            for data_format in DATA_FORMATS:
+                path = table_path(tmp, stage, data_format)
+                write_s, _ = best_time(lambda: write_table(data, path), repeats)
+                read_s, read_back = best_time(lambda: read_table(path, dtypes=dtypes), repeats)
+                features_s, _ = best_time(lambda: read_table(path, columns=FEATURE_COLS, dtypes=dtypes), repeats)
+                pd.testing.assert_frame_equal(read_back, data.reset_index(drop=True), check_exact=False)
+                rows.append({
+                    "stage": stage,
+                    "format": data_format,
+                    "rows": len(data),
+                    "write_s": write_s,
+                    "read_s": read_s,
+                    "read_features_s": features_s,
+                    "size_mb": os.path.getsize(path) / 1e6,
+                })
+    results = pd.DataFrame(rows)
+    csv = results[results["format"] == "csv"].set_index("stage")
+    results["read_speedup"] = csv.loc[results["stage"], "read_s"].values / results["read_s"]
+    print(results.to_string(index=False, float_format="%.3f"))
+    print()
+    print(results.groupby("format", sort=False)[["write_s", "read_s", "read_features_s", "size_mb"]].sum().to_string(float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the ``kde`` and ``binned`` density engines of ``eda.py``.
+
+The training data is resampled to each of the requested sizes and the
+feature density grid of ``eda.py`` is drawn with ``sns.kdeplot`` and from
+``src.density.class_densities`` (and, if ``--density-sample`` is given, with the
+binned engine on a stratified sample). The time to draw and save each figure
+is reported. ``kdeplot`` is only run up to ``--max-kde-rows`` rows, as its time
+grows with the number of rows. The script fails if a binned curve differs
+from the ``kdeplot`` curve by more than ``--tolerance`` of its peak.
+
+Example command line usage:
+python utils/benchmark_density.py --training-data=data/processed/maternal_health_risk_train.csv --sizes="10000,100000,1000000,10000000"
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+import click
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import read_table
+from src.density import stratified_sample, class_densities
+from src.figures import draw_densities
+from src.schema import FEATURE_COLS, COMPACT_DTYPES
+
+
+def density_grid(data, engine, path):
+    """
+    Draw and save the feature density grid; returns the figure's curves.
+    """
+    fig, axes = plt.subplots(2, 3, figsize=(12, 8), squeeze=False)
+    levels = list(data["RiskLevel"].cat.categories)
+    for ax, feature in zip(axes.flat, FEATURE_COLS):
+        if engine == "binned":
+            draw_densities(ax, feature, class_densities(data, feature, "RiskLevel"), levels)
+        else:
+            sns.kdeplot(data=data, x=feature, hue="RiskLevel", fill=True, alpha=0.4, ax=ax)
+        ax.set_title(f"{feature} distribution by RiskLevel")
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    curves = [[area.get_paths()[0].vertices for area in ax.collections] for ax in axes.flat]
+    plt.close(fig)
+    return curves
+
+
+def max_difference(expected, actual):
+    """
+    Largest difference between matching curves, relative to their peak.
+    """
+    worst = 0.0
+    for expected_areas, actual_areas in zip(expected, actual):
+        assert len(expected_areas) == len(actual_areas), "different number of classes drawn"
+        for a, b in zip(expected_areas, actual_areas):
+            worst = max(worst, np.abs(a - b).max(axis=0)[1] / np.abs(a[:, 1]).max())
+    return worst
+
+
+@click.command()
+@click.option("--training-data", type=str, required=True, help="Path to the training data (any format)")
+@click.option("--sizes", type=str, default="10000,100000,1000000", help="Comma-separated numbers of rows")
+@click.option("--max-kde-rows", type=int, default=200_000, help="Largest size drawn with sns.kdeplot")
+@click.option("--density-sample", type=int, default=None, help="Also time the binned engine on a stratified sample of this many rows")
+@click.option("--tolerance", type=float, default=1e-3, help="Largest accepted difference, relative to the peak density")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(training_data, sizes, max_kde_rows, density_sample, tolerance, seed):
+    """print the time to draw the density grid with each engine as the training set grows"""
+    train_df = read_table(training_data, dtypes=COMPACT_DTYPES)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feature_densities_by_risklevel.png")
+        for n_rows in [int(size) for size in sizes.split(",")]:
+            data = train_df.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+            runs = [("binned", "binned", data)]
+            if n_rows <= max_kde_rows:
+                runs.insert(0, ("kde", "kde", data))
+            if density_sample is not None:
+                runs.append((f"binned, {density_sample} sampled", "binned",
+                             stratified_sample(data, "RiskLevel", density_sample, seed)))
+            curves = {}
+            for name, engine, frame in runs:
+                start = time.perf_counter()
+                curves[name] = density_grid(frame, engine, path)
+                wall = time.perf_counter() - start
+                difference = max_difference(curves["kde"], curves[name]) if "kde" in curves else np.nan
+                rows.append({"rows": n_rows, "engine": name, "wall_s": wall, "max_rel_diff": difference})
+            if "kde" in curves:
+                difference = max_difference(curves["kde"], curves["binned"])
+                assert difference <= tolerance, f"{n_rows} rows: binned densities differ by {difference:.2e}"
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.3g"))
+
+
+if __name__ == "__main__":
+    main()
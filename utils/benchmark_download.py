@@ -0,0 +1,155 @@
+"""Time the download cache of ``download_data.py`` against a local server.
+
+A zip holding the raw data CSV and a large filler member is served by a local
+HTTP server that sends an ETag, answers conditional and range requests, and
+can cut the connection part way through a response. The script reports the
+wall time and peak Python memory of a plain ``requests.get`` download and of
+``src.download.download_file`` for a cold download, a rerun that gets
+``304 Not Modified``, a rerun with a known SHA-256 and a transfer cut in
+half. The behaviour of each case is checked by ``tests/test_download.py``.
+
+Example command line usage:
+python utils/benchmark_download.py --raw-data="data/raw/Maternal Health Risk Data Set.csv" --size-mb=50
+
+"""
+
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import click
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.download import download_file
+
+
+class ArchiveServer(ThreadingHTTPServer):
+    """
+    Serves one file at ``/<name>``. ``cut_after`` bytes into the next full
+    or partial response, the connection is closed (once).
+    """
+
+    def __init__(self, path):
+        super().__init__(("127.0.0.1", 0), ArchiveHandler)
+        self.path = path
+        self.cut_after = None
+        self.reload()
+
+    def reload(self):
+        with open(self.path, "rb") as f:
+            self.data = f.read()
+        self.etag = '"' + hashlib.sha256(self.data).hexdigest()[:16] + '"'
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/{os.path.basename(self.path)}"
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", server.etag) == server.etag:
+            start = int(range_header.split("=")[1].split("-")[0])
+        body = memoryview(server.data)[start:]
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(server.data) - 1}/{len(server.data)}")
+        self.end_headers()
+        if server.cut_after is not None:
+            body, server.cut_after = body[:server.cut_after], None
+            self.close_connection = True
+        self.wfile.write(body)
+
+
+def make_archive(path, raw_data, member, size_mb, seed):
+    """
+    A zip with the raw data CSV and an incompressible filler member.
+    """
+    filler = random.Random(seed).randbytes(size_mb << 20)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(raw_data, member)
+        archive.writestr("filler.bin", filler, compress_type=zipfile.ZIP_STORED)
+
+
+def measure(fn):
+    """
+    Wall time, peak traced memory in MB and result of ``fn()``.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return wall, peak, result
+
+
+@click.command()
+@click.option("--raw-data", type=str, required=True, help="Path to the raw data CSV to put in the archive")
+@click.option("--size-mb", type=int, default=50, help="Size of the filler member in MiB")
+@click.option("--seed", type=int, default=123, help="Random seed of the filler")
+def main(raw_data, size_mb, seed):
+    """print the time and peak memory of each download path"""
+    member = os.path.basename(raw_data)
+    with tempfile.TemporaryDirectory() as tmp:
+        served = os.path.join(tmp, "served", "archive.zip")
+        os.makedirs(os.path.dirname(served))
+        make_archive(served, raw_data, member, size_mb, seed)
+        server = ArchiveServer(served)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        out = os.path.join(tmp, "raw")
+        os.makedirs(out)
+        zip_path = os.path.join(out, "archive.zip")
+        size = len(server.data)
+
+        def plain_get():
+            with open(os.path.join(tmp, "plain.zip"), "wb") as f:
+                f.write(requests.get(server.url).content)
+
+        rows = []
+        wall, peak, _ = measure(plain_get)
+        rows.append(("requests.get (previous)", "downloaded", wall, peak))
+
+        wall, peak, status = measure(lambda: download_file(server.url, zip_path))
+        rows.append(("download_file, cold", status, wall, peak))
+
+        wall, peak, status = measure(lambda: download_file(server.url, zip_path))
+        rows.append(("download_file, unchanged (304)", status, wall, peak))
+
+        sha256 = hashlib.sha256(server.data).hexdigest()
+        wall, peak, status = measure(lambda: download_file(server.url, zip_path, expected_sha256=sha256))
+        rows.append(("download_file, known SHA-256", status, wall, peak))
+
+        os.remove(zip_path)
+        server.cut_after = size // 2
+        wall, peak, status = measure(lambda: download_file(server.url, zip_path))
+        rows.append(("download_file, cut at 50%", status, wall, peak))
+        server.shutdown()
+
+    print(f"{'case':<32} {'status':<11} {'wall_s':>7} {'peak_mb':>8}")
+    for case, status, wall, peak in rows:
+        print(f"{case:<32} {status:<11} {wall:>7.3f} {peak:>8.1f}")
+    print(f"archive of {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
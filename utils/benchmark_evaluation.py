@@ -0,0 +1,114 @@
+"""Compare the single-pass evaluation engine with the per-metric sklearn calls.
+
+The test data is resampled to ``--n-rows`` rows and evaluated twice: the way
+``evaluate_maternal_health_risk_classifier.py`` used to, with ``score``,
+``predict`` and ``decision_function`` (three passes of the model) and
+``recall_score``, ``fbeta_score``, ``roc_auc_score`` and ``roc_curve`` per
+class, and with ``src.evaluation.EvaluationAccumulator`` fed one
+``decision_function`` pass in chunks of ``--chunk-size`` rows. The script
+reports the time of each and fails if the scores, confusion counts, AUCs or
+ROC curves differ; it also reports how far the AUCs of the histogram mode
+(``--roc-bins``) are from the exact ones.
+
+Example command line usage:
+python utils/benchmark_evaluation.py --pipeline-from=results/models/maternal_risk_classifier.pickle --test-data=data/processed/maternal_health_risk_test.csv --n-rows=100000
+
+"""
+
+import os
+import pickle
+import sys
+import time
+import click
+import numpy as np
+import pandas as pd
+from sklearn.metrics import fbeta_score, recall_score, roc_auc_score, roc_curve, confusion_matrix
+from sklearn.preprocessing import label_binarize
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import read_table
+from src.evaluation import EvaluationAccumulator, model_scores, score_range
+from src.schema import COMPACT_DTYPES
+
+
+def sklearn_evaluation(model, X, y):
+    """
+    Scores, confusion counts and ROC curves with one sklearn call per metric.
+    """
+    accuracy = model.score(X, y)
+    y_pred = model.predict(X)
+    try:
+        y_score = model.decision_function(X)
+    except AttributeError:
+        y_score = model.predict_proba(X)
+    scores = {
+        "accuracy": accuracy,
+        "recall_weighted": recall_score(y, y_pred, average="weighted"),
+        "F2_weighted": fbeta_score(y, y_pred, beta=2, average="weighted"),
+    }
+    y_bin = label_binarize(y, classes=model.classes_)
+    curves = {}
+    for i, class_name in enumerate(model.classes_):
+        fpr, tpr, _ = roc_curve(y_bin[:, i], y_score[:, i])
+        curves[class_name] = (fpr, tpr, roc_auc_score(y_bin[:, i], y_score[:, i]))
+    return scores, confusion_matrix(y, y_pred, labels=model.classes_), curves
+
+
+def engine_evaluation(model, X, y, chunk_size, n_bins=None):
+    """
+    The same results from ``EvaluationAccumulator``, scoring ``chunk_size``
+    rows at a time.
+    """
+    classes = model.classes_
+    evaluation = EvaluationAccumulator(classes, n_bins, score_range(model, len(classes)) if n_bins else None)
+    for start in range(0, len(X), chunk_size):
+        y_score, y_pred = model_scores(model, X.iloc[start:start + chunk_size])
+        evaluation.update(y.iloc[start:start + chunk_size], y_score, y_pred)
+    return evaluation.scores(beta=2), evaluation.confusion, evaluation.roc_curves()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+@click.command()
+@click.option("--pipeline-from", type=str, required=True, help="Path to the pickled fitted pipeline or search object")
+@click.option("--test-data", type=str, required=True, help="Path to the test data (any format)")
+@click.option("--n-rows", type=int, default=100_000, help="Number of rows of the resampled test data")
+@click.option("--chunk-size", type=int, default=10_000, help="Rows scored at a time by the engine")
+@click.option("--roc-bins", type=int, default=4096, help="Histogram bins of the approximate ROC mode")
+@click.option("--seed", type=int, default=123, help="Random seed of the resampling")
+def main(pipeline_from, test_data, n_rows, chunk_size, roc_bins, seed):
+    """print the time of both evaluations and fail if they give different results"""
+    with open(pipeline_from, "rb") as f:
+        model = pickle.load(f)
+    test_df = read_table(test_data, dtypes=COMPACT_DTYPES)
+    test_df = test_df.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    X, y = test_df.drop(columns=["RiskLevel"]), test_df["RiskLevel"]
+
+    sklearn_s, (expected_scores, expected_counts, expected_curves) = timed(lambda: sklearn_evaluation(model, X, y))
+    engine_s, (scores, counts, curves) = timed(lambda: engine_evaluation(model, X, y, chunk_size))
+    binned_s, (_, _, binned_curves) = timed(lambda: engine_evaluation(model, X, y, chunk_size, roc_bins))
+
+    for name, value in expected_scores.items():
+        assert np.isclose(scores[name], value, rtol=1e-12), f"{name}: {scores[name]} != {value}"
+    assert (counts == expected_counts).all(), f"confusion counts differ\n{counts}\n{expected_counts}"
+    for class_name, (fpr, tpr, auc) in expected_curves.items():
+        got_fpr, got_tpr, got_auc = curves[class_name]
+        assert np.isclose(got_auc, auc, rtol=1e-12), f"{class_name}: AUC {got_auc} != {auc}"
+        assert np.array_equal(got_fpr, fpr) and np.array_equal(got_tpr, tpr), f"{class_name}: ROC curves differ"
+    binned_error = max(abs(binned_curves[c][2] - expected_curves[c][2]) for c in expected_curves)
+
+    print(pd.DataFrame([
+        {"evaluation": "sklearn (3 model passes)", "wall_s": sklearn_s},
+        {"evaluation": f"engine (1 pass, chunks of {chunk_size})", "wall_s": engine_s},
+        {"evaluation": f"engine, {roc_bins} ROC bins", "wall_s": binned_s},
+    ]).to_string(index=False, float_format="%.3f"))
+    print(f"\n{n_rows} rows: scores, confusion counts, AUCs and ROC curves match; "
+          f"largest AUC difference with {roc_bins} bins: {binned_error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
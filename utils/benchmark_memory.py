@@ -0,0 +1,83 @@
+"""Report the memory saved by the compact dtypes of ``src.schema``.
+
+The validated data is resampled to the requested size and split and scaled
+like ``benchmark_data_formats.py`` does. For every table, the in-memory size
+with the dtypes pandas infers from a CSV (int64, float64 and object strings)
+is compared with the size using ``COMPACT_DTYPES`` / ``SCALED_DTYPES``, along
+with the time to read the table from CSV and from Parquet files written
+with each set of dtypes. The script fails if the compact table does not hold
+exactly the same values.
+
+Example command line usage:
+python utils/benchmark_memory.py --validated-data=data/processed/validated_data.csv --n-rows=1000000
+
+"""
+
+import os
+import sys
+import tempfile
+import time
+import click
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import table_path, read_table, write_table
+from src.schema import FEATURE_COLS, COMPACT_DTYPES, inferred_dtypes
+from benchmark_data_formats import stage_tables
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data (any format)")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of rows of the validated table")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, n_rows, seed):
+    """print the memory use and read time of every stage's table with the inferred and the compact dtypes"""
+    tables = stage_tables(read_table(validated_data, dtypes=COMPACT_DTYPES), n_rows, seed)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for stage, (data, dtypes) in tables.items():
+            wide = inferred_dtypes(data)
+            csv_path = table_path(tmp, stage, "csv")
+            wide_path = table_path(tmp, "wide_" + stage, "parquet")
+            compact_path = table_path(tmp, stage, "parquet")
+            write_table(wide, csv_path)
+            write_table(wide, wide_path)
+            write_table(data, compact_path)
+            inferred_csv_s, inferred = timed(lambda: read_table(csv_path))
+            compact_csv_s, compact = timed(lambda: read_table(csv_path, dtypes=dtypes))
+            inferred_parquet_s, _ = timed(lambda: read_table(wide_path))
+            compact_parquet_s, _ = timed(lambda: read_table(compact_path, dtypes=dtypes))
+
+            assert (compact["RiskLevel"].astype(object) == inferred["RiskLevel"]).all(), f"{stage}: RiskLevel changed"
+            for name in FEATURE_COLS:
+                assert (compact[name] == inferred[name]).all(), f"{stage}: {name} changed"
+
+            inferred_mb = inferred.memory_usage(deep=True).sum() / 1e6
+            compact_mb = compact.memory_usage(deep=True).sum() / 1e6
+            rows.append({
+                "stage": stage,
+                "rows": len(data),
+                "inferred_mb": inferred_mb,
+                "compact_mb": compact_mb,
+                "saving": 1 - compact_mb / inferred_mb,
+                "csv_inferred_s": inferred_csv_s,
+                "csv_compact_s": compact_csv_s,
+                "parquet_inferred_s": inferred_parquet_s,
+                "parquet_compact_s": compact_parquet_s,
+            })
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False, float_format="%.3f"))
+    total_inferred, total_compact = results["inferred_mb"].sum(), results["compact_mb"].sum()
+    print(f"\ntotal: {total_inferred:.1f} MB inferred, {total_compact:.1f} MB compact "
+          f"({1 - total_compact / total_inferred:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
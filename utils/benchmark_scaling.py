@@ -0,0 +1,144 @@
+"""Run the pipeline stages on synthetic data of growing size and check them
+against a stored baseline.
+
+For every size, ``utils/generate_synthetic_data.py``'s generator writes a raw
+data file of that many rows following the validated data, and the
+``validate``, ``split``, ``eda``, ``fit`` and ``evaluate`` stages of
+``scripts/run_pipeline.py`` run on it one after the other, with the pipeline's
+parameters and ``--profile``. Their files go to a temporary directory. The
+wall time and peak resident memory of every stage are read from its trace
+(``src/profiling.py``; memory of worker processes is not included). The SVC
+search only runs up to ``--max-fit-rows`` rows (and on the smallest size);
+larger sizes are evaluated with the model fitted on the largest size that
+was.
+
+The results are compared with ``--baseline``, and the script fails if a stage
+that took at least ``--min-seconds`` is more than ``--max-slowdown`` times
+slower, or uses more than ``--max-memory-growth`` times the memory, than in
+the baseline at the same size. ``--save-baseline`` stores the results as the
+new baseline instead. Baselines depend on the machine; the stored one was
+measured on a single CPU core.
+
+Example command line usage:
+python utils/benchmark_scaling.py --validated-data=data/processed/validated_data.csv --sizes="1000,10000,100000" --max-fit-rows=1000
+
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import click
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.generate_synthetic_data import write_synthetic_data
+from scripts.run_pipeline import RAW_DATA, pipeline_stages
+from src.pipeline import Stage
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "benchmark_scaling.json")
+STAGES = ["validate", "split", "eda", "fit", "evaluate"]
+
+
+def relocate(value, workdir):
+    """
+    ``value`` with paths under ``data/`` and ``results/`` moved to ``workdir``.
+    """
+    if isinstance(value, str) and value.split("/")[0] in ("data", "results"):
+        return os.path.join(workdir, value)
+    return value
+
+
+def run_stage(stage, workdir, trace_path):
+    """
+    Run a pipeline stage with its files under ``workdir`` and return its wall
+    time and peak memory from its ``--profile`` trace.
+    """
+    params = {key: relocate(value, workdir) for key, value in stage.params.items()}
+    params.update({"profile": True, "profile-to": trace_path})
+    argv = Stage(stage.name, stage.command, params).argv()
+    subprocess.run(argv, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with open(trace_path) as f:
+        trace = json.load(f)
+    root = next(e for e in trace["traceEvents"] if e["ph"] == "X" and e["tid"] == 0 and e["name"] == trace["otherData"]["script"])
+    return {"wall_s": round(root["dur"] / 1e6, 3), "peak_rss_mb": round(trace["otherData"]["peak_rss_mb"], 1)}
+
+
+def machine():
+    """
+    Python version, platform and number of CPUs, stored with the baseline.
+    """
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, max_slowdown, max_memory_growth, min_seconds):
+    """
+    ``results`` with the baseline's figures and a ``regressed`` column.
+    """
+    reference = pd.DataFrame(baseline["results"], columns=["stage", "rows", "wall_s", "peak_rss_mb"])
+    table = results.merge(reference, on=["stage", "rows"], how="left", suffixes=("", "_baseline"))
+    slower = (table["wall_s_baseline"] >= min_seconds) & (table["wall_s"] > max_slowdown * table["wall_s_baseline"])
+    larger = table["peak_rss_mb"] > max_memory_growth * table["peak_rss_mb_baseline"]
+    table["regressed"] = (slower | larger).map({True: "yes", False: ""})
+    return table
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data the synthetic rows follow (any format)")
+@click.option("--sizes", type=str, default="1000,10000,100000", help="Comma-separated numbers of raw rows")
+@click.option("--max-fit-rows", type=int, default=1000, help="Largest size the SVC search runs on")
+@click.option("--error-rate", type=float, default=0.01, help="Fraction of synthetic rows with an invalid value")
+@click.option("--duplicate-rate", type=float, default=0.05, help="Fraction of synthetic rows that copy another row")
+@click.option("--baseline", type=str, default=BASELINE, help="Path of the stored baseline (JSON)")
+@click.option("--save-baseline", is_flag=True, default=False, help="Store the results as the baseline instead of checking them")
+@click.option("--max-slowdown", type=float, default=1.5, help="Largest accepted ratio of a stage's wall time to the baseline")
+@click.option("--max-memory-growth", type=float, default=1.25, help="Largest accepted ratio of a stage's peak memory to the baseline")
+@click.option("--min-seconds", type=float, default=1.0, help="Stages shorter than this in the baseline are not checked for time")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, sizes, max_fit_rows, error_rate, duplicate_rate, baseline, save_baseline, max_slowdown,
+         max_memory_growth, min_seconds, seed):
+    """print the time and peak memory of every stage at every size and check them against the baseline"""
+    stages = {stage.name: stage for stage in pipeline_stages(seed)}
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in ["data/raw", "data/processed", "results/models", "results/figures", "results/tables"]:
+            os.makedirs(os.path.join(workdir, name))
+        fitted = False
+        for n_rows in sorted(int(size) for size in sizes.split(",")):
+            write_synthetic_data(validated_data, n_rows, relocate(RAW_DATA, workdir), error_rate, duplicate_rate,
+                                 seed=seed)
+            for name in STAGES:
+                if name == "fit" and n_rows > max_fit_rows and fitted:
+                    continue
+                fitted = fitted or name == "fit"
+                measured = run_stage(stages[name], workdir, os.path.join(workdir, f"{name}-{n_rows}.json"))
+                rows.append({"stage": name, "rows": n_rows, **measured})
+                print(f"{name:<9} {n_rows:>10} rows {measured['wall_s']:>9.2f}s {measured['peak_rss_mb']:>9.1f} MB",
+                      flush=True)
+    results = pd.DataFrame(rows)
+
+    if save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline)), exist_ok=True)
+        with open(baseline, "w") as f:
+            json.dump({"machine": machine(), "results": rows}, f, indent=1)
+        print(f"baseline written to {baseline}")
+        return
+
+    with open(baseline) as f:
+        stored = json.load(f)
+    if stored["machine"] != machine():
+        print(f"note: the baseline was measured on {stored['machine']}")
+    table = compare(results, stored, max_slowdown, max_memory_growth, min_seconds)
+    print()
+    print(table.to_string(index=False, float_format="%.2f"))
+    regressed = table[table["regressed"] == "yes"]
+    if len(regressed):
+        print(f"\n{len(regressed)} stage(s) regressed against the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare hyperparameter search engines on wall time and weighted recall.
+
+The training data is resampled (with a small Gaussian jitter, so resampled rows
+are not exact duplicates) to each requested size, every engine in
+``src.tuning.SEARCH_ENGINES`` is fitted on it, and the best cross-validated
+weighted recall plus the weighted recall of the refitted model on the held-out
+test set are reported.
+
+Example command line usage:
+python utils/benchmark_search_engines.py --training-data=data/processed/maternal_health_risk_train.csv --test-data=data/processed/maternal_health_risk_test.csv --preprocessor=results/models/maternal_risk_preprocessor.pickle --sizes="700,2000,5000"
+
+"""
+
+import warnings
+warnings.filterwarnings("ignore")
+
+import os
+import sys
+import time
+import pickle
+import click
+import numpy as np
+import pandas as pd
+from sklearn.metrics import recall_score
+from sklearn.pipeline import make_pipeline
+from sklearn.svm import SVC
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.tuning import SEARCH_ENGINES, make_search
+from src.data_io import read_table
+
+FEATURE_COLS = ["Age", "SystolicBP", "DiastolicBP", "BS", "BodyTemp", "HeartRate"]
+
+
+def resample_training_data(train_df, n_rows, seed, jitter=0.05):
+    """
+    Draw ``n_rows`` rows with replacement, stratified by ``RiskLevel``, and add
+    Gaussian noise of ``jitter`` standard deviations to every feature.
+    """
+    rng = np.random.default_rng(seed)
+    sample = train_df.groupby("RiskLevel", group_keys=False).apply(
+        lambda g: g.sample(
+            max(1, round(n_rows * len(g) / len(train_df))),
+            replace=True,
+            random_state=int(rng.integers(2**31)),
+        )
+    ).reset_index(drop=True)
+    noise = rng.normal(0, jitter, size=(len(sample), len(FEATURE_COLS))) * train_df[FEATURE_COLS].std().to_numpy()
+    sample[FEATURE_COLS] = sample[FEATURE_COLS].to_numpy(dtype=float) + noise
+    return sample
+
+
+@click.command()
+@click.option("--training-data", type=str, required=True, help="Path to the training data CSV")
+@click.option("--test-data", type=str, required=True, help="Path to the test data CSV")
+@click.option("--preprocessor", type=str, required=True, help="Path to the preprocessor object (pickle)")
+@click.option("--sizes", type=str, default="700,2000,5000", help="Comma-separated training set sizes")
+@click.option("--n-candidates", type=int, default=100, help="Number of sampled hyperparameter combinations")
+@click.option("--cv", type=int, default=10, help="Number of cross-validation folds")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(training_data, test_data, preprocessor, sizes, n_candidates, cv, seed):
+    """print wall time and weighted recall of every search engine at every training size"""
+    train_df = read_table(training_data, columns=FEATURE_COLS + ["RiskLevel"])
+    test_df = read_table(test_data, columns=FEATURE_COLS + ["RiskLevel"])
+    with open(preprocessor, "rb") as f:
+        preprocessor = pickle.load(f)
+
+    rows = []
+    for n_rows in [int(s) for s in sizes.split(",")]:
+        data = train_df if n_rows == len(train_df) else resample_training_data(train_df, n_rows, seed)
+        for engine in SEARCH_ENGINES:
+            search = make_search(
+                make_pipeline(preprocessor, SVC(random_state=seed)),
+                engine=engine,
+                n_candidates=n_candidates,
+                cv=cv,
+                random_state=seed,
+            )
+            start = time.perf_counter()
+            search.fit(data[FEATURE_COLS], data["RiskLevel"])
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "rows": len(data),
+                "engine": engine,
+                "wall_s": elapsed,
+                "best_cv_recall_weighted": search.best_score_,
+                "test_recall_weighted": recall_score(
+                    test_df["RiskLevel"], search.predict(test_df[FEATURE_COLS]), average="weighted"
+                ),
+            })
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
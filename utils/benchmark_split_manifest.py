@@ -0,0 +1,104 @@
+"""Compare the tables and the ``--manifest`` outputs of ``split_preprocess_data.py``.
+
+Synthetic validated data of ``--n-rows`` rows (``src/synthetic.py``) is
+written in ``--data-format`` and split twice with the pipeline's settings:
+once writing the train, test and scaled tables, once with ``--manifest``,
+which only writes the row positions of each split (``.npy``) next to the
+preprocessor. For both runs the script reports the wall time of the split
+(from its ``--profile`` trace), the bytes written and the time to read the
+train split back. It fails if reading the train or test split through its
+index does not give the same rows as the table, or if scaling them with the
+manifest run's preprocessor does not give the scaled tables.
+
+Example command line usage:
+python utils/benchmark_split_manifest.py --validated-data=data/processed/validated_data.csv --n-rows=5000000
+
+"""
+
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import click
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import DATA_FORMATS, read_table, table_path, write_table
+from src.scaling import scaled_frame
+from src.schema import COMPACT_DTYPES, apply_dtypes
+from src.synthetic import class_profiles, generate_rows
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SPLITS = ["maternal_health_risk_train", "maternal_health_risk_test"]
+
+
+def run_split(validated_data, workdir, data_format, options):
+    """
+    Run ``split_preprocess_data.py`` into ``workdir`` and return its wall
+    time and the bytes of the files it wrote.
+    """
+    trace_path = workdir + "-profile.json"
+    argv = [
+        sys.executable, "scripts/split_preprocess_data.py",
+        f"--validated-data={validated_data}", f"--data-to={workdir}", f"--preprocessor-to={workdir}",
+        f"--data-format={data_format}", "--profile", f"--profile-to={trace_path}",
+    ] + options
+    subprocess.run(argv, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with open(trace_path) as f:
+        trace = json.load(f)
+    root = next(e for e in trace["traceEvents"] if e["ph"] == "X" and e["name"] == "split_preprocess_data")
+    size = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+    return {"wall_s": root["dur"] / 1e6, "written_mb": size / 2 ** 20}
+
+
+def timed_read(path):
+    """
+    The table at ``path`` and the seconds it took to read.
+    """
+    start = time.perf_counter()
+    data = read_table(path, dtypes=COMPACT_DTYPES)
+    return data, time.perf_counter() - start
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data the synthetic rows follow (any format)")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of synthetic rows")
+@click.option("--data-format", type=click.Choice(DATA_FORMATS), default="parquet", help="Format of the validated data and the tables")
+@click.option("--split-mode", type=click.Choice(["random", "hash"]), default="random", help="Split mode of both runs")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, n_rows, data_format, split_mode, seed):
+    """print the time and size of both outputs and check that the indexes give the same splits"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = table_path(tmp, "validated_data", data_format)
+        data = generate_rows(class_profiles(read_table(validated_data)), n_rows, seed)
+        write_table(apply_dtypes(data, COMPACT_DTYPES), data_path)
+        del data
+
+        tables, indexes = os.path.join(tmp, "tables"), os.path.join(tmp, "manifest")
+        options = [f"--split-mode={split_mode}", f"--random-state={seed}"]
+        rows = [{"output": "tables", **run_split(data_path, tables, data_format, options)},
+                {"output": "manifest", **run_split(data_path, indexes, data_format, options + ["--manifest"])}]
+
+        with open(os.path.join(indexes, "maternal_risk_preprocessor.pickle"), "rb") as f:
+            preprocessor = pickle.load(f)
+        for name in SPLITS:
+            table, table_s = timed_read(table_path(tables, name, data_format))
+            viewed, viewed_s = timed_read(os.path.join(indexes, name + ".npy"))
+            if name == SPLITS[0]:
+                rows[0]["read_train_s"], rows[1]["read_train_s"] = table_s, viewed_s
+            assert table.equals(viewed), f"{name}: the index gives different rows"
+            scaled = read_table(table_path(tables, "scaled_" + name, data_format))
+            view = scaled_frame(preprocessor, viewed)
+            features = scaled.columns.drop("RiskLevel")
+            assert list(view.columns) == list(scaled.columns), f"{name}: different scaled columns"
+            assert np.allclose(scaled[features], view[features], rtol=1e-6, atol=1e-6), f"{name}: scaled values differ"
+        print(pd.DataFrame(rows).assign(rows=n_rows).to_string(index=False, float_format="%.3f"))
+        print("the indexes give the same splits and scaled views as the tables")
+
+
+if __name__ == "__main__":
+    main()
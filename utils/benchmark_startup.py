@@ -0,0 +1,89 @@
+"""Measure the cold-start import cost of each pipeline script.
+
+Each script is executed in a fresh interpreter with ``runpy.run_path`` under a
+name other than ``__main__``, so only its module-level code (imports and
+constants) runs. The interpreter's own startup time is measured separately and
+subtracted, and ``python -X importtime`` is used to list the heaviest
+top-level imports of each script.
+
+Example command line usage:
+python utils/benchmark_startup.py --scripts-dir="scripts" --repeats=5
+
+"""
+
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+import click
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def time_command(args, repeats):
+    """
+    Median wall time in seconds of running ``args`` in a subprocess, or None
+    if the command fails (e.g. a dependency is not installed).
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return None
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def top_level_imports(code):
+    """
+    Cumulative import time in seconds of every top-level module imported while
+    running ``code`` in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # a single space of indentation marks a module imported directly by the script
+        if match and len(match.group(3)) == 1:
+            cumulative[match.group(4)] = int(match.group(2)) / 1e6
+    return cumulative
+
+
+def heaviest_imports(script, exclude, top=3):
+    """
+    Top-level modules imported by ``script`` with the largest cumulative
+    import time, as a list of (module, seconds) tuples. Modules in
+    ``exclude`` (imported by the bare interpreter) are ignored.
+    """
+    cumulative = top_level_imports(f"import runpy; runpy.run_path({str(script)!r})")
+    ranked = sorted(cumulative.items(), key=lambda item: -item[1])
+    return [(name, seconds) for name, seconds in ranked if name not in exclude][:top]
+
+
+@click.command()
+@click.option("--scripts-dir", default="scripts", type=str, help="Directory containing the pipeline scripts. Default is `scripts`")
+@click.option("--repeats", default=5, type=int, help="Number of cold starts per script; the median is reported. Default is 5")
+def main(scripts_dir, repeats):
+    """print the median import cost and heaviest imports of every script"""
+    baseline = time_command([sys.executable, "-c", "pass"], repeats)
+    interpreter_imports = set(top_level_imports("pass"))
+    print(f"Interpreter startup: {baseline:.3f}s (subtracted below)\n")
+    print(f"{'script':<50} {'import s':>9}  heaviest imports")
+    for script in sorted(Path(scripts_dir).glob("*.py")):
+        elapsed = time_command([sys.executable, "-c", f"import runpy; runpy.run_path({str(script)!r})"], repeats)
+        if elapsed is None:
+            print(f"{script.name:<50} {'failed':>9}  (import error, is a dependency missing?)")
+            continue
+        heaviest = ", ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in heaviest_imports(script, interpreter_imports)
+        )
+        print(f"{script.name:<50} {elapsed - baseline:>9.3f}  {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the pandera and vectorized validation engines on dirty synthetic data.
+
+Rows of the raw data are resampled to the requested size and a fraction of
+them (``--error-rate``) get one injected error each: an out-of-range feature
+value or an unknown RiskLevel. Both engines of ``src.validation.validate_frame``
+are timed on the same data, and the script fails if they disagree on the
+validated rows or the error message.
+
+Example command line usage:
+python utils/benchmark_validation.py --raw-data="data/raw/Maternal Health Risk Data Set.csv" --n-rows=1000000 --error-rate=0.05
+
+"""
+
+import os
+import sys
+import time
+import click
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.validation import EXPECTED_COLUMNS, FEATURE_COLS, FEATURE_RANGES, VALIDATION_ENGINES, validate_frame
+from src.synthetic import inject_errors
+
+
+def make_dirty_data(raw_df, n_rows, error_rate, seed):
+    """
+    Resample ``n_rows`` rows and inject one error into a random
+    ``error_rate`` fraction of them.
+    """
+    rng = np.random.default_rng(seed)
+    data = raw_df.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    return inject_errors(data, error_rate, rng)
+
+
+@click.command()
+@click.option("--raw-data", type=str, required=True, help="Path to the raw data CSV")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of synthetic rows")
+@click.option("--error-rate", type=float, default=0.05, help="Fraction of rows with an injected error")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(raw_data, n_rows, error_rate, seed):
+    """print the wall time of every validation engine and check that they agree"""
+    raw_df = pd.read_csv(raw_data)[EXPECTED_COLUMNS]
+    # keep the original dtypes so int columns stay int
+    raw_df = raw_df.dropna().astype({name: FEATURE_RANGES[name][0] for name in FEATURE_COLS})
+    data = make_dirty_data(raw_df, n_rows, error_rate, seed)
+
+    results = {}
+    rows = []
+    for engine in VALIDATION_ENGINES:
+        start = time.perf_counter()
+        results[engine] = validate_frame(data, engine=engine)
+        rows.append({"engine": engine, "rows": len(data), "wall_s": time.perf_counter() - start})
+    timings = pd.DataFrame(rows)
+    timings["speedup"] = timings["wall_s"].iloc[0] / timings["wall_s"]
+    print(timings.to_string(index=False, float_format="%.3f"))
+
+    (reference, reference_message), (validated, message) = results["pandera"], results["vectorized"]
+    assert validated.equals(reference), "engines kept different rows"
+    assert message == reference_message, "engines produced different error messages"
+    print(f"engines agree: {len(reference)} of {len(data)} rows kept, identical error message")
+
+
+if __name__ == "__main__":
+    main()
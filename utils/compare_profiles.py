@@ -0,0 +1,77 @@
+"""Compare two traces written by a script's ``--profile`` option.
+
+The phases of each trace are summed by name (numbered phases such as the
+search candidates are grouped, ``candidate 0`` to ``candidate 99`` become
+``candidate``), and for each name the number of phases, their wall and CPU
+time and the largest traced and resident memory peaks of both runs are
+printed side by side, with the ratio of the wall times. Phases measured in
+other processes (figure workers, search candidates) have no CPU or memory
+figures. With ``--max-slowdown``, the script fails if a phase that took at
+least ``--min-seconds`` in the first run is more than that many times slower
+in the second.
+
+Example command line usage:
+python utils/compare_profiles.py results/profiles/fit_maternal_health_risk_classifier-20260101-120000.json results/profiles/fit_maternal_health_risk_classifier-20260102-120000.json --max-slowdown=1.5
+
+"""
+
+import json
+import re
+import sys
+import click
+import numpy as np
+import pandas as pd
+
+
+def phase_summary(path):
+    """
+    Totals of the phases of a trace, by name.
+    """
+    with open(path) as f:
+        events = [e for e in json.load(f)["traceEvents"] if e["ph"] == "X"]
+    rows = [
+        {
+            "phase": re.sub(r" \d+$", "", e["name"]),
+            "n": 1,
+            "wall_s": e["dur"] / 1e6,
+            "cpu_s": e["args"].get("cpu_s", np.nan),
+            "traced_peak_mb": e["args"].get("traced_peak_mb", np.nan),
+            "peak_rss_mb": e["args"].get("peak_rss_mb", np.nan),
+        }
+        for e in events
+    ]
+    columns = ["phase", "n", "wall_s", "cpu_s", "traced_peak_mb", "peak_rss_mb"]
+    return pd.DataFrame(rows, columns=columns).groupby("phase", sort=False).agg(
+        n=("n", "sum"),
+        wall_s=("wall_s", "sum"),
+        cpu_s=("cpu_s", lambda x: x.sum(min_count=1)),
+        traced_peak_mb=("traced_peak_mb", "max"),
+        peak_rss_mb=("peak_rss_mb", "max"),
+    )
+
+
+@click.command()
+@click.argument("first", type=click.Path(exists=True))
+@click.argument("second", type=click.Path(exists=True))
+@click.option("--max-slowdown", type=float, default=None, help="Fail if a phase's wall time grows by more than this factor")
+@click.option("--min-seconds", type=float, default=0.1, help="Phases shorter than this in the first run are not checked")
+def main(first, second, max_slowdown, min_seconds):
+    """print the phases of two profiled runs side by side"""
+    a, b = phase_summary(first), phase_summary(second)
+    table = a.join(b, how="outer", lsuffix="_a", rsuffix="_b", sort=False)
+    table = table.reindex(list(a.index) + [name for name in b.index if name not in a.index])
+    table[["n_a", "n_b"]] = table[["n_a", "n_b"]].astype("Int64")
+    table["wall_ratio"] = table["wall_s_b"] / table["wall_s_a"]
+    columns = ["n_a", "n_b", "wall_s_a", "wall_s_b", "wall_ratio", "cpu_s_a", "cpu_s_b",
+               "traced_peak_mb_a", "traced_peak_mb_b", "peak_rss_mb_a", "peak_rss_mb_b"]
+    print(table[columns].to_string(float_format="%.3f"))
+
+    if max_slowdown is not None:
+        slower = table[(table["wall_s_a"] >= min_seconds) & (table["wall_ratio"] > max_slowdown)]
+        if len(slower):
+            print(f"\n{len(slower)} phase(s) more than {max_slowdown}x slower: {', '.join(slower.index)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
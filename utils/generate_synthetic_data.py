@@ -0,0 +1,97 @@
+"""Write a synthetic raw data CSV of any size for testing the pipeline.
+
+The rows follow the class shares and class-conditional feature distributions
+of the validated data (``src/synthetic.py``) and are written in the format of
+the raw UCI file, so they can be passed to ``validate_data.py --raw-data``.
+Rows are generated ``--chunk-size`` at a time, each chunk from its own seed,
+so the output does not depend on the memory available. ``--error-rate`` and
+``--duplicate-rate`` control the fraction of rows with an invalid value and
+of exact copies of other rows (within a chunk). The class shares, means and
+standard deviations of the source and the synthetic rows are printed.
+
+Example command line usage:
+python utils/generate_synthetic_data.py --validated-data=data/processed/validated_data.csv --n-rows=1000000 --write-to=data/raw/synthetic_1000000.csv --error-rate=0.01 --duplicate-rate=0.05
+
+"""
+
+import os
+import sys
+import click
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_io import read_table, TableWriter
+from src.schema import FEATURE_COLS, FEATURE_RANGES, RISK_LEVELS
+from src.synthetic import class_profiles, generate_rows
+
+
+def write_synthetic_data(validated_data, n_rows, write_to, error_rate=0.0, duplicate_rate=0.0,
+                         chunk_size=1_000_000, seed=123):
+    """
+    Write ``n_rows`` synthetic rows following ``validated_data`` to
+    ``write_to``; returns ``summarize`` of the source and of the synthetic
+    rows without an injected error.
+    """
+    source = read_table(validated_data)
+    profiles = class_profiles(source)
+    starts = range(0, n_rows, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    moments = []
+    with TableWriter(write_to) as writer:
+        for start, chunk_seed in zip(starts, seeds):
+            chunk = generate_rows(profiles, min(chunk_size, n_rows - start), chunk_seed, error_rate, duplicate_rate)
+            writer.write(chunk)
+            moments.append(class_moments(chunk))
+    return summarize([class_moments(source.dropna())]), summarize(moments)
+
+
+def class_moments(data):
+    """
+    Number of rows, sums and sums of squares of the features of every
+    class, over the rows without an invalid value.
+    """
+    highs = [FEATURE_RANGES[name][2] for name in FEATURE_COLS]
+    valid = data[FEATURE_COLS].le(highs).all(axis=1) & data["RiskLevel"].astype(str).isin(RISK_LEVELS)
+    features = data.loc[valid, FEATURE_COLS].astype(np.float64)
+    labels = data.loc[valid, "RiskLevel"].astype(str)
+    return pd.concat({
+        "rows": features.groupby(labels).size().to_frame("n"),
+        "sum": features.groupby(labels).sum(),
+        "squares": (features ** 2).groupby(labels).sum(),
+    }, axis=1)
+
+
+def summarize(moments):
+    """
+    Share of every class and the mean and standard deviation of its features,
+    from ``class_moments`` of one or more chunks.
+    """
+    total = pd.concat(moments).groupby(level=0).sum()
+    n = total[("rows", "n")]
+    mean = total["sum"].div(n, axis=0)
+    std = np.sqrt(total["squares"].div(n, axis=0) - mean ** 2)
+    summary = pd.concat({"mean": mean, "std": std}, axis=1)
+    summary.insert(0, ("share", ""), n / n.sum())
+    return summary.reindex([level for level in RISK_LEVELS if level in summary.index])
+
+
+@click.command()
+@click.option("--validated-data", type=str, required=True, help="Path to the validated data whose distributions are followed (any format)")
+@click.option("--n-rows", type=int, default=1_000_000, help="Number of rows to write")
+@click.option("--write-to", type=str, required=True, help="Path of the synthetic raw data (.csv)")
+@click.option("--error-rate", type=float, default=0.0, help="Fraction of rows with one invalid value")
+@click.option("--duplicate-rate", type=float, default=0.0, help="Fraction of rows that copy another row")
+@click.option("--chunk-size", type=int, default=1_000_000, help="Rows generated and written at a time")
+@click.option("--seed", type=int, default=123, help="Random seed")
+def main(validated_data, n_rows, write_to, error_rate, duplicate_rate, chunk_size, seed):
+    """write synthetic raw data and print how its class distributions compare to the source"""
+    if os.path.dirname(write_to):
+        os.makedirs(os.path.dirname(write_to), exist_ok=True)
+    source, synthetic = write_synthetic_data(validated_data, n_rows, write_to, error_rate, duplicate_rate,
+                                             chunk_size, seed)
+    print(pd.concat({"source": source, "synthetic": synthetic}, axis=1).T.to_string(float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()